@@ -65,6 +65,20 @@ parser.add_argument('--min-voltage', type=int, default=0,
 parser.add_argument('--max-voltage', type=int, default=float("inf"),
 	help="Only model grid parts with at most this voltage (in kV)")
 
+parser.add_argument('--scenarios', nargs='+',
+	help="Run these OPF scenarios headless instead of launching the dashboard ('all' for the whole library)")
+
+parser.add_argument('--jobs', type=int, default=os.cpu_count(),
+	help="Number of worker processes for --scenarios, --sites and --hosting-map (default: all cores)")
+
+parser.add_argument('--sites', type=str,
+	help="Screen the hosting capacity of the candidate sites in this CSV (columns lat, lon) headless; "
+		"the first --scenarios entry selects the scenario")
+
+parser.add_argument('--hosting-map', type=float, nargs='?', const=0.0, metavar='TARGET_MW',
+	help="Estimate the hosting capacity of every 220/380 kV bus headless (GeoJSON layer + map); with TARGET_MW "
+		"only buses that may host it are refined with the OPF. The first --scenarios entry selects the scenario")
+
 args = parser.parse_args()
 
 if args.radius and not args.area:
@@ -79,6 +93,15 @@ if args.area and not (0.0 < args.area[1] <= 20.0):
 if args.area and not (0.1 < args.radius <= 500.0):
     parser.error("Area radius must be between 0.1 and 500km")
 
+if args.sites and not os.path.isfile(args.sites):
+    parser.error(f"--sites file '{args.sites}' not found")
+
+if args.hosting_map is not None and args.hosting_map < 0:
+    parser.error("--hosting-map TARGET_MW must not be negative")
+
+if args.jobs is not None and args.jobs < 1:
+    parser.error("--jobs must be at least 1")
+
 
 # Build scenario dict
 scenario = {
@@ -89,7 +112,11 @@ scenario = {
 		'r_km': args.radius or 50
 	} if args.area else None,
 	'min_voltage': args.min_voltage * 1000,
-	'max_voltage': args.max_voltage * 1000
+	'max_voltage': args.max_voltage * 1000,
+	'opf_scenarios': args.scenarios,
+	'sites': os.path.abspath(args.sites) if args.sites else None,
+	'hosting_map': args.hosting_map,
+	'jobs': args.jobs
 }
 
 print("")
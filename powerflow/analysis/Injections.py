@@ -1,67 +1,156 @@
 """
 Injections- Calculates the maximum injection capacity.
 Warm Start, Cost Reset, Map Generation.
+Batch screening: many candidate sites against one pre-solved scenario base, solved in parallel workers.
+Pre-estimate: PTDF/voltage estimate and a power-flow bisection before the OPF, which then only searches a capped range.
 """
-import copy
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import numpy as np
 import pandas as pd
 import pandapower as pp
 from . import config
-from .opf import OPFEngine
+from .opf import OPFEngine, apply_dispatch, create_scenario_net
+from .spatial import get_bus_index
 from . import report_export as ReportGenerator
 from . import visualization as Visualizer
 
+# Accepted column names of candidate site tables
+SITE_COLUMNS = {'lat': ['lat', 'latitude'], 'lon': ['lon', 'lng', 'longitude']}
+
+# PF search violations of a thermal or voltage limit (see pre_estimate); other endings leave the OPF to decide
+PF_SEARCH_LIMITS = ('Line ', 'Trafo ', 'Voltage ')
+
+# Per-process state, filled once by _init_site_worker
+_WORKER = {}
+
+
+def load_sites(sites):
+    """
+    Candidate sites as a DataFrame with 'site', 'lat' and 'lon' columns, from a CSV path, a DataFrame,
+    or a list of (lat, lon) tuples / dicts. Extra columns are kept.
+    """
+    if isinstance(sites, str):
+        frame = pd.read_csv(sites)
+    elif isinstance(sites, pd.DataFrame):
+        frame = sites.copy()
+    else:
+        sites = list(sites)
+        frame = pd.DataFrame(sites) if sites and isinstance(sites[0], dict) else \
+            pd.DataFrame(sites, columns=['lat', 'lon'])
+
+    lower = {c.lower().strip(): c for c in frame.columns}
+    for col, names in SITE_COLUMNS.items():
+        found = next((lower[n] for n in names if n in lower), None)
+        if found is None:
+            raise ValueError(f"Site table needs a '{col}' column (one of {names}).")
+        frame = frame.rename(columns={found: col})
+    if 'site' not in frame.columns:
+        frame.insert(0, 'site', frame['name'] if 'name' in frame.columns else np.arange(len(frame)))
+    frame['lat'] = frame['lat'].astype(float)
+    frame['lon'] = frame['lon'].astype(float)
+    return frame.reset_index(drop=True)
+
+
+def _site_record(bus_idx):
+    """Unsolved evaluate_bus record; also gives the columns of an empty evaluate_buses frame."""
+    return {'bus_id': bus_idx, 'converged': False, 'max_injection_mw': np.nan, 'limiting_factor': None,
+            'method': None, 'estimate_mw': np.nan, 'pf_mw': np.nan, 'pf_checks': 0,
+            'fallback_step': None, 'relaxations': None, 'error': None, 'duration_s': np.nan}
+
+
+def _init_site_worker(base_net, external_grids, site_base, scenario_name, export):
+    """Process pool initializer: one analyzer per worker, sharing the pre-solved scenario net."""
+    analyzer = InjectionAnalyzer(base_net, external_grids)
+    analyzer._set_scenario(scenario_name)
+    _WORKER['analyzer'] = analyzer
+    _WORKER['site_base'] = site_base
+    _WORKER['export'] = export
+
+
+def _run_site_worker(bus_idx):
+    analyzer = _WORKER['analyzer']
+    return analyzer.evaluate_bus(_WORKER['site_base'], bus_idx, export=_WORKER['export'])
+
+
 class InjectionAnalyzer:
     def __init__(self, base_net, external_grids):
         self.base_net = base_net
         self.external_grids = external_grids
         self.engine_helper = OPFEngine(base_net, external_grids)
+        self.bus_index = get_bus_index(base_net)
 
     def find_best_connection_point(self, lat, lon, min_vn_kv=110.0):
         print(f"  > Searching for nearest bus to ({lat}, {lon}) with Voltage >= {min_vn_kv}kV...")
-        suitable_buses = self.base_net.bus[self.base_net.bus['vn_kv'] >= min_vn_kv].copy()
-
-        def calc_dist(row):
-            bus_geo = self.base_net.bus.at[row.name, 'geo']
-            return (lat - bus_geo[0])**2 + (lon - bus_geo[1])**2 if bus_geo else float('inf')
-
-        suitable_buses['dist_sq'] = suitable_buses.apply(calc_dist, axis=1)
-        nearest = suitable_buses.loc[suitable_buses['dist_sq'].idxmin()]
-        dist_km = np.sqrt(nearest['dist_sq']) * 111.0
+        bus_idx, dist_km = self.bus_index.nearest(lat, lon, min_vn_kv=min_vn_kv)
+        nearest = self.base_net.bus.loc[bus_idx]
 
         print(f"    Found Bus {nearest.name} ('{nearest['name']}') {nearest['vn_kv']} kV, ~{dist_km:.2f} km")
         return nearest.name, nearest['vn_kv'], dist_km
 
-    def analyze_hosting_capacity(self, lat, lon, scenario_name='average_of_2024', base_result_net=None):
-        bus_idx, vn_kv, dist = self.find_best_connection_point(lat, lon)
-        print(f"\n[Injection Analysis] Assessing capacity at Bus {bus_idx}...")
+    def find_connection_points(self, lat, lon, min_vn_kv=110.0):
+        """Vectorized find_best_connection_point for arrays of sites: (bus indices, distances in km)."""
+        return self.bus_index.nearest(np.asarray(lat, dtype=float), np.asarray(lon, dtype=float), min_vn_kv=min_vn_kv)
 
-        # 1. 准备网络
-        if base_result_net:
-            print("  > Using Warm Start.")
-            net = copy.deepcopy(base_result_net)
-        else:
-            print("  > Cold Start.")
-            scen = self.engine_helper.scenarios[scenario_name]
-            net, _ = self.engine_helper._apply_scenario(scen)
+    def _set_scenario(self, scenario_name):
+        """Makes `scenario_name` the engine's current scenario (its costs are used for the site solves)."""
+        engine = self.engine_helper
+        if scenario_name in engine.scenarios:
+            engine.current_scenario_name = scenario_name
+            engine.current_scenario_config = engine.scenarios[scenario_name]
+        elif engine.current_scenario_config is None:
+            raise ValueError(f"Scenario '{scenario_name}' not found.")
 
-            # [CRITICAL FIX]
-            # If cold start, we have no results yet. Smart Constraint Filtering relies on
-            # knowing which lines are currently overloaded. We must run a basic PF first.
-            print("  > Running pre-calc Power Flow for constraint filtering...")
-            try:
-                pp.runpp(net, numba=False)
-            except Exception as e:
-                print(f"    Warning: Pre-calc PF failed ({e}). Filtering might be less effective.")
+    def _cold_start_net(self, scenario_name):
+        """Scenario net with a plain PF result (no OPF), so line limits can be filtered by current loading."""
+        self._set_scenario(scenario_name)
+        net, _ = self.engine_helper._apply_scenario(self.engine_helper.current_scenario_config)
+
+        # [CRITICAL FIX]
+        # If cold start, we have no results yet. Smart Constraint Filtering relies on
+        # knowing which lines are currently overloaded. We must run a basic PF first.
+        print("  > Running pre-calc Power Flow for constraint filtering...")
+        try:
+            pp.runpp(net, numba=False)
+        except Exception as e:
+            print(f"    Warning: Pre-calc PF failed ({e}). Filtering might be less effective.")
+        return net
+
+    def prepare_base(self, scenario_name=None):
+        """
+        Pre-solved scenario net shared by all sites of a batch: the scenario's OPF solution (costs and
+        limits already set up), or its plain PF if the OPF does not converge.
+        """
+        scenario_name = scenario_name or config.HOSTING_CAPACITY_SCENARIO
+        self._set_scenario(scenario_name)
+        print(f"  > Pre-solving scenario '{scenario_name}' as the shared site base...")
+        net, _, converged = self.engine_helper.run_scenario(scenario_name)
+        if converged:
+            return net
+        print("  ⚠ Scenario OPF did not converge. Sites start from its power flow instead.")
+        net = self._cold_start_net(scenario_name)
+        self.engine_helper.scenario_net = net
+        self.engine_helper._setup_opf_costs()
+        return net
+
+    def _prepare_site_net(self, base, bus_idx, full_setup=True):
+        """Copy of `base` with the virtual injection unit at `bus_idx`, its incentive cost and the line limits."""
+        net = create_scenario_net(base)
 
         # 2. 添加虚拟发电机
         inj_idx = pp.create_gen(net, bus=bus_idx, p_mw=0, min_p_mw=0, max_p_mw=5000,
             vm_pu=1.02, sn_mva=5000, name="VIRTUAL_INJECTION_TEST", type="virtual_injection", controllable=True)
 
         # 3. 设置基础成本
-        if 'poly_cost' in net: net.poly_cost.drop(net.poly_cost.index, inplace=True)
         self.engine_helper.scenario_net = net
-        self.engine_helper._setup_opf_costs()
+        if full_setup:
+            if 'poly_cost' in net: net.poly_cost.drop(net.poly_cost.index, inplace=True)
+            self.engine_helper._setup_opf_costs()
+        else:
+            # Pre-solved base: limits and costs are in place, only the new unit needs its Q range
+            self.engine_helper._apply_q_limits(net)
 
         # 4. 设置注入负成本 (激励注入)
         cost_df = net.poly_cost
@@ -73,73 +162,376 @@ class InjectionAnalyzer:
             pp.create_poly_cost(net, element=inj_idx, et='gen', cp1_eur_per_mw=-1000.0)
 
         # =================================================================
-        # [NEW] 智能约束筛选 (Smart Constraint Filtering)
+        # 智能约束筛选 (Smart Constraint Filtering) -> lazy line limits of the OPF engine
         # =================================================================
-        TARGET_LIMIT = config.MAX_LINE_LOADING_PERCENT if config.MAX_LINE_LOADING_PERCENT > 0 else 100.0
+        limits = self.smart_line_limits(net)
+        connected_lines = net.line[(net.line.from_bus == bus_idx) | (net.line.to_bus == bus_idx)].index
+        self.engine_helper.init_line_limits(net, enforce=True, limits=limits, always=connected_lines)
+        # =================================================================
+        return net, inj_idx
 
-        print(f"  > Applying smart line limits (Target: {TARGET_LIMIT}%)...")
+    def smart_line_limits(self, net, verbose=True):
+        """Loading limit (%) per line for the injection OPF: the target limit, or the pre-injection loading + 20%."""
+        TARGET_LIMIT = config.MAX_LINE_LOADING_PERCENT if config.MAX_LINE_LOADING_PERCENT > 0 else 100.0
 
-        # Reset limits
-        net.line['max_loading_percent'] = 0.0
+        if verbose: print(f"  > Applying smart line limits (Target: {TARGET_LIMIT}%)...")
 
-        # Identify critical lines
+        # Lines already overloaded before the injection get headroom to avoid immediate infeasibility
+        limits = pd.Series(TARGET_LIMIT, index=net.line.index)
         if 'loading_percent' in net.res_line.columns:
-            critical_mask = net.res_line['loading_percent'] > 80.0
-            critical_lines = net.res_line[critical_mask].index
+            current_load = net.res_line['loading_percent'].reindex(net.line.index).fillna(0.0)
+            limits = np.maximum(limits, current_load + 20.0)
+        return limits
+
+    def pre_estimate(self, base, net, bus_idx, inj_idx):
+        """
+        Max injection at `bus_idx` without an OPF. An analytic estimate from the line PTDFs and the voltage
+        sensitivity of one probe PF is narrowed by bisection over AC power flows of the base dispatch, the
+        injection balanced by the slack (no redispatch). With redispatch the OPF may get further, so neither
+        figure is an upper bound. Leaves the best feasible PF in the res_* tables of `net`, so the confirming
+        OPF can skip its own PF.
+        """
+        from .hosting_map import screen_buses
+        unit_max = float(net.gen.at[inj_idx, 'max_p_mw'])
+        line_limits = self.smart_line_limits(base, verbose=False)
+        thermal = screen_buses(base, [bus_idx], line_limits)
+        bound_thermal = float(thermal.at[0, 'est_max_mw'])
+
+        # PF copy of the site net at the base operating point; the virtual unit starts at 0 MW
+        pf_net = create_scenario_net(net, mutable_tables=('gen', 'sgen', 'storage', 'ext_grid', 'dcline'))
+        apply_dispatch(pf_net)
+        pf_net.gen.at[inj_idx, 'p_mw'] = 0.0
+        vm_max = pf_net.bus['max_vm_pu'].fillna(config.BUS_MAX_VM_PU) if 'max_vm_pu' in pf_net.bus.columns \
+            else pd.Series(config.BUS_MAX_VM_PU, index=pf_net.bus.index)
+        vm_min = pf_net.bus['min_vm_pu'].fillna(config.BUS_MIN_VM_PU) if 'min_vm_pu' in pf_net.bus.columns \
+            else pd.Series(config.BUS_MIN_VM_PU, index=pf_net.bus.index)
+        # Trafo limits as the OPF enforces them (0 / missing = unconstrained)
+        trafo_limits = pd.Series(np.inf, index=pf_net.trafo.index)
+        if 'max_loading_percent' in pf_net.trafo.columns:
+            trafo_limits = pf_net.trafo['max_loading_percent'].where(lambda x: x > 0).fillna(np.inf).astype(float)
+        state = {'checks': 0, 'init': 'auto'}
+
+        def check(p_mw):
+            """None if the PF at `p_mw` converges within all line/trafo limits and the voltage band, else the violation."""
+            state['checks'] += 1
+            pf_net.gen.at[inj_idx, 'p_mw'] = p_mw
+            try:
+                pp.runpp(pf_net, init=state['init'], numba=False, calculate_voltage_angles=True,
+                         max_iteration=config.PF_MAX_ITERATION)
+            except Exception:
+                state['init'] = 'auto'
+                return "Power flow divergence"
+            state['init'] = 'results'
+            loading = pf_net.res_line['loading_percent'].reindex(line_limits.index)
+            over = loading - line_limits
+            if (over > config.LAZY_LINE_LIMIT_TOLERANCE_PERCENT).any():
+                line = over.idxmax()
+                return f"Line {line} Overload ({loading[line]:.1f}%)"
+            if len(trafo_limits) > 0:
+                trafo_loading = pf_net.res_trafo['loading_percent'].reindex(trafo_limits.index).fillna(0.0)
+                over = trafo_loading - trafo_limits
+                if (over > config.LAZY_LINE_LIMIT_TOLERANCE_PERCENT).any():
+                    trafo = over.idxmax()
+                    return f"Trafo {trafo} Overload ({trafo_loading[trafo]:.1f}%)"
+            vm = pf_net.res_bus['vm_pu']
+            excess = pd.concat([vm - vm_max, vm_min - vm], axis=1).max(axis=1)
+            if (excess > 1e-4).any():
+                bus = excess.idxmax()
+                return f"Voltage at Bus {bus} ({vm[bus]:.3f} pu)"
+            return None
+
+        # Base point: its voltage band and trafo violations are tolerated (as overloaded lines get +20%)
+        base_violation = check(0.0)
+        if base_violation is not None and state['init'] == 'results':
+            vm0 = pf_net.res_bus['vm_pu']
+            vm_max, vm_min = np.maximum(vm_max, vm0), np.minimum(vm_min, vm0)
+            if len(trafo_limits) > 0:
+                trafo_limits = np.maximum(trafo_limits, pf_net.res_trafo['loading_percent'].reindex(
+                    trafo_limits.index).fillna(0.0))
+            base_violation = check(0.0)
+        if base_violation is not None:
+            print(f"  ⚠ Base operating point is infeasible for the PF search ({base_violation}).")
+            return {'estimate_mw': bound_thermal, 'pf_mw': 0.0, 'pf_limit': base_violation, 'pf_checks': state['checks']}
+        vm0 = pf_net.res_bus['vm_pu'].copy()
+
+        # Voltage sensitivity dV/dP from a probe injection
+        probe = min(config.HOSTING_CAPACITY_PROBE_MW, max(bound_thermal, config.HOSTING_CAPACITY_SEARCH_TOLERANCE_MW))
+        lo, hi, hi_limit = 0.0, None, None
+        probe_violation = check(probe)
+        if probe_violation is None:
+            lo = probe
+            dv = (pf_net.res_bus['vm_pu'] - vm0) / probe
+            with np.errstate(divide='ignore'):
+                margin = np.where(dv > 1e-7, (vm_max - vm0) / dv, np.where(dv < -1e-7, (vm0 - vm_min) / -dv, np.inf))
+            bound_voltage = float(np.min(margin)) if len(margin) else np.inf
+            hi = max(min(bound_thermal, bound_voltage, unit_max), lo)
         else:
-            critical_lines = []
+            bound_voltage = probe
+            hi, hi_limit = probe, probe_violation
+        estimate = min(bound_thermal, bound_voltage, unit_max)
+        print(f"  > Pre-estimate: {estimate:,.1f} MW (thermal {bound_thermal:,.1f} MW, voltage {bound_voltage:,.1f} MW)")
 
-        connected_lines = net.line[(net.line.from_bus == bus_idx) | (net.line.to_bus == bus_idx)].index
-        all_constrained_lines = set(critical_lines).union(set(connected_lines))
+        # Bounded search: confirm the estimate, widen it while it holds, then bisect
+        tolerance = config.HOSTING_CAPACITY_SEARCH_TOLERANCE_MW
+        growth = 0.1  # The linear estimate is usually within a few percent: widen in doubling steps from +10%
+        while hi_limit is None and state['checks'] < config.HOSTING_CAPACITY_MAX_PF_CHECKS:
+            violation = check(hi)
+            if violation is not None:
+                hi_limit = violation
+                break
+            lo = hi
+            if hi >= unit_max: break
+            hi = min(unit_max, max(hi * (1.0 + growth), hi + 2 * tolerance))
+            growth *= 2.0
+        while hi_limit is not None and hi - lo > tolerance and state['checks'] < config.HOSTING_CAPACITY_MAX_PF_CHECKS:
+            mid = 0.5 * (lo + hi)
+            violation = check(mid)
+            if violation is None:
+                lo = mid
+            else:
+                hi, hi_limit = mid, violation
 
-        for line_id in all_constrained_lines:
-            # Check for existing loading to avoid immediate infeasibility
-            current_load = 0
-            if 'loading_percent' in net.res_line.columns and line_id in net.res_line.index:
-                current_load = net.res_line.at[line_id, 'loading_percent']
+        # Leave the best feasible point in the result tables for the confirming OPF (no fresh PF)
+        if pf_net.gen.at[inj_idx, 'p_mw'] != lo or state['init'] != 'results':
+            check(lo)
+        for key in list(pf_net.keys()):
+            if key.startswith('res_') and key != 'res_cost':
+                net[key] = pf_net[key]
+        pf_limit = hi_limit or (f"Upper Bound ({unit_max:.0f} MW)" if lo >= unit_max else "PF check budget")
+        print(f"  ✓ PF search: {lo:,.1f} MW in {state['checks']} power flows (limit: {pf_limit})")
+        return {'estimate_mw': estimate, 'pf_mw': lo, 'pf_limit': pf_limit, 'pf_checks': state['checks']}
 
-            safe_limit = max(TARGET_LIMIT, current_load + 20.0)
-            net.line.at[line_id, 'max_loading_percent'] = safe_limit
+    def _solve_site(self, base, bus_idx, resolve_from=None, full_setup=True):
+        """
+        Max injection at `bus_idx`: pre-estimate and PF search (if enabled). A PF search stopped by a thermal
+        or voltage limit is the result (no redispatch); the other sites are confirmed by the injection OPF
+        with the virtual unit capped at the PF figures plus HOSTING_CAPACITY_OPF_MARGIN.
+        Returns (net, inj_idx, result) where result is None if nothing converged, else a dict with
+        max_injection_mw, limiting_factor, method ('opf' | 'pf_search') and the pre-estimate figures.
+        """
+        net, inj_idx = self._prepare_site_net(base, bus_idx, full_setup)
+        est = None
+        if config.HOSTING_CAPACITY_PRE_ESTIMATE:
+            est = self.pre_estimate(base, net, bus_idx, inj_idx)
+            resolve_from = 'PF search'
+        result = {'method': None, 'opf_tried': False, 'estimate_mw': est['estimate_mw'] if est else np.nan,
+                  'pf_mw': est['pf_mw'] if est else np.nan, 'pf_checks': est['pf_checks'] if est else 0}
+        pf_result = dict(result, method='pf_search', max_injection_mw=est['pf_mw'] if est else np.nan,
+                         limiting_factor=f"{est['pf_limit']} (PF search)" if est else None)
 
-        print(f"    - Enforced limits on {len(all_constrained_lines)} critical lines.")
-        # =================================================================
+        # The unit's full range already holds without redispatch: nothing left for the OPF to find
+        if est and est['pf_mw'] >= net.gen.at[inj_idx, 'max_p_mw'] - config.HOSTING_CAPACITY_SEARCH_TOLERANCE_MW:
+            return net, inj_idx, pf_result
+        if est and not config.HOSTING_CAPACITY_CONFIRM_OPF:
+            return net, inj_idx, pf_result
+        # Stopped by a thermal or voltage limit at the scenario dispatch: reported without an OPF
+        if est and est['pf_mw'] > 0 and est['pf_limit'].startswith(PF_SEARCH_LIMITS):
+            return net, inj_idx, pf_result
+
+        cap = None
+        if est:
+            # Redispatch can lift the slack-balanced PF figure: the margin leaves the OPF room above it, while
+            # the capped unit keeps it from searching the full 5000 MW range. Without a PF point (check budget
+            # used up, infeasible base point) only the linear estimate is left.
+            pf_point = est['pf_mw'] > 0 and est['pf_limit'] != "PF check budget"
+            basis = est['pf_mw'] if pf_point else max(est['estimate_mw'], est['pf_mw'])
+            cap = basis * (1.0 + config.HOSTING_CAPACITY_OPF_MARGIN) + config.HOSTING_CAPACITY_SEARCH_TOLERANCE_MW
+            if cap < net.gen.at[inj_idx, 'max_p_mw']:
+                net.gen.at[inj_idx, 'max_p_mw'] = cap
+                print(f"  > Capping the injection OPF at {cap:,.1f} MW.")
+            else:
+                cap = None
 
         print("  > Optimizing...")
-        converged = self.engine_helper._solve_opf()
+        result['opf_tried'] = True
+        pf_result['opf_tried'] = True
+        converged = self.engine_helper._solve_opf(resolve_from)
+        relaxations = self.engine_helper.solver_stats.get('relaxations') or []
+        if converged and not (est and 'drop_line_limits' in relaxations):
+            limit = self._identify_limit(net)
+            if cap is not None and limit.startswith("Upper Bound"):
+                # The cap binds: the site takes at least this much, the OPF did not search beyond it
+                limit = f"Pre-estimate cap ({cap:,.0f} MW)"
+            if 'drop_line_limits' in relaxations:
+                # Only solvable without line limits: the MW figure ignores thermal limits
+                limit = f"Line limits dropped ({limit})"
+            result.update(method='opf', max_injection_mw=float(net.res_gen.at[inj_idx, 'p_mw']), limiting_factor=limit)
+            return net, inj_idx, result
+        if est:
+            print("  ⚠ OPF confirmation failed. Reporting the PF search result.")
+            return net, inj_idx, pf_result
+        return net, inj_idx, None
+
+    def analyze_hosting_capacity(self, lat, lon, scenario_name=None, base_result_net=None, export=True):
+        scenario_name = scenario_name or config.HOSTING_CAPACITY_SCENARIO
+        bus_idx, vn_kv, dist = self.find_best_connection_point(lat, lon)
+        print(f"\n[Injection Analysis] Assessing capacity at Bus {bus_idx}...")
+
+        # 1. 准备网络
+        self._set_scenario(scenario_name)
+        if base_result_net:
+            print("  > Using Warm Start.")
+            base, resolve_from = base_result_net, 'base_result_net'
+        else:
+            print("  > Cold Start.")
+            base, resolve_from = self._cold_start_net(scenario_name), None
+
+        net, inj_idx, result = self._solve_site(base, bus_idx, resolve_from)
 
-        if not converged:
+        if result is None:
             print("  ✗ Optimization failed.")
             return None
 
-        mw = net.res_gen.at[inj_idx, 'p_mw']
-        limit = self._identify_limit(net)
+        mw = result['max_injection_mw']
         res = {'location': (lat, lon), 'bus_id': bus_idx, 'bus_name': net.bus.at[bus_idx, 'name'],
-               'bus_voltage': vn_kv, 'max_injection_mw': mw, 'limiting_factor': limit,
-               'battery_suggestion': f"{mw*0.5:.1f} MW / {mw*2:.1f} MWh", 'scenario_used': scenario_name}
+               'bus_voltage': vn_kv, 'max_injection_mw': mw, 'limiting_factor': result['limiting_factor'],
+               'battery_suggestion': f"{mw*0.5:.1f} MW / {mw*2:.1f} MWh", 'scenario_used': scenario_name,
+               'method': result['method'], 'estimate_mw': result['estimate_mw']}
 
         self._print_report(res)
 
-        print("  > Generating Map...")
-        exporter = ReportGenerator.ReportGenerator(net)
-        exporter.export_all("injection_result")
-        Visualizer.Visualizer().create_map(net, {'name': "injection_result", 'description': f"Injection at {lat},{lon}"})
+        if export:
+            print("  > Generating Map...")
+            exporter = ReportGenerator.ReportGenerator(net)
+            exporter.export_all("injection_result")
+            Visualizer.Visualizer().create_map(net, {'name': "injection_result", 'description': f"Injection at {lat},{lon}"})
         return res
 
+    def evaluate_bus(self, site_base, bus_idx, export=False):
+        """Hosting capacity at one bus from the shared pre-solved base (no report/map unless `export`)."""
+        t_start = time.time()
+        record = _site_record(bus_idx)
+        try:
+            net, inj_idx, result = self._solve_site(site_base, bus_idx, self.engine_helper.current_scenario_name,
+                                                    full_setup=False)
+            # Solver stats belong to this site only if its OPF ran
+            stats = self.engine_helper.solver_stats if result is None or result['opf_tried'] else {}
+            record['fallback_step'] = stats.get('fallback_step')
+            record['relaxations'] = ",".join(stats.get('relaxations') or []) or None
+            if result is not None:
+                record['converged'] = True
+                record.update({k: result[k] for k in ['max_injection_mw', 'limiting_factor', 'method', 'estimate_mw',
+                                                      'pf_mw', 'pf_checks']})
+                if export:
+                    folder = f"injection_bus_{bus_idx}"
+                    ReportGenerator.ReportGenerator(net).export_all(folder)
+                    Visualizer.Visualizer().create_map(net, {'name': folder, 'description': f"Injection at bus {bus_idx}"},
+                                                       result_folder=folder)
+        except Exception as e:
+            record['error'] = str(e).splitlines()[0] if str(e) else type(e).__name__
+        record['duration_s'] = time.time() - t_start
+        return record
+
+    def analyze_sites(self, sites, scenario_name=None, jobs=None, export=False, min_vn_kv=None, output_name=None):
+        """
+        Batch hosting capacity for many candidate sites (see load_sites). The scenario is solved once and
+        shared by all sites; sites connecting to the same bus are solved once. Returns one row per site
+        with its connection point, max MW and limiting factor, also written to
+        OUTPUT_DIR/HOSTING_CAPACITY_DIR/<output_name>.csv.
+        """
+        scenario_name = scenario_name or config.HOSTING_CAPACITY_SCENARIO
+        min_vn_kv = config.HOSTING_CAPACITY_MIN_VN_KV if min_vn_kv is None else min_vn_kv
+        frame = load_sites(sites)
+        print(f"--- HOSTING CAPACITY: {len(frame)} sites in scenario '{scenario_name}' ---")
+        t_start = time.time()
+
+        bus_ids, dist_km = self.find_connection_points(frame['lat'], frame['lon'], min_vn_kv)
+        frame['bus_id'] = bus_ids
+        frame['distance_km'] = dist_km
+        frame['bus_name'] = self.base_net.bus.loc[bus_ids, 'name'].values
+        frame['bus_voltage'] = self.base_net.bus.loc[bus_ids, 'vn_kv'].values
+        buses = list(pd.unique(bus_ids))
+        print(f"  > {len(buses)} distinct connection buses.")
+
+        site_base = self.prepare_base(scenario_name)
+        results = self.evaluate_buses(site_base, buses, scenario_name, jobs=jobs, export=export)
+        results = results.rename(columns={'duration_s': 'solve_s'})
+        frame = frame.merge(results, on='bus_id', how='left')
+        frame['battery_suggestion'] = [f"{mw*0.5:.1f} MW / {mw*2:.1f} MWh" if pd.notna(mw) else None
+                                       for mw in frame['max_injection_mw']]
+        frame['scenario_used'] = scenario_name
+
+        folder = os.path.join(config.OUTPUT_DIR, config.HOSTING_CAPACITY_DIR)
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f"{output_name or 'sites'}.csv")
+        frame.to_csv(path, index=False)
+        n_ok = int(frame['converged'].fillna(False).astype(bool).sum())
+        print(f"--- HOSTING CAPACITY DONE: {n_ok}/{len(frame)} sites in {time.time() - t_start:.2f}s ---")
+        print(f"  ✓ Site table written to {path}")
+        return frame
+
+    def evaluate_buses(self, site_base, buses, scenario_name, jobs=None, export=False):
+        """
+        Max injection at each bus of `buses`, solved on a pool of `jobs` workers (None = all cores)
+        that each receive the prepared `site_base` once. Returns one evaluate_bus record per bus.
+        """
+        buses = list(buses)
+        if not buses:
+            return pd.DataFrame(columns=list(_site_record(None)))
+        jobs = min(max(1, jobs or os.cpu_count() or 1), len(buses))
+        records = []
+        if jobs == 1:
+            _init_site_worker(self.base_net, self.external_grids, site_base, scenario_name, export)
+            for bus_idx in buses:
+                records.append(_run_site_worker(bus_idx))
+                self._print_progress(records[-1], len(records), len(buses))
+        else:
+            with ProcessPoolExecutor(max_workers=jobs, initializer=_init_site_worker,
+                                     initargs=(self.base_net, self.external_grids, site_base, scenario_name,
+                                               export)) as pool:
+                futures = [pool.submit(_run_site_worker, bus_idx) for bus_idx in buses]
+                for future in as_completed(futures):
+                    records.append(future.result())
+                    self._print_progress(records[-1], len(records), len(buses))
+        return pd.DataFrame(records)
+
+    def _print_progress(self, record, done, total):
+        mark = "✓" if record['converged'] else "✗"
+        mw = f"{record['max_injection_mw']:,.1f} MW ({record['limiting_factor']})" if record['converged'] \
+            else (record['error'] or "OPF failed")
+        print(f"  {mark} [{done}/{total}] Bus {record['bus_id']}: {mw} in {record['duration_s']:.2f}s")
+
     def _identify_limit(self, net):
-        # Improved Limit Detection
-        if len(net.res_line) > 0:
-            load = net.res_line['loading_percent'].max()
-            if load >= (config.MAX_LINE_LOADING_PERCENT - 2.0):
-                return f"Line Overload ({load:.1f}%)"
+        # Lines at the limit they were solved with (0 / missing = unconstrained), labelled like the PF search
+        if len(net.res_line) > 0 and 'max_loading_percent' in net.line.columns:
+            limits = net.line['max_loading_percent'].where(lambda x: x > 0).dropna().astype(float)
+            loading = net.res_line['loading_percent'].reindex(limits.index)
+            headroom = limits - loading
+            if (headroom <= 2.0).any():
+                line = headroom.idxmin()
+                return f"Line {line} Overload ({loading[line]:.1f}%)"
 
         inj_gen = net.gen[net.gen['type'] == 'virtual_injection']
         if not inj_gen.empty:
             idx = inj_gen.index[0]
-            if net.res_gen.at[idx, 'p_mw'] >= 4990: # Near 5000 max
-                return "Upper Bound (5000 MW)"
+            unit_max = net.gen.at[idx, 'max_p_mw']
+            if net.res_gen.at[idx, 'p_mw'] >= unit_max - 10: # Near the unit's max
+                return f"Upper Bound ({unit_max:.0f} MW)"
 
         return "Voltage/Convergence"
 
     def _print_report(self, res):
         print(f"\n📍 MAX CAPACITY: {res['max_injection_mw']:,.2f} MW")
         print(f"🛑 Limit: {res['limiting_factor']}\n")
+
+
+def run_hosting_capacity_cli(sites_path, scenario_name=None, jobs=None, area=None):
+    """
+    Entry point for `python -m powerflow analysis --sites sites.csv [--scenarios NAME] --jobs N
+    [--area LAT LON --radius R]`. With an area, sites connect to the buses of its equivalent.
+    """
+    output_name = os.path.splitext(os.path.basename(sites_path))[0]
+    if area:
+        from .area_equivalent import load_area_base, area_suffix
+        base_net, external_grids = load_area_base(area)
+        output_name += area_suffix(area)
+    else:
+        from .grid_building import GridModeler
+        base_net, external_grids = GridModeler().create_base_network()
+    analyzer = InjectionAnalyzer(base_net, external_grids)
+    frame = analyzer.analyze_sites(sites_path, scenario_name=scenario_name, jobs=jobs, output_name=output_name)
+    if area:
+        outside = int((frame['distance_km'] > area['r_km']).sum())
+        if outside:
+            print(f"  ⚠ {outside} sites are more than {area['r_km']:g} km from their connection bus (outside the area).")
+    return frame
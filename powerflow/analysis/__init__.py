@@ -1,4 +1,26 @@
 def all(scenario=None):
 
+	# Headless hosting-capacity screening of candidate sites
+	if scenario and scenario.get('sites'):
+		from .Injections import run_hosting_capacity_cli
+		names = scenario.get('opf_scenarios') or [None]
+		run_hosting_capacity_cli(scenario['sites'], scenario_name=names[0], jobs=scenario.get('jobs'),
+		                         area=scenario.get('area'))
+		return
+
+	# Headless hosting-capacity map of all 220/380 kV buses
+	if scenario and scenario.get('hosting_map') is not None:
+		from .hosting_map import run_hosting_map_cli
+		names = scenario.get('opf_scenarios') or [None]
+		run_hosting_map_cli(scenario_name=names[0], target_mw=scenario['hosting_map'], jobs=scenario.get('jobs'),
+		                    area=scenario.get('area'))
+		return
+
+	# Headless batch run when scenarios were requested on the CLI
+	if scenario and scenario.get('opf_scenarios'):
+		from .batch import run_batch_cli
+		run_batch_cli(scenario['opf_scenarios'], jobs=scenario.get('jobs'), area=scenario.get('area'))
+		return
+
 	from .__main__ import main
 	main()
@@ -0,0 +1,176 @@
+"""
+Area Equivalent - Reduces the base net to an area of interest plus a network equivalent.
+Buses within the radius keep full detail; the rest of the grid is replaced by a Ward/xWard/REI
+equivalent (pandapower.grid_equivalents) computed at the OPF operating point of a reference scenario.
+The reduced net is a regular base net: OPFEngine and InjectionAnalyzer use it unchanged.
+"""
+import copy
+import itertools
+import warnings
+
+import numpy as np
+import pandas as pd
+import pandapower as pp
+import pandapower.grid_equivalents as grid_equivalents
+from pandapower.toolbox import clear_result_tables
+
+from . import config
+from .opf import OPFEngine, apply_dispatch
+from .spatial import bus_coordinates, get_bus_index
+
+# Element tables whose rows come back from the base net (static data, nameplate capacities)
+BASE_ELEMENT_TABLES = ('bus', 'line', 'trafo', 'load', 'gen', 'sgen', 'storage', 'ext_grid', 'dcline', 'shunt')
+# pandapower uses impedance sn_mva as the OPF flow limit; equivalent branches are rebased to this rating
+EQUIVALENT_IMPEDANCE_SN_MVA = 1e5
+
+
+def _branch_pairs(net):
+    pairs = [zip(net.line['from_bus'], net.line['to_bus']), zip(net.trafo['hv_bus'], net.trafo['lv_bus'])]
+    if 'impedance' in net and len(net.impedance) > 0:
+        pairs.append(zip(net.impedance['from_bus'], net.impedance['to_bus']))
+    return list(itertools.chain(*pairs))
+
+
+def select_area_buses(net, lat, lon, r_km):
+    """
+    Buses within r_km of (lat, lon). Buses without coordinates and the other side of every
+    transformer follow their neighbours, so substations are never split by the boundary.
+    """
+    internal = set(get_bus_index(net).within(lat, lon, r_km)[0])
+    bus_lat, _ = bus_coordinates(net)
+    no_geo = set(net.bus.index[np.isnan(bus_lat)])
+
+    trafo_pairs = list(zip(net.trafo['hv_bus'], net.trafo['lv_bus']))
+    branch_pairs = _branch_pairs(net)
+    changed = True
+    while changed:
+        changed = False
+        for a, b in trafo_pairs:
+            if (a in internal) != (b in internal):
+                internal.update((a, b))
+                changed = True
+        for a, b in branch_pairs:
+            for x, y in ((a, b), (b, a)):
+                if x in internal and y in no_geo and y not in internal:
+                    internal.add(y)
+                    changed = True
+    return internal
+
+
+def find_boundary_buses(net, internal):
+    """Internal buses with at least one AC branch or DC line to the outside."""
+    pairs = _branch_pairs(net) + list(zip(net.dcline['from_bus'], net.dcline['to_bus']))
+    return {a if a in internal else b for a, b in pairs if (a in internal) != (b in internal)}
+
+
+def operating_point_net(base_net, external_grids, scenario):
+    """Scenario net with its OPF dispatch written back as setpoints and a matching PF result."""
+    engine = OPFEngine(base_net, external_grids)
+    net, info, converged = engine.run_scenario(dict(scenario, name=scenario.get('name', 'area_equivalent_reference')))
+    if converged:
+        # dcline is shared with base_net by the scenario copy; apply_dispatch writes its setpoints
+        net.dcline = net.dcline.copy()
+        apply_dispatch(net)
+    else:
+        print("  ⚠ Reference OPF did not converge. Using the scenario setpoints as operating point.")
+    pp.runpp(net, numba=False, calculate_voltage_angles=True)
+    # Costs are rebuilt per scenario by OPFEngine; grid_equivalents cannot carry them over anyway
+    net.poly_cost = net.poly_cost.iloc[0:0]
+    return net
+
+
+def build_area_equivalent(base_net, external_grids, lat, lon, r_km, scenario_name=None, eq_type=None):
+    """
+    Returns (reduced_net, summary). The reduced net keeps the base-net rows (nameplate values) of every
+    element inside the area, so scenarios are applied to it exactly as to the full net; the equivalent
+    elements (ward/xward/impedance, REI gens and loads) represent the rest of the grid at the reference
+    scenario's operating point.
+    """
+    eq_type = eq_type or config.AREA_EQUIVALENT_TYPE
+    scenario_name = scenario_name or config.AREA_EQUIVALENT_SCENARIO
+    print(f"--- AREA EQUIVALENT: {r_km:.0f} km around ({lat}, {lon}), type '{eq_type}' ---")
+
+    internal = select_area_buses(base_net, lat, lon, r_km)
+    if not internal:
+        raise ValueError(f"No buses within {r_km} km of ({lat}, {lon}).")
+    boundary = find_boundary_buses(base_net, internal)
+    print(f"  > {len(internal)} of {len(base_net.bus)} buses inside the area, {len(boundary)} boundary buses.")
+
+    if not boundary:
+        print("  ✓ Area is not connected to the rest of the grid. No equivalent needed.")
+        reduced = pp.select_subnet(base_net, internal, include_results=False)
+        return reduced, {'eq_type': None, 'internal_buses': len(internal), 'boundary_buses': 0}
+
+    from .scenarios import SCENARIOS
+    print(f"  > Operating point from reference scenario '{scenario_name}'...")
+    op_net = operating_point_net(base_net, external_grids, SCENARIOS[scenario_name])
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        eq_net = grid_equivalents.get_equivalent(
+            op_net, eq_type, boundary_buses=sorted(boundary), internal_buses=sorted(internal - boundary),
+            calculate_voltage_angles=True)
+
+    reduced = _restore_base_rows(eq_net, base_net)
+    _unrate_equivalent_impedances(reduced)
+    summary = {
+        'eq_type': eq_type,
+        'reference_scenario': scenario_name,
+        'internal_buses': len(internal),
+        'boundary_buses': len(boundary),
+        'reduced_buses': len(reduced.bus),
+        'full_buses': len(base_net.bus),
+    }
+    print(f"  ✓ Reduced net: {len(reduced.bus)} buses (full net: {len(base_net.bus)}), "
+          f"{len(reduced.get('ward', []))} wards, {len(reduced.get('impedance', []))} equivalent impedances.")
+    return reduced, summary
+
+
+def load_area_base(area):
+    """
+    (reduced_net, ext_grids) for an --area {'lat', 'lon', 'r_km'}: the equivalent of the cached full base
+    net, built once by the caller and used like a regular base net.
+    """
+    from .grid_building import GridModeler
+    full_net, ext_grids = GridModeler().create_base_network()
+    reduced, _ = build_area_equivalent(full_net, ext_grids, area['lat'], area['lon'], area['r_km'])
+    return reduced, ext_grids
+
+
+def area_suffix(area):
+    """Output-name suffix of area runs: their results stay apart from the full-net results."""
+    return f"_area_{area['lat']:g}_{area['lon']:g}_{area['r_km']:g}km"
+
+
+def _restore_base_rows(eq_net, base_net):
+    """Swaps the operating-point rows of kept elements back to their base-net rows."""
+    reduced = copy.deepcopy(eq_net)
+    clear_result_tables(reduced)
+    for et in BASE_ELEMENT_TABLES:
+        if et not in reduced or len(reduced[et]) == 0: continue
+        kept = reduced[et].index.intersection(base_net[et].index)
+        added = reduced[et].loc[reduced[et].index.difference(base_net[et].index)]
+        table = base_net[et].loc[kept]
+        if len(added) > 0:
+            # Elements created by the equivalent (REI units, aux gens of cut DC lines): fixed injections
+            added = added.reindex(columns=table.columns)
+            if et == 'bus':
+                added['geo'] = None
+            else:
+                if 'type' in added.columns: added['type'] = 'network_equivalent'
+                if 'controllable' in added.columns: added['controllable'] = False
+            table = pd.concat([table, added])
+        reduced[et] = table
+    return reduced
+
+
+def _unrate_equivalent_impedances(net):
+    """Rebases the equivalent impedances to EQUIVALENT_IMPEDANCE_SN_MVA (same ohmic values, no binding limit)."""
+    if 'impedance' not in net or len(net.impedance) == 0: return
+    imp = net.impedance
+    scale = EQUIVALENT_IMPEDANCE_SN_MVA / imp['sn_mva']
+    for col in ['rft_pu', 'xft_pu', 'rtf_pu', 'xtf_pu']:
+        if col in imp.columns: imp[col] = imp[col] * scale
+    for col in ['gf_pu', 'bf_pu', 'gt_pu', 'bt_pu']:
+        if col in imp.columns: imp[col] = imp[col] / scale
+    imp['sn_mva'] = EQUIVALENT_IMPEDANCE_SN_MVA
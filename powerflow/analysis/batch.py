@@ -0,0 +1,230 @@
+"""
+Batch - Headless parallel execution of scenario sweeps.
+Fans scenarios out to a process pool; every worker loads the pickled base net
+once (in its initializer) and streams results back as scenarios finish.
+"""
+import copy
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from . import config
+from .grid_building import GridModeler
+from .network_cache import NetworkCache
+from .opf import OPFEngine
+from .contingency import run_n1
+from .scenarios import SCENARIOS
+from . import report_export as ReportGenerator
+from . import visualization as Visualizer
+
+# Per-process state, filled once by _init_worker
+_WORKER = {}
+
+
+def _init_worker(export=True, create_map=True, fidelity=None, base=None, n1_jobs=None):
+    """Loads the cached base net exactly once per worker (or once in-process for a single job)."""
+    # `base` is a (net, ext_grids) prepared by the parent, e.g. an area equivalent
+    base_net, ext_grids = base if base is not None else GridModeler().create_base_network()
+    _WORKER['engine'] = OPFEngine(base_net, ext_grids, fidelity=fidelity)
+    _WORKER['export'] = export
+    _WORKER['create_map'] = create_map
+    _WORKER['n1_jobs'] = n1_jobs
+
+
+def _init_pool_worker(*args):
+    """Process pool initializer, see _init_worker."""
+    # The parent has already (re)built the cache; workers must never rebuild it concurrently.
+    config.FORCE_NETWORK_REBUILD = False
+    _init_worker(*args)
+
+
+def _empty_record(scen_key):
+    """Summary record of a scenario before (or without) a solve."""
+    return {
+        'scenario': scen_key,
+        'status': 'Unknown',
+        'converged': False,
+        'duration_s': 0.0,
+        'total_cost_eur': None,
+        'total_load_mw': None,
+        'total_gen_mw': None,
+        'error': None,
+        'worker_pid': None,
+        'tier': None,
+        'fallback_step': None,
+        'attempts': 0,
+        'pf_iterations': None,
+        'opf_iterations': None,
+        'cached': False,
+        'stage_times': None,
+        'n1_violations': None,
+    }
+
+
+def _run_worker_scenario(scen_key, scen_config):
+    """Solves one scenario inside a worker and returns a picklable summary record."""
+    engine = _WORKER['engine']
+    folder_name = scen_key.lower().replace(" ", "_")
+    scen_config = copy.deepcopy(scen_config)
+    scen_config['name'] = folder_name
+
+    record = _empty_record(scen_key)
+    record['worker_pid'] = os.getpid()
+
+    t_start = time.time()
+    try:
+        res_net, res_info, converged = engine.run_scenario(scen_config)
+        record['duration_s'] = time.time() - t_start
+        record['converged'] = bool(converged)
+        record['total_load_mw'] = float(res_info['total_load_mw'])
+        record['total_gen_mw'] = float(res_info['total_gen_mw'])
+        solver = res_info.get('solver', {})
+        record['tier'] = solver.get('tier')
+        record['fallback_step'] = solver.get('fallback_step')
+        record['attempts'] = len(solver.get('attempts', []))
+        record['pf_iterations'] = solver.get('pf_iterations')
+        record['opf_iterations'] = solver.get('opf_iterations')
+        record['cached'] = bool(solver.get('cached', False))
+        record['stage_times'] = {st['stage']: round(st['wall_s'], 4) for st in res_info['telemetry'].stages}
+
+        if converged:
+            record['status'] = 'Converged'
+            record['total_cost_eur'] = float(res_net.res_cost)
+            if _WORKER['export']:
+                telemetry = res_info['telemetry']
+                exporter = ReportGenerator.ReportGenerator(res_net)
+                with telemetry.stage('export_report'):
+                    exporter.export_all(folder_name)
+                if _WORKER['create_map']:
+                    with telemetry.stage('create_map'):
+                        Visualizer.Visualizer().create_map(res_net, res_info, result_folder=folder_name)
+                if config.N1_SCREENING_ENABLED:
+                    with telemetry.stage('n1_screening'):
+                        n1_results = run_n1(res_net, jobs=_WORKER['n1_jobs'])
+                    exporter.export_n1(folder_name, n1_results)
+                    record['n1_violations'] = int((n1_results.get('ac_max_loading_percent', pd.Series(dtype=float))
+                                                   > config.N1_OVERLOAD_PERCENT).sum())
+                exporter.export_telemetry(folder_name, telemetry)
+        else:
+            record['status'] = 'Failed (OPF)'
+    except Exception as e:
+        record['duration_s'] = time.time() - t_start
+        record['status'] = 'Error'
+        record['error'] = f"{e}\n{traceback.format_exc()}"
+
+    return record
+
+
+def resolve_scenarios(names, library=None):
+    """Turns CLI/API scenario selectors into an ordered {key: config} dict ('all' selects the library)."""
+    library = SCENARIOS if library is None else library
+    if not names or 'all' in names:
+        return dict(library)
+
+    selected = {}
+    for name in names:
+        if name not in library:
+            raise ValueError(f"Scenario '{name}' not found.")
+        selected[name] = library[name]
+    return selected
+
+
+class BatchRunner:
+    """Runs many scenarios in parallel, one base-net load per worker process."""
+
+    def __init__(self, jobs=None, export=True, create_map=True, fidelity=None, area=None):
+        self.jobs = max(1, jobs or os.cpu_count() or 1)
+        self.export = export
+        self.create_map = create_map
+        self.fidelity = fidelity
+        self.area = area  # {'lat', 'lon', 'r_km'}: solve on an area equivalent instead of the full net
+
+    def run(self, scenarios):
+        """
+        Generator yielding one summary record per scenario, in completion order.
+        `scenarios` is a {key: scenario_config} dict.
+        """
+        if len(scenarios) == 0:
+            return
+
+        # Build (or validate) the network cache once in the parent so workers only unpickle it
+        base, built = None, None
+        if self.area:
+            # The equivalent is computed once here and shipped to the workers
+            from .area_equivalent import load_area_base
+            base = load_area_base(self.area)
+        else:
+            cache = NetworkCache()
+            if config.FORCE_NETWORK_REBUILD or not cache.contains(cache.key()):
+                built = GridModeler().create_base_network()
+
+        jobs = min(self.jobs, len(scenarios))
+
+        # Single job: run in-process, no pool overhead (and no second rebuild of a fresh base)
+        if jobs == 1:
+            _init_worker(self.export, self.create_map, self.fidelity, base or built)
+            for key, scen in scenarios.items():
+                yield _run_worker_scenario(key, scen)
+            return
+
+        # Scenario workers already use all cores: their N-1 AC checks run in-process
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_pool_worker,
+                                 initargs=(self.export, self.create_map, self.fidelity, base, 1)) as pool:
+            futures = {pool.submit(_run_worker_scenario, key, scen): key for key, scen in scenarios.items()}
+            for future in as_completed(futures):
+                try:
+                    yield future.result()
+                except Exception as e:
+                    # Worker crashed (e.g. killed by the OS) - report it instead of aborting the sweep
+                    yield dict(_empty_record(futures[future]), status='Error', error=str(e))
+
+    def run_all(self, scenarios, on_result=None):
+        """Runs the whole batch and returns the summary as a DataFrame (in input order)."""
+        records = []
+        for record in self.run(scenarios):
+            records.append(record)
+            if on_result: on_result(record)
+
+        if not records: return pd.DataFrame()
+        order = {key: i for i, key in enumerate(scenarios)}
+        df = pd.DataFrame(records)
+        df['index'] = df['scenario'].map(order)
+        return df.sort_values('index').drop(columns=['index']).reset_index(drop=True)
+
+
+def run_batch_cli(scenario_names, jobs=None, area=None):
+    """Entry point for `python -m powerflow analysis --scenarios ... --jobs N [--area LAT LON --radius R]`."""
+    scenarios = resolve_scenarios(scenario_names)
+    if area:
+        # Separate result folders, the full-net results of the same scenarios stay untouched
+        from .area_equivalent import area_suffix
+        suffix = area_suffix(area)
+        scenarios = {f"{key}{suffix}": scen for key, scen in scenarios.items()}
+    runner = BatchRunner(jobs=jobs, area=area)
+    total = len(scenarios)
+    print(f"--- BATCH START: {total} scenarios on {min(runner.jobs, total)} worker(s) ---")
+
+    done = [0]
+    t_start = time.time()
+
+    def report(record):
+        done[0] += 1
+        mark = "✓" if record['converged'] else "✗"
+        print(f"  {mark} [{done[0]}/{total}] {record['scenario']}: {record['status']} "
+              f"in {record['duration_s']:.2f}s")
+        if record['error']:
+            print(f"    Error: {record['error'].splitlines()[0]}")
+
+    summary = runner.run_all(scenarios, on_result=report)
+
+    os.makedirs(config.OUTPUT_DIR, exist_ok=True)
+    summary_path = os.path.join(config.OUTPUT_DIR, 'batch_summary.csv')
+    summary.to_csv(summary_path, index=False)
+
+    n_ok = int(summary['converged'].sum()) if len(summary) > 0 else 0
+    print(f"--- BATCH DONE: {n_ok}/{total} converged in {time.time() - t_start:.2f}s ---")
+    print(f"  ✓ Summary written to {summary_path}")
+    return summary
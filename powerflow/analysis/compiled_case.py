@@ -0,0 +1,227 @@
+"""
+Compiled Case - Reuses pandapower's internal pypower case (ppc/ppci) across scenarios.
+Scenarios of one base net share the topology and only differ in injections, limits and costs,
+so the case is converted once per topology and each scenario just patches the gen/load/cost vectors.
+"""
+import hashlib
+import logging
+import warnings
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pandapower.optimal_powerflow as pp_optimal_powerflow
+from pandapower.auxiliary import OPFNotConverged, _add_auxiliary_elements, _clean_up, \
+    _init_runopp_options, _replace_nans_with_default_limits
+from pandapower.build_bus import _calc_pq_elements_and_add_on_ppc
+from pandapower.build_gen import add_element_to_gen
+from pandapower.opf.make_objective import _make_objective
+from pandapower.opf.validate_opf_input import _check_necessary_opf_parameters
+from pandapower.pd2ppc import _pd2ppc
+from pandapower.pypower.add_userfcn import add_userfcn
+from pandapower.pypower.idx_brch import RATE_A
+from pandapower.pypower.idx_bus import PD, QD, VA, VM
+from pandapower.pypower.ppoption import ppoption
+from pandapower.results import _copy_results_ppci_to_ppc, _extract_results, init_results
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+# Internal pandapower state written by _pd2ppc and read back by the builders / result extraction
+NET_STATE_KEYS = ('_options', '_is_elements', '_is_elements_final', '_pd2ppc_lookups', '_gen_order',
+                  '_isolated_buses', '_isolated_buses_dc')
+
+# Columns that decide the structure of the compiled case. Anything not listed here (p/q setpoints,
+# P/Q limits, line loading limits, costs, load scaling) is patched per scenario.
+TOPOLOGY_COLUMNS = {
+    'bus': ['in_service', 'vn_kv', 'min_vm_pu', 'max_vm_pu'],
+    'line': ['from_bus', 'to_bus', 'in_service', 'length_km', 'r_ohm_per_km', 'x_ohm_per_km',
+             'c_nf_per_km', 'max_i_ka', 'parallel', 'df'],
+    'trafo': ['hv_bus', 'lv_bus', 'in_service', 'sn_mva', 'vk_percent', 'vkr_percent',
+              'tap_pos', 'max_loading_percent'],
+    'trafo3w': ['hv_bus', 'mv_bus', 'lv_bus', 'in_service', 'max_loading_percent'],
+    'impedance': ['from_bus', 'to_bus', 'in_service'],
+    'switch': ['bus', 'element', 'et', 'closed'],
+    'shunt': ['bus', 'in_service', 'p_mw', 'q_mvar', 'step'],
+    'ward': ['bus', 'in_service'],
+    'xward': ['bus', 'in_service'],
+    'ext_grid': ['bus', 'in_service', 'controllable', 'vm_pu', 'va_degree'],
+    'gen': ['bus', 'in_service', 'controllable', 'vm_pu', 'slack'],
+    'sgen': ['bus', 'in_service', 'controllable'],
+    'storage': ['bus', 'in_service', 'controllable'],
+    'load': ['bus', 'in_service', 'controllable'],
+    # DC-line setpoints/limits define the auxiliary gens, which are built once at compile time
+    'dcline': ['from_bus', 'to_bus', 'in_service', 'p_mw', 'loss_mw', 'loss_percent', 'vm_from_pu', 'vm_to_pu',
+               'max_p_mw', 'min_q_from_mvar', 'max_q_from_mvar', 'min_q_to_mvar', 'max_q_to_mvar'],
+}
+
+
+def topology_fingerprint(net, columns=None):
+    """Hash of everything baked into the compiled case (topology, V/branch limits, column layout)."""
+    h = hashlib.sha1()
+    for et, cols in (columns or TOPOLOGY_COLUMNS).items():
+        if et not in net: continue
+        df = net[et]
+        h.update(f"{et}:{len(df)}:{','.join(map(str, df.columns))}".encode())
+        if len(df) == 0: continue
+        h.update(np.asarray(df.index).tobytes())
+        for col in cols:
+            if col not in df.columns: continue
+            values = df[col].to_numpy()
+            if values.dtype == object:
+                values = pd.util.hash_array(values)
+            h.update(values.tobytes())
+    return h.hexdigest()
+
+
+def _voltage_seed(net):
+    """(vm_pu, va_degree) of every in-service bus from net.res_bus, or None if any is missing."""
+    if 'res_bus' not in net or len(net.res_bus) == 0: return None
+    buses = net.bus.index[net.bus['in_service'].values]
+    res = net.res_bus.reindex(buses)
+    if res[['vm_pu', 'va_degree']].isna().any().any(): return None
+    return res['vm_pu'].astype(float), res['va_degree'].astype(float)
+
+
+class CompiledCase:
+    """pandapower ppc/ppci of one topology, patched and solved per scenario."""
+
+    def __init__(self, net, calculate_voltage_angles=True, delta=1e-10, fingerprint=None, **kwargs):
+        self.fingerprint = fingerprint or topology_fingerprint(net)
+        self.kwargs = kwargs
+
+        _check_necessary_opf_parameters(net, logger)
+        _init_runopp_options(net, calculate_voltage_angles=calculate_voltage_angles, check_connectivity=True,
+                             switch_rx_ratio=2, delta=delta, init='flat', numba=True, trafo3w_losses='hv',
+                             consider_line_temperature=False, **kwargs)
+        n_gen = len(net.gen)
+        _add_auxiliary_elements(net)
+        self.aux_gen = net.gen.iloc[n_gen:].copy()
+        try:
+            # After _pd2ppc the ppc is already in internal bus order: in-service buses first,
+            # lookups pointing to internal indices. ppci is the in-service subset of it.
+            self.ppc, ppci = _pd2ppc(net)
+        finally:
+            _clean_up(net, res=False)
+
+        self.state = {key: net[key] for key in NET_STATE_KEYS if key in net}
+        self.n_bus = len(ppci['bus'])
+        self.gen_is = ppci['internal']['gen_is']
+        self.branch_is = ppci['internal']['branch_is']
+        self.ppci = {k: v for k, v in ppci.items() if k not in ('gen', 'bus', 'branch', 'gencost', 'userfcn')}
+
+    def solve(self, net, init='flat', verbose=False, suppress_warnings=True):
+        """
+        Patches loads, gen limits/setpoints and costs of `net` into the compiled case and runs the
+        pypower OPF. Mirrors pandapower's runopp: raises OPFNotConverged, fills the res_* tables.
+        init='pf' starts PIPS from a power flow as in runopp; the PF starts from the bus voltages in
+        net.res_bus if it holds a complete result (e.g. a PF just run on `net`, or a previous solution).
+        """
+        seed = _voltage_seed(net) if init == 'pf' else None
+        for key, value in self.state.items():
+            net[key] = value.copy() if isinstance(value, dict) else value
+        net['_options'] = dict(self.state['_options'], init=init)
+        net['OPF_converged'] = False
+        net['converged'] = False
+
+        if len(self.aux_gen) > 0:
+            net.gen = pd.concat([net.gen, self.aux_gen])
+        try:
+            init_results(net, "opf")
+            ppc = self._patch(net)
+            ppci = self._internal_case(ppc)
+            if init == 'pf':
+                # The PF also sets the slack dispatch and reactive powers of the start point; from seeded
+                # voltages it converges in a step or two
+                if seed is not None: ppci = self._seed_voltages(ppci, net, seed)
+                ppci = pp_optimal_powerflow._run_pf_before_opf(net, ppci)
+            ppci = _make_objective(ppci, net)
+            if len(net.dcline) > 0:
+                ppci = add_userfcn(ppci, 'formulation', pp_optimal_powerflow._add_dcline_constraints, args=net)
+            net['_ppc_opf'] = ppci
+
+            ppopt = ppoption(VERBOSE=verbose, PF_DC=False, INIT=init, OPF_FLOW_LIM=2, **self.kwargs)
+            # Resolved at call time so wrappers installed on pandapower's opf (e.g. the output probe) apply
+            with warnings.catch_warnings():
+                if suppress_warnings: warnings.simplefilter("ignore")
+                result = pp_optimal_powerflow.opf(ppci, ppopt)
+
+            if not result["success"]:
+                raise OPFNotConverged("Optimal Power Flow did not converge!")
+
+            result = _copy_results_ppci_to_ppc(result, ppc, mode='opf')
+            net['OPF_converged'] = True
+            _extract_results(net, result)
+        finally:
+            _clean_up(net)
+
+    def _patch(self, net):
+        """Fresh copy of the compiled ppc with this net's loads and gen rows written in."""
+        ppc = {k: (v.copy() if isinstance(v, np.ndarray) else v) for k, v in self.ppc.items()}
+        ppc['internal'] = dict(self.ppc['internal'])
+
+        ppc['bus'][:, [PD, QD]] = 0.0
+        _calc_pq_elements_and_add_on_ppc(net, ppc)
+        for element, (f, t) in net['_gen_order'].items():
+            add_element_to_gen(net, ppc, element, f, t)
+        _replace_nans_with_default_limits(net, ppc)
+        self._patch_line_ratings(net, ppc)
+        return ppc
+
+    @staticmethod
+    def _patch_line_ratings(net, ppc):
+        """Line RATE_A from max_loading_percent as in pandapower's _calc_line_parameter (0 = unconstrained)."""
+        if 'line' not in net['_pd2ppc_lookups']['branch']: return
+        f, t = net['_pd2ppc_lookups']['branch']['line']
+        line = net.line
+        if 'max_loading_percent' not in line.columns:
+            ppc['branch'][f:t, RATE_A] = 0.0
+            return
+        vr = net.bus.loc[line['from_bus'].values, 'vn_kv'].values * np.sqrt(3.)
+        ppc['branch'][f:t, RATE_A] = (line['max_loading_percent'].values / 100. * line['max_i_ka'].values
+                                      * line['df'].values * line['parallel'].values * vr)
+
+    def _seed_voltages(self, ppci, net, seed):
+        """Writes the (vm_pu, va_degree) seed of every pandapower bus into the ppci start point."""
+        vm, va = seed
+        rows = net['_pd2ppc_lookups']['bus'][vm.index.values]
+        inside = (rows >= 0) & (rows < self.n_bus)
+        ppci['bus'][rows[inside], VM] = vm.values[inside]
+        ppci['bus'][rows[inside], VA] = va.values[inside]
+        return ppci
+
+    def _internal_case(self, ppc):
+        ppci = {k: (v.copy() if isinstance(v, np.ndarray) else v) for k, v in self.ppci.items()}
+        ppci['internal'] = dict(self.ppci['internal'])
+        ppci['bus'] = ppc['bus'][:self.n_bus].copy()
+        ppci['gen'] = ppc['gen'][self.gen_is]
+        ppci['branch'] = ppc['branch'][self.branch_is]
+        return ppci
+
+
+class CompiledCaseCache:
+    """Compiled cases keyed by topology fingerprint (LRU-bounded)."""
+
+    def __init__(self, max_entries=None):
+        self.max_entries = max_entries or config.COMPILED_CASE_MAX_ENTRIES
+        self.entries = OrderedDict()
+        self.stats = {'compiled': 0, 'reused': 0}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, net, **kwargs):
+        """Returns the compiled case for the net's topology, compiling it on first use."""
+        key = topology_fingerprint(net)
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.stats['reused'] += 1
+            return self.entries[key]
+
+        case = CompiledCase(net, fingerprint=key, **kwargs)
+        self.entries[key] = case
+        self.stats['compiled'] += 1
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return case
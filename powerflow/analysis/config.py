@@ -14,7 +14,15 @@ DEFAULT_SLACK_VA_DEGREE = 0.0
 # ========== Cache Settings ==========
 # Set True to rebuild network from CSVs; False to load from .pkl (Faster)
 FORCE_NETWORK_REBUILD = False
-NETWORK_CACHE_FILE = "german_grid_base_cache.pkl"
+# Built base networks keyed by a hash of the input CSVs and the build settings below (see network_cache.py):
+# edited inputs or settings are picked up automatically, variants are kept side by side.
+NETWORK_CACHE_DIR = "network_cache"   # Below OUTPUT_DIR
+NETWORK_CACHE_MAX_ENTRIES = 4         # Least recently used variants are evicted beyond this
+NETWORK_CACHE_CONFIG_KEYS = [
+    'POWER_FACTOR', 'STANDARD_VOLTAGE_LEVELS', 'DEFAULT_SLACK_VM_PU', 'DEFAULT_SLACK_VA_DEGREE',
+    'PV_CONTROL_STRATEGY', 'PV_VOLTAGE_LEVELS', 'MIXED_PV_PRIMARY_VOLTAGE',
+    'TRAFO_VK_PERCENT', 'TRAFO_VKR_PERCENT', 'TRAFO_PFE_KW', 'TRAFO_I0_PERCENT',
+]
 
 # ========== Feature Flags ==========
 RUN_INJECTION_ANALYSIS = False
@@ -45,6 +53,110 @@ OPF_VERBOSE = False
 OPF_CALCULATE_VOLTAGE_ANGLES = True
 OPF_TOLERANCE = 1e-4    
 
+# Fidelity: 'ac' = full AC OPF | 'dc' = DC OPF only (fast screening for large sweeps) |
+# 'auto' = DC OPF first, escalate to AC when the DC result is near the thresholds below.
+# A scenario dict may override it with a 'fidelity' key.
+OPF_FIDELITY = 'ac'
+DC_ESCALATION_LOADING_PERCENT = 90.0  # Line/trafo loading in the DC result
+DC_ESCALATION_ANGLE_DEGREE = 30.0     # Max angle difference across a line (DC has no |V|)
+
+# Fallback ladder: each step is tried only if the previous one failed.
+# 'pf' = OPF started from a power flow (re-solves skip the fresh PF first) | 'flat' = PIPS default start (middle of
+# the variable bounds) | 'relax_voltage' | 'relax_q' | 'drop_line_limits'
+# Relaxing steps are cumulative (e.g. 'relax_q' keeps the relaxed voltage bounds).
+OPF_FALLBACK_LADDER = ['pf', 'flat', 'relax_voltage', 'relax_q', 'drop_line_limits']
+OPF_ATTEMPT_TIMEOUT_S = 120.0   # Wall-clock limit per attempt (enforced in the main thread only)
+OPF_SCENARIO_BUDGET_S = 600.0   # Wall-clock budget for the whole ladder of one scenario
+OPF_RELAXED_VM_PU = (0.90, 1.10)
+OPF_RELAXED_Q_FACTOR = 2.0      # Multiplier on gen/sgen/storage Q limits
+
+# Compiled case: convert the net to pandapower's internal pypower case once per topology
+# and only patch loads, gen limits and costs per scenario (skips the full pd2ppc conversion).
+OPF_COMPILED_CASE = True
+COMPILED_CASE_MAX_ENTRIES = 8   # Topologies kept (voltage/line-limit relaxations count as topologies)
+
+# Multi-period studies: storage energy is carried from hour to hour (pandapower sign: p_mw > 0 charges)
+MULTI_PERIOD_INITIAL_SOC_PERCENT = 50.0
+STORAGE_CHARGE_EFFICIENCY = 0.95
+STORAGE_DISCHARGE_EFFICIENCY = 0.95
+
+# Result cache: converged scenario results keyed by a hash of (scenario config, base net, solver settings).
+# Identical reruns (dashboard re-runs, duplicate library scenarios) are served from disk without solving.
+RESULT_CACHE_ENABLED = True
+RESULT_CACHE_DIR = "result_cache"   # Below OUTPUT_DIR
+RESULT_CACHE_MAX_ENTRIES = 256
+RESULT_CACHE_MAX_MB = 512.0         # Least recently used entries are evicted beyond either limit
+# Settings that change the OPF result and therefore belong to the cache key
+RESULT_CACHE_CONFIG_KEYS = [
+    'OPF_SOLVER', 'OPF_CALCULATE_VOLTAGE_ANGLES', 'OPF_TOLERANCE', 'POWERMODELS_MODEL', 'POWERMODELS_SOLVER',
+    'DC_ESCALATION_LOADING_PERCENT', 'DC_ESCALATION_ANGLE_DEGREE', 'OPF_FALLBACK_LADDER',
+    'OPF_RELAXED_VM_PU', 'OPF_RELAXED_Q_FACTOR', 'STORAGE_CHARGE_EFFICIENCY', 'STORAGE_DISCHARGE_EFFICIENCY',
+    'BUS_MIN_VM_PU', 'BUS_MAX_VM_PU', 'ENFORCE_LINE_LIMITS', 'MAX_LINE_LOADING_PERCENT', 'LINE_LIMIT_MODE',
+    'LAZY_LINE_LIMIT_ADD_PERCENT', 'LAZY_LINE_LIMIT_TOLERANCE_PERCENT', 'LAZY_LINE_LIMIT_MAX_ROUNDS',
+    'GEN_MAX_Q_RATIO', 'GEN_MIN_Q_RATIO', 'SGEN_MAX_Q_RATIO', 'SGEN_MIN_Q_RATIO',
+    'MAIN_SLACK_PARAMS', 'IMPORT_COST_PARAMS', 'STORAGE_COST_PARAMS', 'GENERATION_COSTS',
+]
+
+# Sensitivities: sparse DC PTDF/LODF per topology (see sensitivity.py), cached below OUTPUT_DIR
+SENSITIVITY_CACHE_DIR = "sensitivity_cache"
+SENSITIVITY_CACHE_MAX_ENTRIES = 16     # Topologies kept on disk / in memory
+SENSITIVITY_DROP_TOLERANCE = 1e-5      # PTDF/LODF entries below this are dropped from the sparse matrices
+SENSITIVITY_BLOCK_COLUMNS = 256        # Columns of PTDF/LODF computed densely at a time (memory: branches x this)
+
+# N-1 screening (see contingency.py): LODF estimate for every outage, AC PF check of the worst ones
+N1_SCREENING_ENABLED = False
+N1_OUTAGE_TABLES = ['line']        # Branch tables whose elements are taken out one at a time
+N1_VERIFY_TOP_K = 20               # Outages with the highest estimated loading re-checked with a full AC PF
+N1_OVERLOAD_PERCENT = 100.0        # Post-outage loading counted as a violation
+N1_JOBS = None                     # Worker processes for the AC checks (None = all cores)
+
+# Monte Carlo studies (see monte_carlo.py): sampled operating points instead of the hand-picked library hours.
+# One distribution per capacity factor (BASE_CF key) or 'load' (load scale): ('beta', mean, std) |
+# ('normal', mean, std) | ('uniform', low, high). Unlisted types keep their BASE_CF value.
+MONTE_CARLO_DISTRIBUTIONS = {
+    'solar radiant energy': ('beta', 0.12, 0.15),
+    'wind_onshore': ('beta', 0.20, 0.15),
+    'wind_offshore': ('beta', 0.37, 0.25),
+    'load': ('normal', 0.85, 0.12),
+}
+MONTE_CARLO_FIDELITY = 'dc'        # Solver tier per sample ('dc' | 'auto' | 'ac')
+MONTE_CARLO_BATCH_SIZE = 64        # Samples solved between two convergence checks
+MONTE_CARLO_MIN_SAMPLES = 256
+MONTE_CARLO_MAX_SAMPLES = 5000
+MONTE_CARLO_PERCENTILES = [5, 50, 95]  # Tail percentiles (p99) need far more samples to converge
+MONTE_CARLO_TOLERANCE = 5.0        # Stop once every loading percentile is known to +/- this (percentage points, ~95%)
+
+# Hosting capacity (Injections.py): scenario the candidate sites are assessed in, batch screening (--sites)
+HOSTING_CAPACITY_SCENARIO = '14.pv_avg_wind_avg_load_avg'
+HOSTING_CAPACITY_MIN_VN_KV = 110.0  # Lowest voltage level a site may connect to
+HOSTING_CAPACITY_DIR = "hosting_capacity"  # Below OUTPUT_DIR
+# Pre-estimate before the injection OPF: analytic estimate from the line PTDFs and the voltage sensitivity of a
+# probe PF, narrowed by bisection over AC power flows of the scenario dispatch (injection balanced by the slack, no
+# redispatch). A search stopped by a line, trafo or voltage limit is reported as is; the other sites (PF divergence,
+# check budget) get the OPF from the best PF point with the virtual unit capped at the PF result plus the margin.
+# If the OPF fails or only solves without line limits, the PF result is reported instead.
+HOSTING_CAPACITY_PRE_ESTIMATE = True
+HOSTING_CAPACITY_CONFIRM_OPF = True        # False: report the PF search result without any OPF
+HOSTING_CAPACITY_OPF_MARGIN = 0.25         # Room for redispatch above the PF search result (share of it)
+HOSTING_CAPACITY_PROBE_MW = 50.0           # Injection of the voltage sensitivity probe
+HOSTING_CAPACITY_SEARCH_TOLERANCE_MW = 10.0
+HOSTING_CAPACITY_MAX_PF_CHECKS = 16
+
+# Hosting map (--hosting-map, see hosting_map.py): PTDF estimate for every STANDARD_VOLTAGE_LEVELS bus,
+# injection OPF only for the promising ones: with a target MW the buses whose estimate is within the band
+# of the target (closest first, at most HOSTING_MAP_MAX_REFINE), otherwise the top-k estimates.
+HOSTING_MAP_TOP_K = 50
+HOSTING_MAP_REFINE_BAND = 0.25      # Share of the target below which a bus counts as unable to host it
+HOSTING_MAP_MAX_REFINE = 200
+HOSTING_MAP_FILE = "hosting_map"    # <name>.geojson / .csv below OUTPUT_DIR/HOSTING_CAPACITY_DIR
+
+# Area studies (--area/--radius): full detail inside the radius, network equivalent outside.
+# 'ward' | 'xward' | 'rei' (pandapower.grid_equivalents), computed at the OPF operating point of the reference scenario.
+# xward keeps the voltage support of the external grid at the boundary; a plain ward freezes it and the
+# OPF on the reduced net often cannot hold the voltage band.
+AREA_EQUIVALENT_TYPE = 'xward'
+AREA_EQUIVALENT_SCENARIO = '14.pv_avg_wind_avg_load_avg'
+
 POWERMODELS_MODEL = 'ACRLPowerModel' 
 POWERMODELS_SOLVER = 'ipopt'
 
@@ -53,6 +165,14 @@ BUS_MIN_VM_PU = 0.95
 BUS_MAX_VM_PU = 1.05
 ENFORCE_LINE_LIMITS = False      
 MAX_LINE_LOADING_PERCENT = 100 
+# 'all': every line gets max_loading_percent up front.
+# 'lazy': constraint generation - solve with limits only on lines already near their limit, add the
+# violated ones and solve again until the result is feasible for all lines. Every round is a full cold OPF,
+# so 'lazy' only pays off when few limits bind (on case118 with binding limits it is slower than 'all').
+LINE_LIMIT_MODE = 'all'
+LAZY_LINE_LIMIT_ADD_PERCENT = 95.0    # Share of the limit above which an unconstrained line is added
+LAZY_LINE_LIMIT_TOLERANCE_PERCENT = 0.1  # Loading above limit + tolerance counts as a violation
+LAZY_LINE_LIMIT_MAX_ROUNDS = 8        # Afterwards all limits are enforced at once
 
 # Generator Q Constraints
 GEN_MAX_Q_RATIO = 0.6
@@ -0,0 +1,183 @@
+"""
+Contingency - N-1 screening of a solved scenario.
+Post-outage flows of every branch outage are estimated at once from the LODF matrix (sensitivity.py);
+only the top-k outages by estimated loading are verified with a full AC power flow, in a process pool.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pandapower as pp
+
+from . import config
+from .opf import apply_dispatch, create_scenario_net
+from .sensitivity import get_sensitivities
+
+# Per-process state, filled once by _init_worker
+_WORKER = {}
+
+
+def branch_ratings_mva(net, branches):
+    """Thermal rating (MVA) of (et, element) branch labels; NaN where the element has none."""
+    ratings = np.full(len(branches), np.nan)
+    ets = branches.get_level_values('et')
+    elements = branches.get_level_values('element')
+    mask = ets == 'line'
+    if mask.any():
+        line = net.line.loc[elements[mask]]
+        vn_kv = net.bus['vn_kv'].reindex(line['from_bus']).to_numpy()
+        ratings[mask] = line['max_i_ka'].to_numpy() * line['df'].to_numpy() * line['parallel'].to_numpy() \
+            * vn_kv * np.sqrt(3)
+    mask = ets == 'trafo'
+    if mask.any():
+        trafo = net.trafo.loc[elements[mask]]
+        ratings[mask] = trafo['sn_mva'].to_numpy() * trafo['parallel'].to_numpy()
+    return ratings
+
+
+def _branch_q(net, branches):
+    q = np.zeros(len(branches))
+    for et, col in [('line', 'q_from_mvar'), ('trafo', 'q_hv_mvar')]:
+        mask = branches.get_level_values('et') == et
+        if mask.any() and col in net[f'res_{et}'].columns:
+            q[mask] = net[f'res_{et}'][col].reindex(branches.get_level_values('element')[mask]).fillna(0.0).to_numpy()
+    return q
+
+
+def screen_outages(net, outage_tables=None):
+    """
+    LODF estimate of the worst post-outage loading for every in-service element of `outage_tables`.
+    Reactive flows are kept at their pre-outage value. Returns one row per outage, worst first.
+    """
+    outage_tables = outage_tables or config.N1_OUTAGE_TABLES
+    model = get_sensitivities(net)
+    branches = model.branches
+    outages = [b for b in branches if b[0] in outage_tables and bool(net[b[0]].at[b[1], 'in_service'])]
+
+    p_post = model.post_outage_flows(model.branch_flows(net), outages)
+    q = _branch_q(net, branches)
+    rating = branch_ratings_mva(net, branches)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        loading = np.sqrt(p_post ** 2 + q[:, None] ** 2) / rating[:, None] * 100.0
+    loading[~np.isfinite(loading)] = np.nan
+
+    cols = model.branch_positions(outages)
+    islanding = model.islanding[cols]
+    est_max = np.full(len(outages), np.nan)
+    worst = np.full(len(outages), -1)
+    valid = ~islanding & ~np.all(np.isnan(loading), axis=0)
+    if valid.any():
+        worst[valid] = np.nanargmax(loading[:, valid], axis=0)
+        est_max[valid] = loading[worst[valid], np.flatnonzero(valid)]
+
+    overload = config.N1_OVERLOAD_PERCENT
+    frame = pd.DataFrame({
+        'outage_et': [et for et, _ in outages],
+        'outage_element': [el for _, el in outages],
+        'outage_name': [net[et].at[el, 'name'] if 'name' in net[et].columns else None for et, el in outages],
+        'islanding': islanding,
+        'est_max_loading_percent': est_max,
+        'est_worst_et': [branches[w][0] if w >= 0 else None for w in worst],
+        'est_worst_element': [branches[w][1] if w >= 0 else None for w in worst],
+        'est_overloaded_branches': (np.nan_to_num(loading, nan=0.0) > overload).sum(axis=0),
+    })
+    return frame.sort_values('est_max_loading_percent', ascending=False, na_position='last').reset_index(drop=True)
+
+
+def dispatch_net(scenario_net):
+    """Copy of a solved scenario net with the OPF dispatch as setpoints and a matching base-case AC PF."""
+    net = create_scenario_net(scenario_net, mutable_tables=('gen', 'sgen', 'storage', 'ext_grid', 'dcline'))
+    apply_dispatch(net)
+    pp.runpp(net, numba=False, calculate_voltage_angles=True, max_iteration=config.PF_MAX_ITERATION)
+    return net
+
+
+def _init_worker(net):
+    _WORKER['net'] = net
+
+
+def _ac_result(net):
+    """Worst branch loading and the voltage band of a solved PF."""
+    loadings = [(et, net[f'res_{et}']['loading_percent']) for et in ['line', 'trafo']
+                if len(net[f'res_{et}']) > 0]
+    worst_et, worst_el, worst = None, None, np.nan
+    n_over = 0
+    for et, loading in loadings:
+        loading = loading.dropna()
+        if len(loading) == 0: continue
+        n_over += int((loading > config.N1_OVERLOAD_PERCENT).sum())
+        if np.isnan(worst) or loading.max() > worst:
+            worst_et, worst_el, worst = et, int(loading.idxmax()), float(loading.max())
+    vm = net.res_bus['vm_pu'].dropna()
+    return {'ac_max_loading_percent': worst, 'ac_worst_et': worst_et, 'ac_worst_element': worst_el,
+            'ac_overloaded_branches': n_over,
+            'ac_min_vm_pu': float(vm.min()) if len(vm) else np.nan,
+            'ac_max_vm_pu': float(vm.max()) if len(vm) else np.nan}
+
+
+def _verify_outage(et, element):
+    """AC PF of the dispatch net with one branch out of service (runs inside a worker)."""
+    # Private result tables (init='results' must see the base case) and gen table (runpp appends the
+    # auxiliary DC-line gens to it in place)
+    net = create_scenario_net(_WORKER['net'], mutable_tables=(et, 'gen'))
+    net[et].at[element, 'in_service'] = False
+    record = {'outage_et': et, 'outage_element': element, 'ac_converged': False}
+    try:
+        pp.runpp(net, init='results', numba=False, calculate_voltage_angles=True,
+                 max_iteration=config.PF_MAX_ITERATION)
+        record['ac_converged'] = True
+        record.update(_ac_result(net))
+    except Exception as e:
+        record['ac_error'] = str(e).splitlines()[0] if str(e) else type(e).__name__
+    return record
+
+
+def verify_outages(net, outages, jobs=None):
+    """Full AC PF for each (et, element) outage of the dispatch net, fanned out to a process pool."""
+    if not outages: return pd.DataFrame()
+    jobs = min(max(1, jobs or config.N1_JOBS or os.cpu_count() or 1), len(outages))
+    if jobs == 1:
+        _init_worker(net)
+        records = [_verify_outage(et, el) for et, el in outages]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(net,)) as pool:
+            records = list(pool.map(_verify_outage, *zip(*outages)))
+    return pd.DataFrame(records)
+
+
+def run_n1(scenario_net, top_k=None, jobs=None):
+    """
+    N-1 screening of a solved scenario net: LODF estimate for all outages, AC verification of the
+    top_k (default N1_VERIFY_TOP_K). Returns one row per outage, worst estimate first.
+    """
+    top_k = config.N1_VERIFY_TOP_K if top_k is None else top_k
+    print("--- N-1 SCREENING ---")
+    t_start = time.time()
+    screened = screen_outages(scenario_net)
+    n_over = int((screened['est_max_loading_percent'] > config.N1_OVERLOAD_PERCENT).sum())
+    print(f"  > {len(screened)} outages estimated in {time.time() - t_start:.2f}s, "
+          f"{n_over} above {config.N1_OVERLOAD_PERCENT:.0f}%, {int(screened['islanding'].sum())} islanding.")
+
+    candidates = screened[~screened['islanding']].head(top_k)
+    outages = list(zip(candidates['outage_et'], candidates['outage_element']))
+    if not outages:
+        screened['verified'] = False
+        return screened
+
+    t_ac = time.time()
+    try:
+        net = dispatch_net(scenario_net)
+    except Exception as e:
+        print(f"  ⚠ Base-case AC PF of the OPF dispatch failed ({e}). Skipping AC verification.")
+        screened['verified'] = False
+        return screened
+    verified = verify_outages(net, outages, jobs)
+    screened = screened.merge(verified, on=['outage_et', 'outage_element'], how='left')
+    screened['verified'] = screened['ac_converged'].notna()
+    n_viol = int((screened['ac_max_loading_percent'] > config.N1_OVERLOAD_PERCENT).sum())
+    n_fail = int((screened['ac_converged'] == False).sum())  # noqa: E712 (NaN for unverified rows)
+    print(f"  ✓ {len(outages)} outages verified with AC PF in {time.time() - t_ac:.2f}s: "
+          f"{n_viol} violations, {n_fail} not converged.")
+    return screened
@@ -20,8 +20,9 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(os.path.dirname(current_dir))
 if project_root not in sys.path: sys.path.insert(0, project_root)
 
-from powerflow.analysis import config, grid_building, opf, visualization, report_export
+from powerflow.analysis import config, grid_building, opf, visualization, report_export, contingency
 from powerflow.analysis.scenarios import SCENARIOS as PRESET_SCENARIOS, DEFAULT_GEN_COSTS
+from powerflow.analysis.network_cache import NetworkCache
 
 # ==========================================
 # 2. Page Config & CSS
@@ -57,11 +58,12 @@ if 'selected_scenario_name' not in st.session_state:
     st.session_state['selected_scenario_name'] = 'average_of_2025'
 
 if st.sidebar.button("🔄 Force Rebuild Network Cache"):
-    cache_path = os.path.join(config.OUTPUT_DIR, config.NETWORK_CACHE_FILE)
-    if os.path.exists(cache_path):
-        os.remove(cache_path)
+    # Only the variant of the current inputs/settings is dropped; other cached variants are kept
+    network_cache = NetworkCache()
+    cache_key = network_cache.key()
+    if network_cache.remove(cache_key):
         st.cache_resource.clear()
-        st.success(f"Deleted {cache_path}. Reloading...")
+        st.success(f"Deleted {network_cache.path(cache_key)}. Reloading...")
         time.sleep(1)
         st.rerun()
     else:
@@ -70,7 +72,8 @@ if st.sidebar.button("🔄 Force Rebuild Network Cache"):
         st.rerun()
 
 @st.cache_resource
-def load_base_network_cached():
+def load_base_network_cached(cache_key):
+    # cache_key (NetworkCache) makes Streamlit reload when the input CSVs or build settings change
     modeler = grid_building.GridModeler()
     base_net, ext_grids = modeler.create_base_network()
     
@@ -112,7 +115,7 @@ def load_base_network_cached():
     return base_net, ext_grids, sorted(list(neighbor_countries)), installed_cap, list(found_types_raw)
 
 try:
-    base_net, external_grids, neighbor_list, installed_capacity_map, debug_found_types = load_base_network_cached()
+    base_net, external_grids, neighbor_list, installed_capacity_map, debug_found_types = load_base_network_cached(NetworkCache().key())
 except Exception as e:
     st.error(f"Failed to load grid: {e}")
     st.info("💡 Tip: Click 'Force Rebuild Network Cache' in the sidebar.")
@@ -199,6 +202,12 @@ storage_mode_map = {
 }
 selected_storage_mode = storage_mode_map[storage_mode_ui]
 
+st.sidebar.subheader("5. 🛡️ Security Analysis")
+run_n1_ui = st.sidebar.checkbox(
+    "N-1 Screening", value=config.N1_SCREENING_ENABLED,
+    help=f"Estimates every line outage with LODFs and verifies the worst {config.N1_VERIFY_TOP_K} with an AC power flow."
+)
+
 st.sidebar.markdown("---")
 new_scen_name = st.sidebar.text_input("New Scenario Name", placeholder="e.g. High Cost Winter")
 if st.sidebar.button("Save Configuration"):
@@ -353,10 +362,18 @@ if batch_run_btn:
                 if converged:
                     run_status = "✅ Converged"
                     # Export Data
+                    telemetry = res_info['telemetry']
                     exporter = report_export.ReportGenerator(res_net)
-                    exporter.export_all(folder_name)
+                    with telemetry.stage('export_report'):
+                        exporter.export_all(folder_name)
                     viz = visualization.Visualizer()
-                    viz.create_map(res_net, res_info, result_folder=folder_name)
+                    with telemetry.stage('create_map'):
+                        viz.create_map(res_net, res_info, result_folder=folder_name)
+                    if run_n1_ui:
+                        with telemetry.stage('n1_screening'):
+                            n1_results = contingency.run_n1(res_net)
+                        exporter.export_n1(folder_name, n1_results)
+                    exporter.export_telemetry(folder_name, telemetry)
                     
                     st.markdown(f"`[{idx_in_list}] {scen_key}`: <span class='success-text'>Converged</span> in {duration:.2f}s", unsafe_allow_html=True)
                 else:
@@ -422,24 +439,55 @@ else:
         
         status = st.empty()
         bar = st.progress(0)
-        engine = opf.OPFEngine(base_net, external_grids)
+        # Keep the engine across reruns: slider edits of the same scenario are re-solved incrementally
+        engine = st.session_state.get('opf_engine')
+        if engine is None or engine.base_net is not base_net:
+            engine = opf.OPFEngine(base_net, external_grids)
+            st.session_state['opf_engine'] = engine
         start_time = time.time()
         
         try:
             status.write(f"Running OPF for **{folder_name}**...")
-            res_net, res_info, converged = engine.run_scenario(run_scenario_config)
+            if engine.current_scenario_name == run_scenario_config['name']:
+                res_net, res_info, converged = engine.resolve(run_scenario_config)
+            else:
+                res_net, res_info, converged = engine.run_scenario(run_scenario_config)
             bar.progress(100)
             
             if converged:
                 status.success(f"Converged in {time.time() - start_time:.2f}s")
+                relaxations = res_info.get('solver', {}).get('relaxations', [])
+                if relaxations:
+                    st.warning(f"Converged only with relaxed constraints: {', '.join(relaxations)}")
+                telemetry = res_info['telemetry']
                 exporter = report_export.ReportGenerator(res_net)
-                exporter.export_all(folder_name)
+                with telemetry.stage('export_report'):
+                    exporter.export_all(folder_name)
                 viz = visualization.Visualizer()
-                viz.create_map(res_net, res_info, result_folder=folder_name)
+                with telemetry.stage('create_map'):
+                    viz.create_map(res_net, res_info, result_folder=folder_name)
+                n1_results = None
+                if run_n1_ui:
+                    with telemetry.stage('n1_screening'):
+                        n1_results = contingency.run_n1(res_net)
+                    exporter.export_n1(folder_name, n1_results)
+                exporter.export_telemetry(folder_name, telemetry)
+                if n1_results is not None:
+                    with st.expander("🛡️ N-1 Screening", expanded=True):
+                        n_viol = int((n1_results.get('ac_max_loading_percent', pd.Series(dtype=float))
+                                      > config.N1_OVERLOAD_PERCENT).sum())
+                        st.write(f"{len(n1_results)} outages screened, {int(n1_results['verified'].sum())} "
+                                 f"verified with AC power flow, **{n_viol}** post-outage overloads.")
+                        st.dataframe(n1_results.head(config.N1_VERIFY_TOP_K), use_container_width=True)
+                with st.expander("⏱️ Stage Timings"):
+                    st.dataframe(pd.DataFrame(telemetry.stages), use_container_width=True)
                 with open(os.path.join(result_dir, 'kpi.json'), 'r') as f: kpi_data = json.load(f)
                 show_results(kpi_data, existing_map_path, folder_name)
             else:
-                status.error("OPF did not converge. Try adjusting Load or Import Prices.")
+                attempts = res_info.get('solver', {}).get('attempts', [])
+                tried = ", ".join(f"{a['step']} ({a['status']}, {a['duration_s']:.1f}s)" for a in attempts)
+                status.error(f"OPF did not converge after {len(attempts)} attempt(s): {tried}. "
+                             "Try adjusting Load or Import Prices.")
         except Exception as e:
             status.error(f"Error during execution: {e}")
             st.exception(e)
@@ -8,11 +8,26 @@ import pandapower as pp
 import pandapower.topology as top
 import networkx as nx
 import os
-import pickle
 import json
 
 from pyparsing import line
 from . import config
+from .network_cache import NetworkCache
+from .spatial import BusIndex, get_bus_index, register_bus_index
+
+# pandapower's bulk create_*s calls leave a few columns different from the element-wise create_* calls
+# (the cached net, its fingerprints and everything keyed on them must not depend on how it was built):
+# unset strings become '' instead of None/NaN and optional ids float instead of Int64 ...
+BULK_CREATE_DEFAULTS = {
+    'bus': {'zone': None},
+    'line': {'std_type': None, 'type': None},
+    'trafo': {'std_type': None, 'tap_side': None, 'tap_changer_type': np.nan, 'id_characteristic_table': pd.NA},
+    'sgen': {'curve_style': np.nan, 'id_q_capability_curve_characteristic': pd.NA},
+}
+# ... create_sgens adds a column and create_storages orders its limits differently
+BULK_CREATE_EXTRA_COLUMNS = {'sgen': ['generator_type']}
+BULK_CREATE_COLUMN_ORDER = {'storage': ('type', ['min_p_mw', 'max_p_mw', 'controllable'])}
+
 
 class GridModeler:
 
@@ -29,19 +44,23 @@ class GridModeler:
         self.hvdc_projects = None # 初始化避免报错
 
     def create_base_network(self):
-        cache_path = os.path.join(config.OUTPUT_DIR, config.NETWORK_CACHE_FILE)
-        disc_cache_path = os.path.join(config.OUTPUT_DIR, "disconnected_buses.json")
-
-        # 1. Check if we can load from cache
-        if not config.FORCE_NETWORK_REBUILD and os.path.exists(cache_path):
-            print(f"1. Loading base network from cache: {cache_path}")
-            try:
-                with open(cache_path, 'rb') as f:
-                    self.base_net, self.ext_grid_list = pickle.load(f)
+        cache = NetworkCache()
+        description = cache.describe()
+        key = cache.key(description)
+
+        # 1. Check if we can load from cache (the key covers the input CSVs and the build settings)
+        if not config.FORCE_NETWORK_REBUILD:
+            cached = cache.get(key)
+            if cached is not None:
+                print(f"1. Loading base network from cache: {cache.path(key)}")
+                self.base_net, self.ext_grid_list = cached['net'], cached['ext_grids']
+                register_bus_index(cached['bus_index'])
+                self._save_disconnected_buses(cached['disconnected'])
                 print(f"  ✓ Cache loaded successfully: {len(self.base_net.bus)} buses.")
                 return self.base_net, self.ext_grid_list
-            except Exception as e:
-                print(f"  ⚠ Cache load failed ({e}), falling back to rebuild.")
+            reason = cache.stale_reason(description)
+            if reason:
+                print(f"  > Cached network is stale (changed: {reason}).")
 
         print("1. Loading raw data (Rebuilding network)...")
         self._load_data()
@@ -57,6 +76,7 @@ class GridModeler:
 
         #  Connectivity Check & Disconnected Component Handling 
         print("  > Checking network connectivity...")
+        disc_data = []
         if len(self.base_net.bus) > 0:
             mg = top.create_nxgraph(self.base_net)
             islands = list(nx.connected_components(mg))
@@ -71,41 +91,48 @@ class GridModeler:
             print(f"  > Removing {len(disconnected_indices)} disconnected buses...")
 
             # Save disconnected buses to JSON for visualization
-            if len(disconnected_indices) > 0:
-                disc_data = []
-                for idx in disconnected_indices:
-                    bus_row = self.base_net.bus.loc[idx]
-                    geo = bus_row['geo']
-                    if geo:
-                        disc_data.append({
-                            'id': int(idx),
-                            'name': str(bus_row['name']),
-                            'vn_kv': float(bus_row['vn_kv']),
-                            'lat': float(geo[0]),
-                            'lon': float(geo[1])
-                        })
-
-                os.makedirs(config.OUTPUT_DIR, exist_ok=True)
-                with open(disc_cache_path, 'w') as f:
-                    json.dump(disc_data, f)
+            for idx in disconnected_indices:
+                bus_row = self.base_net.bus.loc[idx]
+                geo = bus_row['geo']
+                if geo:
+                    disc_data.append({
+                        'id': int(idx),
+                        'name': str(bus_row['name']),
+                        'vn_kv': float(bus_row['vn_kv']),
+                        'lat': float(geo[0]),
+                        'lon': float(geo[1])
+                    })
+            self._save_disconnected_buses(disc_data)
+            if disc_data:
                 print(f"    (Saved {len(disc_data)} disconnected buses for visualization)")
-            else:
-                if os.path.exists(disc_cache_path):
-                    os.remove(disc_cache_path)
 
             # Remove them from the OPF network
             self.base_net = pp.select_subnet(self.base_net, buses=main_island_buses)
         
         # === Save to Cache ===
-        print(f"  > Saving built network to cache: {cache_path} ...")
-        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
-
-        with open(cache_path, 'wb') as f:
-            pickle.dump((self.base_net, self.ext_grid_list), f)
-        print("  ✓ Network cached.")
+        print(f"  > Saving built network to cache: {cache.path(key)} ...")
+        cache.put(key, {'net': self.base_net, 'ext_grids': self.ext_grid_list,
+                        'bus_index': get_bus_index(self.base_net), 'disconnected': disc_data}, description)
+        print(f"  ✓ Network cached ({len(cache.variants())} variant(s) kept).")
 
         return self.base_net, self.ext_grid_list
 
+    def _save_disconnected_buses(self, disc_data):
+        """disconnected_buses.json (read by the report export) always describes the net just built or loaded."""
+        disc_cache_path = os.path.join(config.OUTPUT_DIR, "disconnected_buses.json")
+        if disc_data:
+            # Workers load the cached net concurrently: write-then-rename keeps the file readable
+            os.makedirs(config.OUTPUT_DIR, exist_ok=True)
+            tmp_path = f"{disc_cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(disc_data, f)
+            os.replace(tmp_path, disc_cache_path)
+        elif os.path.exists(disc_cache_path):
+            try:
+                os.remove(disc_cache_path)
+            except OSError:
+                pass
+
     def _load_data(self):
         def _load_csv(filename):
             path = os.path.join(config.DATA_DIR, filename)
@@ -200,15 +227,14 @@ class GridModeler:
         net = pp.create_empty_network(name="German Grid Base")
 
         target_vns = config.STANDARD_VOLTAGE_LEVELS
-        buses_to_add = self.buses[self.buses['vn_kv'].isin(target_vns)].copy()
+        buses_to_add = self.buses[self.buses['vn_kv'].isin(target_vns)]
 
-        # 1. Add Buses
-        for _, bus in buses_to_add.iterrows():
-            idx = pp.create_bus(
-                net, vn_kv=bus['vn_kv'], name=bus['name'], geodata=(bus['lat'], bus['lon'])
-            )
-            self.bus_mapping[bus['bus_id']] = idx
-            net.bus.at[idx, 'geo'] = (bus['lat'], bus['lon'])
+        # 1. Add Buses (one bulk call, indices follow the CSV order)
+        bus_indices = pp.create_buses(net, len(buses_to_add), vn_kv=buses_to_add['vn_kv'].values,
+                                      name=buses_to_add['name'].values)
+        net.bus['geo'] = pd.Series(list(zip(buses_to_add['lat'], buses_to_add['lon'])), index=bus_indices,
+                                   dtype=object)
+        self.bus_mapping.update(zip(buses_to_add['bus_id'], bus_indices))
 
         added_bus_pp_indices = set(net.bus.index)
         ext_grid_buses = set()
@@ -244,154 +270,163 @@ class GridModeler:
                     ext_grid_buses.add(bus_idx)
 
         # 3. Add Lines (AC and DC)
-        
-        for _, line in self.connections.iterrows():
-            # remove the line on the sea with specific ID
-            if str(line.get('name', '')) == 'way/753560476':
-                print(f"  > Skipping specific line: {line['name']}")
-                continue
-
-            from_bus = self.bus_mapping.get(line['from_bus_id'])
-            to_bus = self.bus_mapping.get(line['to_bus_id'])
-            
-            if from_bus in added_bus_pp_indices and to_bus in added_bus_pp_indices:
-                
-                # Check Type
-                l_type = str(line.get('line_type', '')).upper()
-                ac_dc_type = str(line.get('ac_dc_type', '')).upper()
-                
-                # CASE A: DC Line
-                if 'DC' in l_type or 'DC' in ac_dc_type:
-                    # Estimate Capacity: DC lines don't use X/R. They need MW capacity.
-                    # If not explicitly provided, we try to estimate from I_max * Voltage * sqrt(3) or default.
-                    # connections.csv usually has max_i_ka.
-                    
-                    # Try to find voltage level of connected bus
-                    v_base = net.bus.at[from_bus, 'vn_kv']
-                    i_max = line.get('max_i_ka', 1.0)
-                    # Rough estimation: P = V * I (DC) or S = sqrt(3)*V*I (AC)
-                    # Let's use a safe capacity estimate or a default high value (e.g. 2000 MW)
-                    # if real capacity is missing.
-                    capacity_mw = 1000.0 
-                    if i_max > 0:
-                        # Assuming Bi-pole or similar high capacity
-                        capacity_mw = v_base * i_max * 1.5 # Heuristic
-                    
-                    pp.create_dcline(
-                        net,
-                        from_bus=from_bus,
-                        to_bus=to_bus,
-                        p_mw=0, # Optimal dispatch
-                        loss_mw=capacity_mw * 0.01, # 1% loss
-                        loss_percent=0,
-                        vm_from_pu=1.0,
-                        vm_to_pu=1.0,
-                        max_p_mw=capacity_mw,
-                        min_q_from_mvar=-capacity_mw*0.4,
-                        max_q_from_mvar=capacity_mw*0.4,
-                        min_q_to_mvar=-capacity_mw*0.4,
-                        max_q_to_mvar=capacity_mw*0.4,
-                        name=f"HVDC_{line['name']}"
-                    )
-                    
-                # CASE B: AC Line (Standard)
-                else:
-                    line_idx = pp.create_line_from_parameters(
-                        net, from_bus=from_bus, to_bus=to_bus, length_km=line['length_km'],
-                        r_ohm_per_km=line['r_ohm_per_km'], x_ohm_per_km=line['x_ohm_per_km'],
-                        c_nf_per_km=line['c_nf_per_km'], max_i_ka=line['max_i_ka'],
-                        parallel=int(line['parallel']), name=line['name']
-                    )
-                    net.line.at[line_idx, 'cables_per_phase'] = line.get('parallel_cables_per_phase', 1)
-                    if pd.notna(line.get('geographic_coordinates')):
-                        net.line.at[line_idx, 'geo_coords'] = str(line['geographic_coordinates'])
+        conns = self.connections
+        # remove the line on the sea with specific ID
+        skipped = conns['name'].astype(str) == 'way/753560476'
+        for name in conns.loc[skipped, 'name']:
+            print(f"  > Skipping specific line: {name}")
+
+        from_bus = self._bus_indices(conns['from_bus_id'])
+        to_bus = self._bus_indices(conns['to_bus_id'])
+        connected = ~skipped & from_bus.notna() & to_bus.notna()
+        is_dc = conns['line_type'].astype(str).str.upper().str.contains('DC', regex=False) | \
+            conns['ac_dc_type'].astype(str).str.upper().str.contains('DC', regex=False)
+
+        # CASE A: DC Line (rare - one create call each)
+        for i in conns.index[connected & is_dc]:
+            line = conns.loc[i]
+            # DC lines don't use X/R. They need MW capacity: estimate it from I_max and the voltage level
+            v_base = net.bus.at[int(from_bus[i]), 'vn_kv']
+            i_max = line.get('max_i_ka', 1.0)
+            capacity_mw = v_base * i_max * 1.5 if i_max > 0 else 1000.0  # Heuristic (bi-pole)
+
+            pp.create_dcline(
+                net,
+                from_bus=int(from_bus[i]),
+                to_bus=int(to_bus[i]),
+                p_mw=0, # Optimal dispatch
+                loss_mw=capacity_mw * 0.01, # 1% loss
+                loss_percent=0,
+                vm_from_pu=1.0,
+                vm_to_pu=1.0,
+                max_p_mw=capacity_mw,
+                min_q_from_mvar=-capacity_mw*0.4,
+                max_q_from_mvar=capacity_mw*0.4,
+                min_q_to_mvar=-capacity_mw*0.4,
+                max_q_to_mvar=capacity_mw*0.4,
+                name=f"HVDC_{line['name']}"
+            )
+
+        # CASE B: AC Line (Standard)
+        ac = connected & ~is_dc
+        if ac.any():
+            lines = conns[ac]
+            line_indices = pp.create_lines_from_parameters(
+                net, from_buses=from_bus[ac].astype(int).values, to_buses=to_bus[ac].astype(int).values,
+                length_km=lines['length_km'].values, r_ohm_per_km=lines['r_ohm_per_km'].values,
+                x_ohm_per_km=lines['x_ohm_per_km'].values, c_nf_per_km=lines['c_nf_per_km'].values,
+                max_i_ka=lines['max_i_ka'].values, parallel=lines['parallel'].astype(int).values,
+                name=lines['name'].values
+            )
+            net.line.loc[line_indices, 'cables_per_phase'] = lines['parallel_cables_per_phase'].values
+            coords = lines['geographic_coordinates']
+            has_coords = coords.notna().values
+            if has_coords.any():
+                net.line.loc[line_indices[has_coords], 'geo_coords'] = coords[has_coords].astype(str).values
 
         # 4. Add Transformers
-        for _, trafo in self.transformers.iterrows():
-            hv_bus = self.bus_mapping.get(trafo['hv_bus_id'])
-            lv_bus = self.bus_mapping.get(trafo['lv_bus_id'])
-            if hv_bus in added_bus_pp_indices and lv_bus in added_bus_pp_indices:
-                hv_vn = net.bus.at[hv_bus, 'vn_kv']
-                lv_vn = net.bus.at[lv_bus, 'vn_kv']
-                pp.create_transformer_from_parameters(
-                    net, hv_bus=hv_bus, lv_bus=lv_bus, sn_mva=trafo['sn_mva'],
-                    vn_hv_kv=hv_vn, vn_lv_kv=lv_vn, vk_percent=trafo['vk_percent'],
-                    vkr_percent=trafo['vkr_percent'], pfe_kw=trafo['pfe_kw'],
-                    i0_percent=trafo['i0_percent'], name=trafo['transformer_id']
-                )
+        hv_bus = self._bus_indices(self.transformers['hv_bus_id'])
+        lv_bus = self._bus_indices(self.transformers['lv_bus_id'])
+        connected = hv_bus.notna() & lv_bus.notna()
+        if connected.any():
+            trafos = self.transformers[connected]
+            hv_bus, lv_bus = hv_bus[connected].astype(int).values, lv_bus[connected].astype(int).values
+            pp.create_transformers_from_parameters(
+                net, hv_buses=hv_bus, lv_buses=lv_bus, sn_mva=trafos['sn_mva'].values,
+                vn_hv_kv=net.bus['vn_kv'].loc[hv_bus].values, vn_lv_kv=net.bus['vn_kv'].loc[lv_bus].values,
+                vk_percent=trafos['vk_percent'].values, vkr_percent=trafos['vkr_percent'].values,
+                pfe_kw=trafos['pfe_kw'].values, i0_percent=trafos['i0_percent'].values,
+                name=trafos['transformer_id'].values
+            )
 
         self._add_hvdc_lines(net)
         self._add_generators_and_loads(net, ext_grid_buses)
+        self._restore_element_defaults(net)
 
         return net
 
+    def _restore_element_defaults(self, net):
+        """Makes the bulk-built tables identical to an element-wise build (see BULK_CREATE_DEFAULTS)."""
+        for et, defaults in BULK_CREATE_DEFAULTS.items():
+            if len(net[et]) == 0: continue
+            for col, value in defaults.items():
+                if col not in net[et].columns: continue
+                if value is pd.NA:
+                    net[et][col] = net[et][col].astype('Int64')
+                else:
+                    # A list keeps None as None (pd.Series(None, dtype=object) would fill NaN)
+                    net[et][col] = pd.Series([value] * len(net[et]), index=net[et].index, dtype=object)
+        for et, cols in BULK_CREATE_EXTRA_COLUMNS.items():
+            net[et] = net[et].drop(columns=cols, errors='ignore')
+        for et, (after, cols) in BULK_CREATE_COLUMN_ORDER.items():
+            if after not in net[et].columns or not set(cols) <= set(net[et].columns): continue
+            rest = [c for c in net[et].columns if c not in cols]
+            pos = rest.index(after) + 1
+            net[et] = net[et][rest[:pos] + cols + rest[pos:]]
+
+    def _bus_indices(self, bus_ids):
+        """pandapower bus index per CSV bus id (float Series aligned to `bus_ids`, NaN for unmapped ids)."""
+        mapping = pd.Series(self.bus_mapping, dtype=float)
+        return pd.Series(mapping.reindex(bus_ids.values).values, index=bus_ids.index)
+
     def _add_generators_and_loads(self, net, ext_grid_buses):
         pv_buses = self._select_pv_buses_strategy(net, ext_grid_buses)
 
-        for _, gen in self.generators.iterrows():
-            bus_idx = self.bus_mapping.get(gen['bus_id'])
-            if bus_idx is None or bus_idx not in net.bus.index:
-                continue
-
-            nameplate_p = gen['p_mw']
-            nameplate_sn = gen['sn_mva']
-            gen_type = str(gen['generation_type']).lower()
-
-            if 'storage' in gen_type:
-                max_p = nameplate_p
-                max_e = nameplate_sn * 2
-                pp.create_storage(net, bus=bus_idx, p_mw=0, max_e_mwh=max_e,
-                                  max_p_mw=max_p, min_p_mw=-max_p, q_mvar=0,
-                                  sn_mva=nameplate_sn, name=gen['generator_name'], type=gen['generation_type'],
-                                  controllable=True)
-                net.storage.at[net.storage.index[-1], 'nameplate_p_mw'] = max_p
-                net.storage.at[net.storage.index[-1], 'nameplate_sn_mva'] = nameplate_sn
-                continue
-
-            if bus_idx in pv_buses:
-                pp.create_gen(net, bus=bus_idx, p_mw=nameplate_p, vm_pu=gen['vm_pu'],
-                              sn_mva=nameplate_sn, name=gen['generator_name'],
-                              type=gen['generation_type'], controllable=True)
-                net.gen.at[net.gen.index[-1], 'nameplate_p_mw'] = nameplate_p
-                net.gen.at[net.gen.index[-1], 'nameplate_sn_mva'] = nameplate_sn
-            else:
-                pp.create_sgen(net, bus=bus_idx, p_mw=nameplate_p, q_mvar=0,
-                               sn_mva=nameplate_sn, name=gen['generator_name'],
-                               type=gen['generation_type'], controllable=True)
-                net.sgen.at[net.sgen.index[-1], 'nameplate_p_mw'] = nameplate_p
-                net.sgen.at[net.sgen.index[-1], 'nameplate_sn_mva'] = nameplate_sn
-
-        for _, load in self.loads.iterrows():
-            bus_idx = self.bus_mapping.get(load['bus_id'])
-            if bus_idx is not None and bus_idx in net.bus.index:
-                p_mw = load['p_mw']
-                q_mvar = load['q_mvar']
-                pp.create_load(net, bus=bus_idx, p_mw=p_mw, q_mvar=q_mvar, name=load['load_name'])
-                net.load.at[net.load.index[-1], 'nameplate_p_mw'] = p_mw
-                net.load.at[net.load.index[-1], 'nameplate_q_mvar'] = q_mvar
+        bus = self._bus_indices(self.generators['bus_id'])
+        gens = self.generators[bus.notna()]
+        bus = bus[bus.notna()].astype(int)
+        is_storage = gens['generation_type'].astype(str).str.lower().str.contains('storage', regex=False)
+        is_pv = ~is_storage & bus.isin(pv_buses)
+
+        storage = gens[is_storage]
+        if len(storage) > 0:
+            idx = pp.create_storages(net, buses=bus[is_storage].values, p_mw=0, max_e_mwh=storage['sn_mva'].values * 2,
+                                     max_p_mw=storage['p_mw'].values, min_p_mw=-storage['p_mw'].values, q_mvar=0,
+                                     sn_mva=storage['sn_mva'].values, name=storage['generator_name'].values,
+                                     type=storage['generation_type'].values, controllable=True)
+            net.storage.loc[idx, 'nameplate_p_mw'] = storage['p_mw'].values
+            net.storage.loc[idx, 'nameplate_sn_mva'] = storage['sn_mva'].values
+
+        pv = gens[is_pv]
+        if len(pv) > 0:
+            idx = pp.create_gens(net, buses=bus[is_pv].values, p_mw=pv['p_mw'].values, vm_pu=pv['vm_pu'].values,
+                                 sn_mva=pv['sn_mva'].values, name=pv['generator_name'].values,
+                                 type=pv['generation_type'].values, controllable=True)
+            net.gen.loc[idx, 'nameplate_p_mw'] = pv['p_mw'].values
+            net.gen.loc[idx, 'nameplate_sn_mva'] = pv['sn_mva'].values
+
+        is_sgen = ~is_storage & ~is_pv
+        sgen = gens[is_sgen]
+        if len(sgen) > 0:
+            idx = pp.create_sgens(net, buses=bus[is_sgen].values, p_mw=sgen['p_mw'].values, q_mvar=0,
+                                  sn_mva=sgen['sn_mva'].values, name=sgen['generator_name'].values,
+                                  type=sgen['generation_type'].values, controllable=True)
+            net.sgen.loc[idx, 'nameplate_p_mw'] = sgen['p_mw'].values
+            net.sgen.loc[idx, 'nameplate_sn_mva'] = sgen['sn_mva'].values
+
+        bus = self._bus_indices(self.loads['bus_id'])
+        loads = self.loads[bus.notna()]
+        if len(loads) > 0:
+            idx = pp.create_loads(net, buses=bus[bus.notna()].astype(int).values, p_mw=loads['p_mw'].values,
+                                  q_mvar=loads['q_mvar'].values, name=loads['load_name'].values)
+            net.load.loc[idx, 'nameplate_p_mw'] = loads['p_mw'].values
+            net.load.loc[idx, 'nameplate_q_mvar'] = loads['q_mvar'].values
 
     def _select_pv_buses_strategy(self, net, ext_grid_buses):
         strategy = config.PV_CONTROL_STRATEGY
-        pv_buses = set()
-
-        for _, gen in self.generators.iterrows():
-            bus_id = gen['bus_id']
-            bus_idx = self.bus_mapping.get(bus_id)
-            if bus_idx is None or bus_idx in ext_grid_buses or bus_idx not in net.bus.index:
-                continue
 
-            bus_voltage = net.bus.at[bus_idx, 'vn_kv']
+        bus = self._bus_indices(self.generators['bus_id']).dropna().astype(int)
+        bus = bus[~bus.isin(ext_grid_buses) & bus.isin(net.bus.index)]
+        bus_voltage = net.bus['vn_kv'].reindex(bus.values).values
 
-            if strategy == 'mixed':
-                if bus_voltage in [220.0, 380.0]:
-                    pv_buses.add(bus_idx)
-            elif strategy == 'voltage_based':
-                if bus_voltage in config.PV_VOLTAGE_LEVELS:
-                    pv_buses.add(bus_idx)
-            elif strategy == 'all_gen_buses':
-                pv_buses.add(bus_idx)
+        if strategy == 'mixed':
+            bus = bus[np.isin(bus_voltage, [220.0, 380.0])]
+        elif strategy == 'voltage_based':
+            bus = bus[np.isin(bus_voltage, config.PV_VOLTAGE_LEVELS)]
+        elif strategy != 'all_gen_buses':
+            return set()
 
-        return pv_buses
+        return set(bus)
 
     def _add_hvdc_lines(self, net):
         # 专门处理 hvdc_projects.csv 中的项目（如 SuedLink）
@@ -399,13 +434,11 @@ class GridModeler:
             return
 
         print("  > Integrating HVDC Projects (SuedLink/SuedOstLink)...")
-        hv_buses = net.bus[net.bus.vn_kv == 380.0].copy()
-        if hv_buses.empty: return
+        if not (net.bus.vn_kv == 380.0).any(): return
+        bus_index = BusIndex(net)
 
         def find_nearest(lat, lon):
-            dists = (hv_buses['geo'].apply(lambda x: x[0]) - lat)**2 + \
-                    (hv_buses['geo'].apply(lambda x: x[1]) - lon)**2
-            return dists.idxmin()
+            return bus_index.nearest(lat, lon, min_vn_kv=380.0, max_vn_kv=380.0)[0]
 
         count = 0
         for _, row in self.hvdc_projects.iterrows():
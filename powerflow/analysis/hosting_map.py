@@ -0,0 +1,172 @@
+"""
+Hosting Map - Hosting capacity of every 220/380 kV bus of the base net in one scenario.
+A linear PTDF screen (sensitivity.py) estimates the injection each bus takes before a line hits its
+limit; only the promising or borderline buses are refined with the injection OPF (Injections.py)
+on all cores. The result is one GeoJSON point layer that the Visualizer overlays on a map.
+"""
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from . import config
+from .contingency import branch_ratings_mva
+from .sensitivity import get_sensitivities
+from .Injections import InjectionAnalyzer
+
+# max_p_mw of the virtual injection unit (Injections.py): the OPF never reports more
+VIRTUAL_UNIT_MAX_MW = 5000.0
+PTDF_MIN_FACTOR = 1e-4   # Sensitivities below this do not limit the injection
+
+
+def candidate_buses(net, voltage_levels=None):
+    """In-service buses of the given voltage levels (default STANDARD_VOLTAGE_LEVELS) that have a location."""
+    voltage_levels = config.STANDARD_VOLTAGE_LEVELS if voltage_levels is None else voltage_levels
+    bus = net.bus
+    mask = bus['vn_kv'].isin(voltage_levels) & bus['in_service'].astype(bool)
+    if 'geo' in bus.columns:
+        mask &= bus['geo'].notna()
+    return bus.index[mask]
+
+
+def screen_buses(site_base, buses, line_limits):
+    """
+    Linear estimate of the max injection (MW) at each bus: the smallest headroom / PTDF over all lines,
+    with the injection withdrawn at the slack and reactive flows kept at their pre-injection value.
+    `line_limits` is the loading limit (%) per line. Returns one row per bus, lowest estimate first.
+    """
+    model = get_sensitivities(site_base)
+    rows = np.flatnonzero(model.branches.get_level_values('et') == 'line')
+    branches = model.branches[rows]
+    lines = branches.get_level_values('element')
+
+    flows = model.branch_flows(site_base)[rows]
+    q = site_base.res_line['q_from_mvar'].reindex(lines).fillna(0.0).to_numpy() \
+        if 'q_from_mvar' in site_base.res_line.columns else np.zeros(len(lines))
+    ratings = branch_ratings_mva(site_base, branches) * line_limits.reindex(lines).fillna(np.inf).to_numpy() / 100.0
+    p_max = np.sqrt(np.maximum(ratings**2 - q**2, 0.0))
+    p_max[~np.isfinite(ratings)] = np.inf
+
+    ptdf = model.ptdf[rows][:, model.bus_positions(buses)].toarray()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Flow moves towards +p_max for positive factors and towards -p_max for negative ones
+        allowed = np.where(ptdf > PTDF_MIN_FACTOR, (p_max - flows)[:, None] / ptdf,
+                           np.where(ptdf < -PTDF_MIN_FACTOR, (p_max + flows)[:, None] / -ptdf, np.inf))
+    allowed[np.isnan(allowed)] = np.inf
+
+    frame = pd.DataFrame({'bus_id': np.asarray(buses)})
+    if len(rows) > 0:
+        worst = np.argmin(allowed, axis=0)
+        est = allowed[worst, np.arange(len(frame))]
+        frame['est_max_mw'] = np.clip(est, 0.0, VIRTUAL_UNIT_MAX_MW)
+        frame['est_limiting_line'] = np.where(est < VIRTUAL_UNIT_MAX_MW, lines[worst], -1)
+    else:
+        frame['est_max_mw'] = VIRTUAL_UNIT_MAX_MW
+        frame['est_limiting_line'] = -1
+    return frame.sort_values('est_max_mw', kind='stable').reset_index(drop=True)
+
+
+def select_refinement(screen, target_mw=None, top_k=None, band=None, max_refine=None):
+    """
+    Buses worth an OPF solve. With `target_mw`: every bus whose estimate could reach it within `band`,
+    the most borderline (estimate closest to the target) first. Otherwise the `top_k` highest estimates.
+    """
+    top_k = config.HOSTING_MAP_TOP_K if top_k is None else top_k
+    band = config.HOSTING_MAP_REFINE_BAND if band is None else band
+    max_refine = config.HOSTING_MAP_MAX_REFINE if max_refine is None else max_refine
+
+    if target_mw:
+        est = screen.set_index('bus_id')['est_max_mw']
+        promising = est[est >= (1.0 - band) * target_mw]
+        order = (promising - target_mw).abs().sort_values(kind='stable')
+        return list(order.index[:max_refine])
+    return list(screen.sort_values('est_max_mw', ascending=False, kind='stable')['bus_id'].iloc[:top_k])
+
+
+def to_geojson(frame, net, path):
+    """Writes the map table as a GeoJSON FeatureCollection of bus points (NaN -> null)."""
+    features = []
+    for record in frame.to_dict('records'):
+        lat, lon = net.bus.at[record['bus_id'], 'geo'][:2]
+        props = {k: (None if isinstance(v, float) and np.isnan(v) else v.item() if isinstance(v, np.generic) else v)
+                 for k, v in record.items()}
+        features.append({'type': 'Feature', 'geometry': {'type': 'Point', 'coordinates': [float(lon), float(lat)]},
+                         'properties': props})
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'type': 'FeatureCollection', 'features': features}, f)
+    return path
+
+
+def build_hosting_map(base_net, external_grids, scenario_name=None, target_mw=None, jobs=None, top_k=None,
+                      voltage_levels=None, output_name=None, create_map=True):
+    """
+    Hosting capacity of every candidate bus: PTDF estimate for all, injection OPF for the buses chosen by
+    select_refinement. Writes OUTPUT_DIR/HOSTING_CAPACITY_DIR/<output_name>.geojson and .csv (and a map)
+    and returns the table. 'max_mw' is the refined value where the solve held all line limits, the
+    estimate otherwise ('source': 'opf' | 'pf_search' | 'ptdf').
+    """
+    scenario_name = scenario_name or config.HOSTING_CAPACITY_SCENARIO
+    output_name = output_name or config.HOSTING_MAP_FILE
+    print(f"--- HOSTING MAP: scenario '{scenario_name}' ---")
+    t_start = time.time()
+
+    analyzer = InjectionAnalyzer(base_net, external_grids)
+    site_base = analyzer.prepare_base(scenario_name)
+    buses = candidate_buses(site_base, voltage_levels)
+    print(f"  > {len(buses)} candidate buses.")
+
+    # 1. Linear screen of every bus
+    t_screen = time.time()
+    screen = screen_buses(site_base, buses, analyzer.smart_line_limits(site_base, verbose=False))
+    print(f"  ✓ PTDF screen in {time.time() - t_screen:.2f}s "
+          f"(median estimate {screen['est_max_mw'].median():,.0f} MW)")
+
+    # 2. OPF refinement of the promising / borderline buses
+    refine = select_refinement(screen, target_mw=target_mw, top_k=top_k)
+    print(f"  > Refining {len(refine)} buses with the injection OPF...")
+    results = analyzer.evaluate_buses(site_base, refine, scenario_name, jobs=jobs)
+
+    frame = screen.merge(results.rename(columns={'max_injection_mw': 'opf_max_mw', 'duration_s': 'solve_s'}),
+                         on='bus_id', how='left')
+    frame['refined'] = frame['bus_id'].isin(refine)
+    # Results that needed the line limits dropped overstate the capacity: keep the estimate there
+    relaxed = frame['limiting_factor'].fillna('').astype(str).str.startswith('Line limits dropped')
+    use_opf = frame['converged'].eq(True) & ~relaxed
+    frame['max_mw'] = np.where(use_opf, frame['opf_max_mw'], frame['est_max_mw'])
+    frame['source'] = np.where(use_opf, frame['method'], 'ptdf')
+    frame.insert(1, 'bus_name', site_base.bus.loc[frame['bus_id'], 'name'].values)
+    frame.insert(2, 'vn_kv', site_base.bus.loc[frame['bus_id'], 'vn_kv'].values)
+    frame['scenario_used'] = scenario_name
+    frame = frame.drop(columns=['converged']).sort_values('bus_id').reset_index(drop=True)
+
+    folder = os.path.join(config.OUTPUT_DIR, config.HOSTING_CAPACITY_DIR)
+    os.makedirs(folder, exist_ok=True)
+    frame.to_csv(os.path.join(folder, f"{output_name}.csv"), index=False)
+    path = to_geojson(frame, site_base, os.path.join(folder, f"{output_name}.geojson"))
+
+    print(f"--- HOSTING MAP DONE: {len(frame)} buses, {int(use_opf.sum())} refined "
+          f"in {time.time() - t_start:.2f}s ---")
+    print(f"  ✓ Layer written to {path}")
+    if create_map:
+        from . import visualization as Visualizer
+        Visualizer.Visualizer().create_hosting_capacity_map(path, title=f"Hosting capacity - {scenario_name}")
+    return frame
+
+
+def run_hosting_map_cli(scenario_name=None, target_mw=None, jobs=None, area=None):
+    """
+    Entry point for `python -m powerflow analysis --hosting-map [TARGET_MW] [--scenarios NAME] --jobs N
+    [--area LAT LON --radius R]`. With an area, only the buses of its equivalent are mapped.
+    """
+    output_name = None
+    if area:
+        from .area_equivalent import load_area_base, area_suffix
+        base_net, external_grids = load_area_base(area)
+        output_name = config.HOSTING_MAP_FILE + area_suffix(area)
+    else:
+        from .grid_building import GridModeler
+        base_net, external_grids = GridModeler().create_base_network()
+    return build_hosting_map(base_net, external_grids, scenario_name=scenario_name, target_mw=target_mw or None,
+                             jobs=jobs, output_name=output_name)
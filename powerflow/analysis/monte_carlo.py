@@ -0,0 +1,296 @@
+"""
+Monte Carlo - Stochastic operating points instead of the hand-picked scenario library.
+Capacity factors and load scales are sampled from configurable distributions (create_scenario / BASE_CF),
+solved in parallel at a fast fidelity and reduced to per-line and per-bus percentile statistics.
+Samples are drawn in batches until the percentiles stop moving (or MONTE_CARLO_MAX_SAMPLES is reached).
+"""
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from . import config
+from .grid_building import GridModeler
+from .opf import OPFEngine
+from .scenarios import BASE_CF, create_scenario
+
+# (statistics key, result table, column)
+STAT_FIELDS = [
+    ('line_loading_percent', 'res_line', 'loading_percent'),
+    ('trafo_loading_percent', 'res_trafo', 'loading_percent'),
+    ('bus_vm_pu', 'res_bus', 'vm_pu'),
+    ('bus_va_degree', 'res_bus', 'va_degree'),
+    ('bus_lam_p', 'res_bus', 'lam_p'),
+]
+# Fields whose percentiles decide when sampling stops (tolerance in percentage points)
+CONVERGENCE_FIELDS = ('line_loading_percent', 'trafo_loading_percent')
+CONFIDENCE_Z = 1.96  # ~95% confidence interval of the percentile estimates
+# create_scenario arguments of the main variable capacity factors
+MAIN_CF_ARGS = {'solar radiant energy': 'pv', 'wind_onshore': 'w_on', 'wind_offshore': 'w_off'}
+
+DISTRIBUTION_KINDS = ('beta', 'normal', 'uniform')
+
+# Per-process state, filled once by _init_worker
+_WORKER = {}
+
+
+def _draw(rng, distribution, n):
+    kind, a, b = distribution
+    if kind == 'uniform':
+        return rng.uniform(a, b, n)
+    if kind == 'normal':
+        return rng.normal(a, b, n)
+    if kind == 'beta':
+        # Method of moments; the variance is capped just below the largest one a beta with this mean allows
+        mean = min(max(a, 1e-6), 1 - 1e-6)
+        var = min(b ** 2, 0.999 * mean * (1 - mean))
+        k = mean * (1 - mean) / var - 1
+        return rng.beta(mean * k, (1 - mean) * k, n)
+    raise ValueError(f"Unknown distribution '{kind}' (expected one of {', '.join(DISTRIBUTION_KINDS)}).")
+
+
+def check_distributions(distributions):
+    """Raises ValueError for keys that are neither a BASE_CF type nor 'load', and for unknown distributions."""
+    for key, distribution in distributions.items():
+        if key != 'load' and key not in BASE_CF:
+            raise ValueError(f"Unknown Monte Carlo key '{key}' (expected 'load' or a BASE_CF generation type).")
+        if not isinstance(distribution, (tuple, list)) or len(distribution) != 3:
+            raise ValueError(f"Distribution of '{key}' needs a (kind, a, b) tuple, got {distribution!r}.")
+        if distribution[0] not in DISTRIBUTION_KINDS:
+            raise ValueError(f"Unknown distribution '{distribution[0]}' for '{key}' "
+                             f"(expected one of {', '.join(DISTRIBUTION_KINDS)}).")
+
+
+def sample_scenarios(n, rng, distributions=None, start=0, fidelity=None):
+    """
+    Draws `n` scenario configs (create_scenario dicts named mc_<index>). Capacity factors are clipped
+    to [0, 1] and load scales to >= 0; the samples are independent across types.
+    """
+    distributions = distributions or config.MONTE_CARLO_DISTRIBUTIONS
+    check_distributions(distributions)
+    fidelity = fidelity or config.MONTE_CARLO_FIDELITY
+    draws = {key: _draw(rng, dist, n) for key, dist in distributions.items()}
+
+    scenarios = []
+    for i in range(n):
+        cfs = {key: float(np.clip(values[i], 0.0, 1.0)) for key, values in draws.items() if key != 'load'}
+        main = {arg: cfs.pop(key, BASE_CF[key]) for key, arg in MAIN_CF_ARGS.items()}
+        load = float(max(draws['load'][i], 0.0)) if 'load' in draws else 1.0
+        scen = create_scenario(f"mc_{start + i:05d}", load=load, cf_overrides=cfs, **main)
+        scen['fidelity'] = fidelity
+        scenarios.append(scen)
+    return scenarios
+
+
+def stat_axes(net):
+    """Element index of every STAT_FIELDS entry."""
+    return {key: net[res_table.replace('res_', '')].index.values for key, res_table, _ in STAT_FIELDS}
+
+
+def _init_worker(base=None, log_folder=None, record_keys=()):
+    """
+    Process pool initializer: one engine (and base-net load) per worker. `record_keys` are the sampled
+    distribution keys whose values go into each sample's summary record.
+    """
+    base_net, ext_grids = base if base is not None else GridModeler().create_base_network()
+    engine = OPFEngine(base_net, ext_grids)
+    # Samples never repeat; caching them would only evict the library results
+    engine.result_cache = None
+    _WORKER['engine'] = engine
+    _WORKER['axes'] = stat_axes(base_net)
+    _WORKER['log_file'] = os.path.join(log_folder or config.OUTPUT_DIR, f"opf_log_{os.getpid()}.txt")
+    _WORKER['record_keys'] = list(record_keys)
+
+
+def _run_sample(scen):
+    """Solves one sample inside a worker and returns its summary record and result vectors."""
+    engine = _WORKER['engine']
+    record = {'sample': scen['name'], 'converged': False, 'total_cost_eur': np.nan, 'tier': None,
+              'load_scale': scen['load_scale'], 'error': None}
+    record.update({key: scen['capacity_factors'][key] for key in _WORKER['record_keys']
+                   if key in scen['capacity_factors']})
+    values = {}
+    try:
+        net, info, converged = engine.run_scenario(scen, log_file=_WORKER['log_file'])
+        record['converged'] = bool(converged)
+        record['tier'] = info['solver'].get('tier')
+        if converged:
+            record['total_cost_eur'] = float(net.res_cost)
+            for key, res_table, col in STAT_FIELDS:
+                res = net[res_table]
+                if col in res.columns and len(res) > 0:
+                    values[key] = res[col].reindex(_WORKER['axes'][key]).to_numpy(dtype=np.float32)
+    except Exception as e:
+        record['error'] = str(e).splitlines()[0] if str(e) else type(e).__name__
+    return record, values
+
+
+class MonteCarloResult:
+    """Result vectors of all converged samples (samples x elements) plus one summary row per sample."""
+
+    def __init__(self, name, axes, capacity=256):
+        self.name = name
+        self.axes = axes
+        self.samples = {key: np.full((capacity, len(index)), np.nan, dtype=np.float32)
+                        for key, index in axes.items()}
+        self.records = []
+        self.n_converged = 0
+        self.history = []  # one row per convergence check
+
+    def add(self, record, values):
+        self.records.append(record)
+        if not record['converged']: return
+        for key, data in self.samples.items():
+            if self.n_converged == len(data):
+                grown = np.full((2 * len(data), data.shape[1]), np.nan, dtype=np.float32)
+                grown[:len(data)] = data
+                self.samples[key] = grown
+        for key, vector in values.items():
+            self.samples[key][self.n_converged] = vector
+        self.n_converged += 1
+
+    def percentiles(self, key, percentiles=None):
+        """Percentiles (rows) per element (columns) of one field over the converged samples."""
+        percentiles = percentiles or config.MONTE_CARLO_PERCENTILES
+        data = self.samples[key][:self.n_converged]
+        if len(data) == 0:
+            return np.full((len(percentiles), len(self.axes[key])), np.nan)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN columns (out-of-service elements)
+            return np.nanpercentile(data, percentiles, axis=0)
+
+    def percentile_half_width(self, key, percentiles=None, z=CONFIDENCE_Z):
+        """
+        Half-width of the distribution-free confidence interval of every percentile (rows) per element
+        (columns): the spread between the order statistics at ranks n*q -/+ z*sqrt(n*q*(1-q)).
+        Elements with missing samples are NaN.
+        """
+        percentiles = percentiles or config.MONTE_CARLO_PERCENTILES
+        data = self.samples[key][:self.n_converged]
+        n = len(data)
+        half_width = np.full((len(percentiles), data.shape[1]), np.nan)
+        complete = ~np.isnan(data).any(axis=0)
+        if n == 0 or not complete.any(): return half_width
+
+        q = np.asarray(percentiles, dtype=float) / 100.0
+        spread = z * np.sqrt(n * q * (1 - q))
+        lo = np.clip(np.floor(n * q - spread), 0, n - 1).astype(int)
+        hi = np.clip(np.ceil(n * q + spread), 0, n - 1).astype(int)
+        ordered = np.sort(data[:, complete], axis=0)
+        half_width[:, complete] = (ordered[hi] - ordered[lo]) / 2.0
+        return half_width
+
+    def statistics(self, key):
+        """Per-element table: p<q> columns, mean, max and (loading fields) the share of samples above 100%."""
+        data = self.samples[key][:self.n_converged]
+        frame = pd.DataFrame(self.percentiles(key).T, index=self.axes[key],
+                             columns=[f"p{q:g}" for q in config.MONTE_CARLO_PERCENTILES])
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            frame['mean'] = np.nanmean(data, axis=0) if len(data) else np.nan
+            frame['max'] = np.nanmax(data, axis=0) if len(data) else np.nan
+            if key.endswith('loading_percent'):
+                frame['overload_probability'] = (data > 100.0).mean(axis=0) if len(data) else np.nan
+        frame.index.name = key.split('_')[0]
+        return frame
+
+    @property
+    def summary(self):
+        return pd.DataFrame(self.records)
+
+    def save(self, folder=None):
+        """Writes <field>_stats.csv, samples.csv and convergence.csv to OUTPUT_DIR/<name>/."""
+        folder = folder or os.path.join(config.OUTPUT_DIR, self.name)
+        os.makedirs(folder, exist_ok=True)
+        for key in self.axes:
+            if len(self.axes[key]) > 0:
+                self.statistics(key).to_csv(os.path.join(folder, f"{key}_stats.csv"))
+        self.summary.to_csv(os.path.join(folder, 'samples.csv'), index=False)
+        pd.DataFrame(self.history).to_csv(os.path.join(folder, 'convergence.csv'), index=False)
+        return folder
+
+
+class MonteCarloStudy:
+    """Adaptive Monte Carlo sampling of operating points, solved on a process pool."""
+
+    def __init__(self, jobs=None, base=None, distributions=None, fidelity=None, seed=None):
+        self.jobs = max(1, jobs or os.cpu_count() or 1)
+        self.base = base  # (net, ext_grids), e.g. an area equivalent; default: the cached base net
+        self.distributions = distributions or config.MONTE_CARLO_DISTRIBUTIONS
+        check_distributions(self.distributions)
+        self.fidelity = fidelity or config.MONTE_CARLO_FIDELITY
+        self.rng = np.random.default_rng(seed)
+
+    @staticmethod
+    def _max_half_width(result):
+        """Widest percentile confidence interval (half-width) over all convergence-field elements."""
+        widths = [result.percentile_half_width(key) for key in CONVERGENCE_FIELDS if len(result.axes[key]) > 0]
+        widths = [w for w in widths if not np.isnan(w).all()]
+        return max(np.nanmax(w) for w in widths) if widths else np.nan
+
+    def run(self, name='monte_carlo', min_samples=None, max_samples=None, batch_size=None, tolerance=None,
+            on_batch=None):
+        """
+        Samples and solves batches of operating points until the confidence interval of every loading
+        percentile is narrower than +/- `tolerance` (after at least `min_samples`) or `max_samples` are drawn.
+        Statistics are rewritten after every batch; `on_batch(history_row)` is called after every check.
+        Returns a MonteCarloResult.
+        """
+        min_samples = min_samples or config.MONTE_CARLO_MIN_SAMPLES
+        max_samples = max_samples or config.MONTE_CARLO_MAX_SAMPLES
+        batch_size = batch_size or config.MONTE_CARLO_BATCH_SIZE
+        tolerance = config.MONTE_CARLO_TOLERANCE if tolerance is None else tolerance
+
+        folder = os.path.join(config.OUTPUT_DIR, name)
+        os.makedirs(folder, exist_ok=True)
+        # Worker logs are per process id; drop the ones of earlier runs
+        for f in os.listdir(folder):
+            if f.startswith('opf_log_'): os.remove(os.path.join(folder, f))
+        base = self.base
+        if base is None:
+            base = GridModeler().create_base_network()
+        result = MonteCarloResult(name, stat_axes(base[0]), min(max_samples, max(min_samples, batch_size)))
+
+        jobs = min(self.jobs, batch_size)
+        print(f"--- MONTE CARLO START: up to {max_samples} samples ({self.fidelity.upper()}) "
+              f"on {jobs} worker(s) ---")
+        t_start = time.time()
+        pool = None
+        if jobs > 1:
+            pool = ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                       initargs=(base, folder, list(self.distributions)))
+        else:
+            _init_worker(base, folder, list(self.distributions))
+
+        try:
+            drawn = 0
+            while drawn < max_samples:
+                batch = sample_scenarios(min(batch_size, max_samples - drawn), self.rng, self.distributions,
+                                         start=drawn, fidelity=self.fidelity)
+                drawn += len(batch)
+                outputs = pool.map(_run_sample, batch) if pool else map(_run_sample, batch)
+                for record, values in outputs:
+                    result.add(record, values)
+
+                half_width = self._max_half_width(result)
+                row = {'samples': drawn, 'converged_samples': result.n_converged,
+                       'max_ci_half_width': half_width, 'elapsed_s': time.time() - t_start}
+                result.history.append(row)
+                result.save(folder)
+                if on_batch: on_batch(row)
+                print(f"  > {drawn} samples ({result.n_converged} converged), "
+                      f"widest percentile interval ±{half_width:.2f} pp")
+                if drawn >= min_samples and np.isfinite(half_width) and half_width < tolerance:
+                    print(f"  ✓ Percentiles converged (all within ±{tolerance} pp).")
+                    break
+            else:
+                print("  ⚠ Sample limit reached before the percentiles converged.")
+        finally:
+            if pool: pool.shutdown()
+
+        print(f"--- MONTE CARLO DONE: {result.n_converged}/{drawn} samples converged "
+              f"in {time.time() - t_start:.2f}s, statistics in {folder} ---")
+        return result
@@ -0,0 +1,176 @@
+"""
+Multi Period - Time-series OPF driver.
+Solves a sequence of hourly scenarios in order on one engine (compiled case and costs are reused):
+storage energy is carried over, results are collected in a compact per-hour cube.
+"""
+import copy
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from . import config
+from .scenarios import BASE_CF, PRICES_STD, DEFAULT_GEN_COSTS
+
+# (cube key, result table, column)
+CUBE_FIELDS = [
+    ('bus_vm_pu', 'res_bus', 'vm_pu'),
+    ('bus_va_degree', 'res_bus', 'va_degree'),
+    ('bus_lam_p', 'res_bus', 'lam_p'),
+    ('line_loading_percent', 'res_line', 'loading_percent'),
+    ('trafo_loading_percent', 'res_trafo', 'loading_percent'),
+    ('gen_p_mw', 'res_gen', 'p_mw'),
+    ('sgen_p_mw', 'res_sgen', 'p_mw'),
+    ('storage_p_mw', 'res_storage', 'p_mw'),
+    ('ext_grid_p_mw', 'res_ext_grid', 'p_mw'),
+]
+
+
+def scenarios_from_timeseries(frame, base_scenario=None):
+    """
+    Builds hourly scenario configs from a DataFrame with one row per hour.
+    Columns named like a generation type (BASE_CF keys) are capacity factors, 'load_scale' scales
+    the load and columns named like a country (PRICES_STD keys) are border prices (c1, EUR/MWh).
+    Everything else is taken from `base_scenario`.
+    """
+    base = base_scenario or {
+        'capacity_factors': BASE_CF.copy(),
+        'generation_costs': DEFAULT_GEN_COSTS.copy(),
+        'import_costs': copy.deepcopy(PRICES_STD),
+        'load_scale': 1.0,
+        'storage_mode': 'bidirectional',
+    }
+    cf_cols = [c for c in frame.columns if c in BASE_CF]
+    price_cols = [c for c in frame.columns if c in PRICES_STD]
+
+    hours = {}
+    for label, row in zip(frame.index, frame.to_dict('records')):
+        scen = copy.deepcopy(base)
+        scen['capacity_factors'].update({c: float(row[c]) for c in cf_cols})
+        for country in price_cols:
+            c2 = scen['import_costs'].get(country, PRICES_STD['default']).get('c2', 0.01)
+            scen['import_costs'][country] = {'c1': float(row[country]), 'c2': c2}
+        if 'load_scale' in row: scen['load_scale'] = float(row['load_scale'])
+        scen['description'] = f"Hour {label}"
+        hours[str(label)] = scen
+    return hours
+
+
+class MultiPeriodResult:
+    """Per-hour result cube: arrays of shape (hours, elements) plus a per-hour summary table."""
+
+    def __init__(self, name, labels, base_net):
+        self.name = name
+        self.labels = list(labels)
+        n = len(self.labels)
+        self.axes = {}
+        self.cube = {}
+        for key, res_table, _ in CUBE_FIELDS:
+            index = base_net[res_table.replace('res_', '')].index.values
+            self.axes[key] = index
+            self.cube[key] = np.full((n, len(index)), np.nan, dtype=np.float32)
+        self.axes['storage_soc_percent'] = base_net.storage.index.values
+        self.cube['storage_soc_percent'] = np.full((n, len(base_net.storage)), np.nan, dtype=np.float32)
+        self.records = []
+
+    def record(self, t, net, info, converged, energy_mwh, soc_percent, duration_s):
+        solver = info.get('solver', {})
+        self.records.append({
+            'hour': self.labels[t],
+            'converged': bool(converged),
+            'total_cost_eur': float(net.res_cost) if converged else np.nan,
+            'total_load_mw': float(info['total_load_mw']),
+            'total_gen_mw': float(info['total_gen_mw']),
+            'storage_energy_mwh': float(energy_mwh),
+            'tier': solver.get('tier'),
+            'fallback_step': solver.get('fallback_step'),
+            'opf_iterations': solver.get('opf_iterations'),
+            'duration_s': duration_s,
+        })
+        self.cube['storage_soc_percent'][t] = soc_percent
+        if not converged: return
+
+        for key, res_table, col in CUBE_FIELDS:
+            res = net[res_table]
+            if col in res.columns and len(res) > 0:
+                self.cube[key][t] = res[col].reindex(self.axes[key]).to_numpy(dtype=np.float32)
+
+    @property
+    def summary(self):
+        return pd.DataFrame(self.records)
+
+    def to_frame(self, key):
+        """One cube field as a DataFrame (hours x element index)."""
+        return pd.DataFrame(self.cube[key], index=self.labels, columns=self.axes[key])
+
+    def save(self, folder=None):
+        """Writes cube.npz (arrays + axes) and summary.csv to OUTPUT_DIR/<name>/."""
+        folder = folder or os.path.join(config.OUTPUT_DIR, self.name)
+        os.makedirs(folder, exist_ok=True)
+        arrays = {key: arr for key, arr in self.cube.items()}
+        arrays.update({f"axis_{key}": idx for key, idx in self.axes.items()})
+        arrays['hours'] = np.array(self.labels, dtype=str)
+        np.savez_compressed(os.path.join(folder, 'cube.npz'), **arrays)
+        self.summary.to_csv(os.path.join(folder, 'summary.csv'), index=False)
+        return folder
+
+
+class MultiPeriodOPF:
+    """Chains hourly OPF runs on one OPFEngine (storage SoC carry-over)."""
+
+    def __init__(self, engine, period_h=1.0, initial_soc_percent=None):
+        self.engine = engine
+        self.period_h = period_h
+        self.initial_soc_percent = (config.MULTI_PERIOD_INITIAL_SOC_PERCENT
+                                    if initial_soc_percent is None else initial_soc_percent)
+
+    def initial_energy(self):
+        storage = self.engine.base_net.storage
+        soc = storage['soc_percent'] if 'soc_percent' in storage.columns else pd.Series(np.nan, index=storage.index)
+        soc = soc.fillna(self.initial_soc_percent)
+        return storage['max_e_mwh'].fillna(0.0) * soc / 100.0
+
+    def update_energy(self, energy, res_storage, storage):
+        """Stored energy after one period (pandapower sign: p_mw > 0 charges)."""
+        p = res_storage['p_mw'].reindex(energy.index).fillna(0.0)
+        delta = (p.clip(lower=0.0) * config.STORAGE_CHARGE_EFFICIENCY
+                 + p.clip(upper=0.0) / config.STORAGE_DISCHARGE_EFFICIENCY) * self.period_h
+        e_min = storage['min_e_mwh'].fillna(0.0) if 'min_e_mwh' in storage.columns else 0.0
+        return (energy + delta).clip(lower=e_min, upper=storage['max_e_mwh'].fillna(0.0))
+
+    def run(self, hours, name='multi_period', on_hour=None):
+        """
+        Solves `hours` ({label: scenario_config} or a list of configs) in order.
+        Returns a MultiPeriodResult; `on_hour(t, record)` is called after every hour.
+        """
+        if not isinstance(hours, dict):
+            hours = {f"h{t:04d}": scen for t, scen in enumerate(hours)}
+
+        engine = self.engine
+        storage = engine.base_net.storage
+        result = MultiPeriodResult(name, hours.keys(), engine.base_net)
+        log_file = os.path.join(config.OUTPUT_DIR, name, 'opf_log.txt')
+        os.makedirs(os.path.dirname(log_file), exist_ok=True)
+        open(log_file, 'w').close()
+
+        energy = self.initial_energy()
+
+        print(f"--- MULTI-PERIOD START: {len(hours)} periods of {self.period_h}h ---")
+        for t, (label, scen) in enumerate(hours.items()):
+            scen = dict(scen, name=f"{name}_{label}", period_h=self.period_h, storage_energy_mwh=energy)
+            soc_percent = (energy / storage['max_e_mwh'].where(storage['max_e_mwh'] > 0) * 100.0).to_numpy()
+
+            t_start = time.time()
+            net, info, converged = engine.run_scenario(scen, log_file=log_file)
+            result.record(t, net, info, converged, energy.sum(), soc_percent, time.time() - t_start)
+
+            if converged:
+                energy = self.update_energy(energy, net.res_storage, storage)
+            # Failed hour: storage stays idle, the next hour starts from the same energy
+
+            if on_hour: on_hour(t, result.records[-1])
+
+        n_ok = int(result.summary['converged'].sum()) if result.records else 0
+        print(f"--- MULTI-PERIOD DONE: {n_ok}/{len(hours)} periods converged ---")
+        return result
@@ -0,0 +1,175 @@
+"""
+Network Cache - Versioned store of built base networks.
+Entries are keyed by a content hash of the input CSVs in DATA_DIR and the build settings in
+config.NETWORK_CACHE_CONFIG_KEYS, so changed inputs are detected automatically and several variants
+(data years, voltage sets, ...) are kept side by side, evicted least recently used first.
+"""
+import hashlib
+import json
+import os
+import pickle
+import time
+
+from . import config
+from .result_cache import canonical
+
+# Files GridModeler reads from DATA_DIR (missing optional files are part of the key as well)
+INPUT_FILES = ('buses.csv', 'connections.csv', 'generators.csv', 'loads.csv', 'transformers.csv',
+               'hvdc_projects.csv', 'external_grids.csv')
+# Bump when GridModeler builds a different net from the same inputs
+BUILDER_VERSION = 2
+MANIFEST_FILE = "inputs.json"  # (size, mtime) -> digest of the input files, avoids re-hashing unchanged CSVs
+
+
+def _file_digest(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def settings_snapshot():
+    """Build-relevant config values (JSON-serializable)."""
+    settings = {key: getattr(config, key, None) for key in config.NETWORK_CACHE_CONFIG_KEYS}
+    settings['BUILDER_VERSION'] = BUILDER_VERSION
+    return canonical(settings)
+
+
+class NetworkCache:
+    """Pickled base networks in OUTPUT_DIR/NETWORK_CACHE_DIR with a JSON sidecar describing each variant."""
+
+    def __init__(self, folder=None, max_entries=None, data_dir=None):
+        self.folder = folder or os.path.join(config.OUTPUT_DIR, config.NETWORK_CACHE_DIR)
+        self.max_entries = max_entries or config.NETWORK_CACHE_MAX_ENTRIES
+        self.data_dir = data_dir or config.DATA_DIR
+        self.stats = {'hits': 0, 'misses': 0, 'stored': 0, 'evicted': 0}
+
+    def path(self, key):
+        return os.path.join(self.folder, f"{key}.pkl")
+
+    def _meta_path(self, key):
+        return os.path.join(self.folder, f"{key}.json")
+
+    def input_digests(self):
+        """{file: sha1 or None if missing} of the input CSVs; unchanged files come from the manifest."""
+        manifest_path = os.path.join(self.folder, MANIFEST_FILE)
+        try:
+            with open(manifest_path, 'r') as f: manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+
+        digests, changed = {}, False
+        for name in INPUT_FILES:
+            path = os.path.abspath(os.path.join(self.data_dir, name))
+            try:
+                st = os.stat(path)
+            except OSError:
+                digests[name] = None
+                continue
+            known = manifest.get(path)
+            if known and known[0] == st.st_size and known[1] == st.st_mtime_ns:
+                digests[name] = known[2]
+            else:
+                digests[name] = _file_digest(path)
+                manifest[path] = [st.st_size, st.st_mtime_ns, digests[name]]
+                changed = True
+
+        if changed:
+            try:
+                os.makedirs(self.folder, exist_ok=True)
+                tmp_path = f"{manifest_path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w') as f: json.dump(manifest, f)
+                os.replace(tmp_path, manifest_path)
+            except OSError:
+                pass
+        return digests
+
+    def describe(self):
+        """Inputs and settings of the variant the current DATA_DIR and config would build."""
+        return {'inputs': self.input_digests(), 'settings': settings_snapshot()}
+
+    def key(self, description=None):
+        description = description or self.describe()
+        return hashlib.sha1(json.dumps(description, sort_keys=True, default=str).encode()).hexdigest()
+
+    def contains(self, key):
+        return os.path.exists(self.path(key))
+
+    def get(self, key):
+        """Returns the stored entry or None. A hit refreshes the entry's LRU timestamp."""
+        path = self.path(key)
+        if not os.path.exists(path):
+            self.stats['misses'] += 1
+            return None
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+            os.utime(path)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError) as e:
+            print(f"  ⚠ Network cache entry {key[:12]} unreadable ({e}), rebuilding.")
+            self.stats['misses'] += 1
+            return None
+        self.stats['hits'] += 1
+        return entry
+
+    def put(self, key, entry, description):
+        """Stores a built network entry and its description."""
+        os.makedirs(self.folder, exist_ok=True)
+        # Write-then-rename so concurrent readers never see a half-written entry
+        tmp_path = f"{self.path(key)}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        meta = dict(description, key=key, data_dir=os.path.abspath(self.data_dir), created=time.time(),
+                    buses=len(entry['net'].bus))
+        with open(f"{self._meta_path(key)}.{os.getpid()}.tmp", 'w') as f:
+            json.dump(meta, f, indent=1, default=str)
+        os.replace(f"{self._meta_path(key)}.{os.getpid()}.tmp", self._meta_path(key))
+        os.replace(tmp_path, self.path(key))
+        self.stats['stored'] += 1
+        self.evict(keep=key)
+
+    def variants(self):
+        """Descriptions of the stored variants, most recently used first."""
+        metas = []
+        for f in os.listdir(self.folder) if os.path.isdir(self.folder) else []:
+            if not f.endswith('.pkl'): continue
+            key = f[:-4]
+            try:
+                with open(self._meta_path(key), 'r') as fh: meta = json.load(fh)
+                meta['last_used'] = os.stat(self.path(key)).st_mtime
+            except (OSError, ValueError):
+                meta = {'key': key, 'last_used': 0.0}
+            metas.append(meta)
+        return sorted(metas, key=lambda m: m['last_used'], reverse=True)
+
+    def stale_reason(self, description):
+        """Why the most recently used variant of the same DATA_DIR does not match `description` (None if none)."""
+        data_dir = os.path.abspath(self.data_dir)
+        previous = next((m for m in self.variants() if m.get('data_dir') == data_dir and 'inputs' in m), None)
+        if previous is None: return None
+        changed = [name for name, digest in description['inputs'].items() if previous['inputs'].get(name) != digest]
+        changed += [key for key, value in description['settings'].items()
+                    if previous.get('settings', {}).get(key) != value]
+        return ", ".join(changed) if changed else None
+
+    def remove(self, key):
+        removed = False
+        for path in (self.path(key), self._meta_path(key)):
+            try:
+                os.remove(path)
+                removed = True
+            except OSError:
+                pass
+        return removed
+
+    def evict(self, keep=None):
+        """Drops least recently used variants beyond max_entries (never `keep`)."""
+        for meta in self.variants()[self.max_entries:]:
+            if meta['key'] == keep: continue
+            if self.remove(meta['key']):
+                self.stats['evicted'] += 1
+
+    def clear(self):
+        for meta in self.variants():
+            self.remove(meta['key'])
@@ -2,51 +2,201 @@
 OPF - Manages scenario application, OPF cost/constraint setup, and power flow solving.
 ROBUST VERSION: Reverts rigid 'Must-Run' constraints to allow convergence under line limits.
 """
+import contextlib
 import copy
 import pandas as pd
 import pandapower as pp
 import numpy as np
 import warnings
 import os
-import sys
+import signal
+import threading
+import time
+import pandapower.optimal_powerflow as pp_optimal_powerflow
 from . import config
 from .scenarios import SCENARIOS
+from .compiled_case import CompiledCaseCache
+from .run_log import RunLog
+from .result_cache import ResultCache, canonical, net_fingerprint
+from .telemetry import StageTelemetry, pf_mismatch_mva
 
 # Filter warnings
 warnings.filterwarnings('ignore', message='.*numba.*')
 warnings.filterwarnings('ignore', category=FutureWarning, message='.*Downcasting.*')
 
-class OutputRedirector:
-    """Context manager to capture stdout/stderr to a file."""
-    def __init__(self, filename):
-        self.filename = filename
-        self.original_stdout_fd = sys.stdout.fileno()
-        self.original_stderr_fd = sys.stderr.fileno()
-        self.saved_stdout_fd = None
-        self.saved_stderr_fd = None
-        self.logfile = None
-
-    def __enter__(self):
-        os.makedirs(os.path.dirname(self.filename), exist_ok=True)
-        self.logfile = open(self.filename, 'w', encoding='utf-8')
-        self.saved_stdout_fd = os.dup(self.original_stdout_fd)
-        self.saved_stderr_fd = os.dup(self.original_stderr_fd)
-        sys.stdout.flush()
-        sys.stderr.flush()
-        os.dup2(self.logfile.fileno(), self.original_stdout_fd)
-        os.dup2(self.logfile.fileno(), self.original_stderr_fd)
-        
-    def __exit__(self, exc_type, exc_value, traceback):
-        sys.stdout.flush()
-        sys.stderr.flush()
-        os.dup2(self.saved_stdout_fd, self.original_stdout_fd)
-        os.dup2(self.saved_stderr_fd, self.original_stderr_fd)
-        os.close(self.saved_stdout_fd)
-        os.close(self.saved_stderr_fd)
-        if self.logfile: self.logfile.close()
+# pandapower discards the raw PIPS output (iteration count, convergence history).
+# Wrap its OPF entry point once so each thread can read back the output of its last solve.
+_solver_output = threading.local()
+
+def _opf_with_output_probe(ppci, ppopt, _opf=pp_optimal_powerflow.opf):
+    result = _opf(ppci, ppopt)
+    _solver_output.last = result.get('raw', {}).get('output', {})
+    return result
+
+if not getattr(pp_optimal_powerflow.opf, '_output_probe', False):
+    _opf_with_output_probe._output_probe = True
+    pp_optimal_powerflow.opf = _opf_with_output_probe
+
+def _final_feasibility(output):
+    """Constraint violation (PIPS 'feascond') of the last iterate, or None."""
+    hist = output.get('hist') if isinstance(output, dict) else None
+    if not hist: return None
+    return float(hist[-1].get('feascond', np.nan))
+
+class OPFTimeout(Exception):
+    """Raised when a single OPF attempt exceeds its wall-clock limit."""
+
+@contextlib.contextmanager
+def _time_limit(seconds):
+    """SIGALRM-based wall-clock limit. Signals only reach the main thread, so elsewhere
+    (e.g. Streamlit script threads) this is a no-op and only the scenario budget applies."""
+    if (not seconds or seconds <= 0 or not hasattr(signal, 'setitimer')
+            or threading.current_thread() is not threading.main_thread()):
+        yield
+        return
+
+    def _raise(signum, frame):
+        raise OPFTimeout(f"attempt exceeded {seconds:.0f}s")
+
+    previous = signal.signal(signal.SIGALRM, _raise)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+# Fallback ladder steps. Relaxing steps modify the scenario net and stay in effect for later steps.
+LADDER_STEPS = ('pf', 'flat', 'relax_voltage', 'relax_q', 'drop_line_limits')
+RELAXING_STEPS = ('relax_voltage', 'relax_q', 'drop_line_limits')
+# Bounds loosened by 'relax_voltage' and 'relax_q' (line limits are handled by _generate_line_limits)
+LADDER_BOUND_COLUMNS = {'bus': ['min_vm_pu', 'max_vm_pu'], 'gen': ['min_q_mvar', 'max_q_mvar'],
+                        'sgen': ['min_q_mvar', 'max_q_mvar'], 'storage': ['min_q_mvar', 'max_q_mvar']}
+
+# Tables a scenario run writes to (CF/limit changes, OPF costs & constraints, temporary dcline gens).
+# Everything else (trafo, dcline, geodata, std_types, ...) is shared read-only with the base net.
+SCENARIO_MUTABLE_TABLES = ('bus', 'line', 'gen', 'sgen', 'storage', 'load', 'ext_grid', 'poly_cost')
+
+def create_scenario_net(base_net, mutable_tables=SCENARIO_MUTABLE_TABLES):
+    """
+    Copy-on-write replacement for copy.deepcopy(base_net).
+    Shares the immutable topology tables with the base net and only materialises private
+    copies of the tables a scenario mutates, plus result tables and solver internals.
+    """
+    net = copy.copy(base_net)
+    for key, value in base_net.items():
+        if key in mutable_tables or key.startswith('res_'):
+            # res_cost is a scalar; nets from older code paths may carry it as a plain float
+            net[key] = value.copy() if hasattr(value, 'copy') else value
+        elif key.startswith('_') and not key.startswith('_empty_res_'):
+            # Solver internals (_ppc, _options, lookups) are replaced by pandapower on every run
+            net[key] = copy.deepcopy(value)
+    return net
+
+def apply_dispatch(net):
+    """
+    Writes a solved OPF's dispatch back as setpoints (gen/sgen/storage p_mw, DC-line transfers and the
+    voltage setpoints of all voltage-controlling elements), so a plain runpp reproduces the OPF state.
+    """
+    for et in ['gen', 'sgen', 'storage']:
+        if len(net[et]) == 0 or len(net[f'res_{et}']) == 0: continue
+        res = net[f'res_{et}'].reindex(net[et].index)
+        net[et]['p_mw'] = res['p_mw'].fillna(net[et]['p_mw'])
+    if len(net.dcline) > 0 and len(net.res_dcline) > 0:
+        net.dcline['p_mw'] = net.res_dcline['p_from_mw'].reindex(net.dcline.index).fillna(net.dcline['p_mw'])
+    # Voltage setpoints from the OPF result (consistent per bus)
+    vm = net.res_bus['vm_pu']
+    for et, bus_col, vm_col in [('gen', 'bus', 'vm_pu'), ('ext_grid', 'bus', 'vm_pu'),
+                                ('dcline', 'from_bus', 'vm_from_pu'), ('dcline', 'to_bus', 'vm_to_pu')]:
+        if len(net[et]) > 0:
+            net[et][vm_col] = vm.reindex(net[et][bus_col]).fillna(net[et][vm_col]).values
+
+# Dispatch window per unit of available power (max factor, min factor)
+STORAGE_MODE_BOUNDS = {
+    'charge_only':    (0.0, -1.0),  # Can only consume power (-Cap to 0)
+    'discharge_only': (1.0, 0.0),   # Can only generate power (0 to +Cap)
+    'bidirectional':  (1.0, -1.0),  # Can do both (-Cap to +Cap) to fix congestion
+}
+# Generators (relaxed for convergence): max = available power, min = 90% of it
+GENERATOR_BOUNDS = (1.0, 0.9)
+
+def apply_capacity_factors(df, et_type, cfs, storage_mode='bidirectional'):
+    """
+    Column-wise CF engine for a gen/sgen/storage table (modified in place).
+    Border units are left untouched. Returns {type: available MW}.
+    """
+    if len(df) == 0: return {}
+
+    # Ensure columns exist
+    if 'max_p_mw' not in df.columns: df['max_p_mw'] = df['p_mw']
+    if 'min_p_mw' not in df.columns: df['min_p_mw'] = 0.0
+
+    types = df['type'].astype(str)
+    mask = (types != 'border').values
+    if not mask.any(): return {}
+    types = types[mask]
+    rows = df.index[mask]
+
+    # Nameplate: max_p_mw, falling back to p_mw where missing or non-positive
+    max_p = df.loc[rows, 'max_p_mw']
+    install_cap = max_p.where(max_p > 0, df.loc[rows, 'p_mw'])
+
+    # Resolve each type's CF once (default 1.0), then broadcast
+    cf_by_type = {t: cfs.get(t, 1.0) for t in pd.unique(types)}
+    actual_p = install_cap * types.map(cf_by_type)
+
+    if et_type == 'storage':
+        max_factor, min_factor = STORAGE_MODE_BOUNDS.get(storage_mode, STORAGE_MODE_BOUNDS['bidirectional'])
+    else:
+        max_factor, min_factor = GENERATOR_BOUNDS
+
+    df.loc[rows, 'nameplate_p_mw'] = install_cap
+    df.loc[rows, 'p_mw'] = actual_p
+    df.loc[rows, 'max_p_mw'] = actual_p * max_factor if max_factor else 0.0
+    df.loc[rows, 'min_p_mw'] = actual_p * min_factor if min_factor else 0.0
+
+    return actual_p.groupby(types, sort=False).sum().to_dict()
+
+def apply_storage_energy_limits(df, energy_mwh, period_h=1.0):
+    """
+    Caps storage power so one period can neither over-charge nor over-drain the stored energy
+    (pandapower sign: p_mw > 0 charges). `energy_mwh` is a Series indexed like the storage table.
+    """
+    if len(df) == 0: return
+
+    e = pd.Series(energy_mwh, dtype=float).reindex(df.index).fillna(0.0)
+    e_max = df['max_e_mwh'].fillna(0.0)
+    e_min = df['min_e_mwh'].fillna(0.0) if 'min_e_mwh' in df.columns else 0.0
+
+    charge_cap = (e_max - e).clip(lower=0.0) / (period_h * config.STORAGE_CHARGE_EFFICIENCY)
+    discharge_cap = (e - e_min).clip(lower=0.0) * config.STORAGE_DISCHARGE_EFFICIENCY / period_h
+
+    df['max_p_mw'] = np.minimum(df['max_p_mw'], charge_cap)
+    df['min_p_mw'] = np.maximum(df['min_p_mw'], -discharge_cap)
+    df['p_mw'] = df['p_mw'].clip(lower=df['min_p_mw'], upper=df['max_p_mw'])
+    df['soc_percent'] = np.where(e_max > 0, e / e_max.where(e_max > 0, 1.0) * 100.0, np.nan)
+
+def _freeze(obj):
+    """Hashable, order-preserving snapshot of (nested) cost dicts, used as memoization key."""
+    if isinstance(obj, dict):
+        return tuple((k, _freeze(v)) for k, v in obj.items())
+    return obj
+
+# Scenario keys OPFEngine.resolve can re-apply in place; any other change needs a full run
+RESOLVABLE_KEYS = ('capacity_factors', 'load_scale', 'generation_costs', 'import_costs', 'storage_mode')
+
+def merge_scenario(base, delta):
+    """Deep-merges a partial scenario dict into a copy of `base` (nested dicts such as import_costs are merged)."""
+    merged = copy.deepcopy(base)
+    for key, value in delta.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_scenario(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
 
 class OPFEngine:
-    def __init__(self, base_net, external_grids):
+    def __init__(self, base_net, external_grids, fidelity=None, compiled_case=None, result_cache=None):
         self.base_net = base_net
         self.external_grids = external_grids
         self.scenarios = SCENARIOS
@@ -54,8 +204,21 @@ class OPFEngine:
         self.scenario_info = None
         self.current_scenario_name = None
         self.current_scenario_config = None
+        self._cost_cache = {}
+        self.solver_stats = {}
+        self.fidelity = fidelity or config.OPF_FIDELITY
+        # Compiled ppc per topology: each scenario only patches injections/limits/costs
+        use_compiled = config.OPF_COMPILED_CASE if compiled_case is None else compiled_case
+        self.compiled_cases = CompiledCaseCache() if use_compiled else None
+        if result_cache is None and config.RESULT_CACHE_ENABLED:
+            result_cache = ResultCache()
+        self.result_cache = result_cache
+        self._base_fingerprint = None
+        self._resolvable = False  # last scenario net holds an unrelaxed converged solution
+        self._line_limits = None  # per-line loading limits still to be generated lazily (see init_line_limits)
+        self.telemetry = StageTelemetry()
 
-    def run_scenario(self, scenario_input):
+    def run_scenario(self, scenario_input, log_file=None):
         # 1. Input Handling
         if isinstance(scenario_input, str):
             if scenario_input not in self.scenarios:
@@ -67,94 +230,178 @@ class OPFEngine:
             self.current_scenario_config = scenario_input
         else:
             raise TypeError("scenario_input must be a string or a dictionary.")
+        self.telemetry = StageTelemetry()
         
         # 2. Apply Scenario
         self.scenario_net, self.scenario_info = self._apply_scenario(self.current_scenario_config)
         
         # 3. Setup OPF (Costs & Constraints)
-        self._setup_opf_costs()
+        with self.telemetry.stage('setup_costs'):
+            self._setup_opf_costs()
         
         # 4. Solve
-        log_file = os.path.join(config.OUTPUT_DIR, self.current_scenario_name, 'opf_log.txt')
+        converged = self._solve_logged(log_file)
+        
+        return self.scenario_net, self.scenario_info, converged
+
+    def resolve(self, delta, log_file=None):
+        """
+        Re-solves the last scenario with a few parameters changed, e.g. {'capacity_factors': {'solar': 0.4}}
+        or {'import_costs': {'France': {'c1': 90}}}. Only the changed parameters are re-applied to the
+        last scenario net (no net copy or full cost rebuild), and the first OPF attempt skips the fresh PF:
+        the OPF's start PF begins at the previous solution. The OPF iterations themselves are not shortened.
+        A full scenario dict works too. Falls back to run_scenario without a usable previous solution.
+        """
+        if self.current_scenario_config is None:
+            return self.run_scenario(delta, log_file)
+
+        previous_name, previous = self.current_scenario_name, self.current_scenario_config
+        scen = merge_scenario(previous, delta)
+        scen['name'] = delta.get('name', previous_name)
+        changed = {k for k in set(previous) | set(scen)
+                   if k not in ('name', 'description') and canonical(previous.get(k)) != canonical(scen.get(k))}
+
+        unsupported = changed - set(RESOLVABLE_KEYS)
+        if not self._resolvable or unsupported:
+            reason = (f"changed {', '.join(sorted(unsupported))}" if unsupported
+                      else "no converged, unrelaxed previous solution")
+            print(f"  ⚠ Incremental re-solve not possible ({reason}). Running a full solve.")
+            return self.run_scenario(scen, log_file)
+
+        print(f"--- RE-SOLVE: '{previous_name}' -> '{scen['name']}' (changed: {', '.join(sorted(changed)) or 'nothing'}) ---")
+        self.current_scenario_name = scen['name']
+        self.current_scenario_config = scen
+        self.telemetry = StageTelemetry()
+        with self.telemetry.stage('apply_delta'):
+            self._apply_delta(previous, scen, changed)
+
+        converged = self._solve_logged(log_file, resolve_from=previous_name)
+        self.scenario_info['resolved_from'] = previous_name
+        return self.scenario_net, self.scenario_info, converged
+
+    def _apply_delta(self, previous, scen, changed):
+        """Writes the changed scenario parameters into the solved scenario net (in place)."""
+        net, info = self.scenario_net, self.scenario_info
+        cfs = scen.get('capacity_factors', {})
+        storage_mode = scen.get('storage_mode', 'bidirectional')
+
+        if 'capacity_factors' in changed or 'storage_mode' in changed:
+            old_cfs = previous.get('capacity_factors', {})
+            changed_types = {t for t in set(cfs) | set(old_cfs) if cfs.get(t, 1.0) != old_cfs.get(t, 1.0)}
+            for et in ['gen', 'sgen', 'storage']:
+                if len(net[et]) == 0: continue
+                mask = net[et]['type'].astype(str).isin(changed_types)
+                if et == 'storage' and 'storage_mode' in changed: mask[:] = True
+                if not mask.any(): continue
+
+                # Re-run the CF engine on the base rows, then copy the dispatch window back
+                rows = self.base_net[et].loc[mask.values].copy()
+                apply_capacity_factors(rows, et, cfs, storage_mode)
+                cols = [c for c in ['p_mw', 'max_p_mw', 'min_p_mw', 'nameplate_p_mw'] if c in rows.columns]
+                net[et].loc[rows.index, cols] = rows[cols]
+
+            if 'storage_energy_mwh' in scen:
+                apply_storage_energy_limits(net.storage, scen['storage_energy_mwh'], scen.get('period_h', 1.0))
+            self._apply_q_limits(net)
+
+            breakdown = {}
+            for et in ['gen', 'sgen', 'storage']:
+                df = net[et]
+                if len(df) == 0: continue
+                types = df['type'].astype(str)
+                for gen_type, mw in df.loc[(types != 'border').values, 'p_mw'].groupby(types[types != 'border']).sum().items():
+                    breakdown[gen_type] = breakdown.get(gen_type, 0) + mw
+            info['gen_by_type'] = breakdown
+            info['total_gen_mw'] = sum(breakdown.values())
+
+        if 'load_scale' in changed:
+            load_scale = scen.get('load_scale', 1.0)
+            net.load['scaling'] = load_scale
+            net.load['p_mw'] = self.base_net.load['p_mw'] * load_scale
+            net.load['q_mvar'] = self.base_net.load['q_mvar'] * load_scale
+            info['total_load_mw'] = net.load['p_mw'].sum()
+            info['load_scale'] = load_scale
+
+        if changed & {'generation_costs', 'import_costs'}:
+            self._apply_costs(net, scen)
+
+        info['name'] = self.current_scenario_name
+        info['description'] = scen.get('description', '')
+
+    def _solve_logged(self, log_file=None, resolve_from=None):
+        """Solves the current scenario net inside its run log and stores the solver record in scenario_info."""
+        # A shared log_file (e.g. one per multi-period study) is appended to instead of overwritten
+        log_mode = 'a' if log_file else 'w'
+        log_file = log_file or os.path.join(config.OUTPUT_DIR, self.current_scenario_name, 'opf_log.txt')
         try:
-            with OutputRedirector(log_file):
-                converged = self._solve_opf()
+            with RunLog(log_file, self.current_scenario_name, mode=log_mode) as run_log:
+                converged = self._solve_or_restore(resolve_from)
+                run_log.write_summary(converged, self.solver_stats)
         except Exception as e:
             print(f"Log redirect warning: {e}")
-            converged = self._solve_opf()
-        
-        return self.scenario_net, self.scenario_info, converged
+            converged = self._solve_or_restore(resolve_from)
+
+        self.scenario_info['solver'] = self.solver_stats
+        self.scenario_info['telemetry'] = self.telemetry
+        self._resolvable = bool(converged) and not self.solver_stats.get('relaxations')
+        return converged
+
+    def _solve_or_restore(self, resolve_from=None):
+        """Serves identical reruns from the result cache, solves and stores everything else."""
+        if self.result_cache is None:
+            return self._solve_opf(resolve_from)
+
+        if self._base_fingerprint is None:
+            self._base_fingerprint = net_fingerprint(self.base_net)
+        key = self.result_cache.key(self.current_scenario_config, self._base_fingerprint, self.fidelity)
+
+        with self.telemetry.stage('result_cache_lookup'):
+            cached = self.result_cache.get(key)
+        if cached is not None:
+            net = self.scenario_net
+            for table, df in cached['tables'].items():
+                net[table] = df.copy()
+            # Same scalar type runopp leaves behind, so a restored net is copied like a solved one
+            net['res_cost'] = np.float64(cached['res_cost'])
+            net['OPF_converged'] = True
+            self.solver_stats = dict(cached['solver'], cached=True)
+            print(f"  ✓ Result cache hit ({key[:12]}), OPF skipped. Cost: {net.res_cost:,.2f} EUR")
+            return True
+
+        converged = self._solve_opf(resolve_from)
+        # Timed-out attempts depend on machine load, so those results are not reproducible
+        timed_out = any(a['status'] == 'timeout' for a in self.solver_stats.get('attempts', []))
+        if converged and not timed_out:
+            try:
+                with self.telemetry.stage('result_cache_store'):
+                    self.result_cache.put(key, self.scenario_net, self.scenario_info, self.solver_stats)
+            except OSError as e:
+                print(f"  ⚠ Result cache write failed: {e}")
+        return converged
 
     def _apply_scenario(self, scenario_data):
-        net = copy.deepcopy(self.base_net)
+        with self.telemetry.stage('copy_net'):
+            net = create_scenario_net(self.base_net)
+        with self.telemetry.stage('apply_scenario'):
+            return self._apply_scenario_data(net, scenario_data)
+
+    def _apply_scenario_data(self, net, scenario_data):
         cfs = scenario_data.get('capacity_factors', {})
         load_scale = scenario_data.get('load_scale', 1.0)
         
         # Get Storage Mode (default to bidirectional if missing)
         storage_mode = scenario_data.get('storage_mode', 'bidirectional')
         
+        # Apply CFs (column-wise, see apply_capacity_factors)
         total_gen_breakdown = {}
+        for et in ['gen', 'sgen', 'storage']:
+            for gen_type, mw in apply_capacity_factors(net[et], et, cfs, storage_mode).items():
+                total_gen_breakdown[gen_type] = total_gen_breakdown.get(gen_type, 0) + mw
 
-        # Apply CFs
-        def apply_cf_to_table(df, et_type):
-            if len(df) == 0: return
-            
-            # Ensure columns exist
-            if 'max_p_mw' not in df.columns: df['max_p_mw'] = df['p_mw']
-            if 'min_p_mw' not in df.columns: df['min_p_mw'] = 0.0
-            
-            for idx in df.index:
-                # Border generators handled separately
-                if str(df.at[idx, 'type']) == 'border': continue
-
-                # Determine Nameplate
-                install_cap = df.at[idx, 'max_p_mw']
-                if pd.isna(install_cap) or install_cap <= 0:
-                    install_cap = df.at[idx, 'p_mw']
-                
-                # Store Nameplate Capacity before modification
-                df.at[idx, 'nameplate_p_mw'] = install_cap
-
-                gen_type = str(df.at[idx, 'type'])
-                cf = cfs.get(gen_type, 1.0) # Default to 1.0
-                
-                actual_p = install_cap * cf
-                
-                # Update P value for display/init
-                df.at[idx, 'p_mw'] = actual_p
-                
-                # --- Update Limits & Flexibility ---
-                if et_type == 'storage':
-                    # STORAGE LOGIC based on MODE
-                    if storage_mode == 'charge_only':
-                        # Can only consume power (-Cap to 0)
-                        df.at[idx, 'max_p_mw'] = 0.0
-                        df.at[idx, 'min_p_mw'] = -actual_p
-                    
-                    elif storage_mode == 'discharge_only':
-                        # Can only generate power (0 to +Cap)
-                        df.at[idx, 'max_p_mw'] = actual_p
-                        df.at[idx, 'min_p_mw'] = 0.0
-                    
-                    else: # 'bidirectional' (default)
-                        # Can do both (-Cap to +Cap) to fix congestion
-                        df.at[idx, 'max_p_mw'] = actual_p
-                        df.at[idx, 'min_p_mw'] = -actual_p
-
-                else:
-                    # GENERATOR LOGIC (Relaxed for Convergence):
-                    # Set max to available power (CF * Cap)
-                    df.at[idx, 'max_p_mw'] = actual_p
-                    # Set min to 80% of actual_p to allow flexibility
-                    df.at[idx, 'min_p_mw'] = 0.9 * actual_p 
-
-                # Track Stats
-                if gen_type not in total_gen_breakdown: total_gen_breakdown[gen_type] = 0
-                total_gen_breakdown[gen_type] += actual_p
-
-        apply_cf_to_table(net.gen, 'gen')
-        apply_cf_to_table(net.sgen, 'sgen')
-        apply_cf_to_table(net.storage, 'storage')
+        # Storage energy carried over from the previous period (multi-period runs)
+        if 'storage_energy_mwh' in scenario_data:
+            apply_storage_energy_limits(net.storage, scenario_data['storage_energy_mwh'],
+                                        scenario_data.get('period_h', 1.0))
         
         # Load Scaling
         net.load['scaling'] = load_scale
@@ -186,21 +433,93 @@ class OPFEngine:
         net.bus['max_vm_pu'] = config.BUS_MAX_VM_PU
         
         # --- 2. Q Constraints ---
-        
+        self._apply_q_limits(net)
+
+        # --- 3. Line Limits ---
+        self.init_line_limits(net)
+
+        # --- 4. Cost Application (Dynamic from Scenario) ---
+        self._apply_costs(net, scen)
+
+    def init_line_limits(self, net, enforce=None, limits=None, always=()):
+        """
+        Line loading limits (max_loading_percent) of the scenario net. `limits` is a per-line Series
+        (default MAX_LINE_LOADING_PERCENT); lines in `always` start constrained.
+        In 'lazy' mode (config.LINE_LIMIT_MODE) only lines already near their limit in the net's current
+        result (previous solution or a PF) start constrained, the rest follow in _generate_line_limits.
+        """
+        enforce = config.ENFORCE_LINE_LIMITS if enforce is None else enforce
+        self._line_limits = None
+        if not enforce or len(net.line) == 0: return
+        if limits is None:
+            limits = pd.Series(float(config.MAX_LINE_LOADING_PERCENT), index=net.line.index)
+
+        if config.LINE_LIMIT_MODE == 'all':
+            net.line['max_loading_percent'] = limits
+            return
+        if config.LINE_LIMIT_MODE != 'lazy':
+            raise ValueError(f"Unknown LINE_LIMIT_MODE '{config.LINE_LIMIT_MODE}' (expected 'all' or 'lazy').")
+
+        self._line_limits = limits
+        seed = self._lines_near_limit(net, limits) | net.line.index.isin(list(always))
+        # max_loading_percent 0 -> RATE_A 0 -> line is unconstrained
+        net.line['max_loading_percent'] = np.where(seed, limits, 0.0)
+        print(f"  > Lazy line limits: starting with {int(seed.sum())} of {len(net.line)} lines constrained.")
+
+    def _lines_near_limit(self, net, limits):
+        if 'loading_percent' not in net.res_line.columns:
+            return np.zeros(len(net.line), dtype=bool)
+        loading = net.res_line['loading_percent'].reindex(net.line.index)
+        return (loading >= limits * config.LAZY_LINE_LIMIT_ADD_PERCENT / 100.0).fillna(False).to_numpy()
+
+    def _generate_line_limits(self, stats, resolve, resolve_all):
+        """
+        Constraint generation for lazy line limits: while the solution overloads unconstrained lines,
+        constrains them (and all lines above LAZY_LINE_LIMIT_ADD_PERCENT) and calls `resolve()`.
+        Falls back to `resolve_all()` with every limit enforced if a round fails or MAX_ROUNDS is exceeded.
+        A converged result is feasible for all limits, i.e. the optimum of the fully constrained problem,
+        unless the fallback itself had to drop the line limits (recorded in stats['relaxations']).
+        """
+        limits = self._line_limits
+        if limits is None or 'drop_line_limits' in stats['relaxations']:
+            return True
+        net = self.scenario_net
+        stats['line_limit_rounds'] = stats['line_limit_rounds'] or 0
+
+        for _ in range(config.LAZY_LINE_LIMIT_MAX_ROUNDS + 1):
+            loading = net.res_line['loading_percent'].reindex(net.line.index)
+            unconstrained = net.line['max_loading_percent'].fillna(0.0) <= 0
+            violated = unconstrained & (loading > limits + config.LAZY_LINE_LIMIT_TOLERANCE_PERCENT)
+            stats['constrained_lines'] = int((~unconstrained).sum())
+            if not violated.any():
+                print(f"  ✓ Line limits hold with {stats['constrained_lines']} of {len(net.line)} lines constrained.")
+                return True
+            if stats['line_limit_rounds'] >= config.LAZY_LINE_LIMIT_MAX_ROUNDS:
+                break
+
+            added = unconstrained & pd.Series(self._lines_near_limit(net, limits), index=net.line.index)
+            net.line.loc[added, 'max_loading_percent'] = limits[added]
+            stats['line_limit_rounds'] += 1
+            print(f"  > Line limit round {stats['line_limit_rounds']}: {int(violated.sum())} overloaded lines, "
+                  f"constraining {int(added.sum())} more.")
+            if not resolve():
+                break
+
+        print("  ⚠ Lazy line limits did not settle. Enforcing all line limits.")
+        net.line['max_loading_percent'] = limits
+        stats['constrained_lines'] = len(net.line)
+        return resolve_all()
+
+    def _apply_q_limits(self, net):
+        """Reactive power limits derived from the (CF-scaled) active power of gen/sgen/storage."""
         # A. Generators
         if len(net.gen) > 0:
-            if 'min_q_mvar' not in net.gen.columns: net.gen['min_q_mvar'] = np.nan
-            if 'max_q_mvar' not in net.gen.columns: net.gen['max_q_mvar'] = np.nan
-            
-            for idx, gen in net.gen.iterrows():
-                if str(gen['type']) == 'border':
-                    q_limit = gen['sn_mva'] * 0.6 if pd.notna(gen['sn_mva']) else 9999
-                    net.gen.at[idx, 'min_q_mvar'] = -q_limit
-                    net.gen.at[idx, 'max_q_mvar'] = q_limit
-                else:
-                    sn = gen['sn_mva'] if pd.notna(gen['sn_mva']) else gen['p_mw'] / 0.9
-                    net.gen.at[idx, 'min_q_mvar'] = sn * config.GEN_MIN_Q_RATIO * 0.8
-                    net.gen.at[idx, 'max_q_mvar'] = sn * config.GEN_MAX_Q_RATIO
+            is_border = (net.gen['type'].astype(str) == 'border').values
+            sn = net.gen['sn_mva']
+            border_q = np.where(sn.notna(), sn * 0.6, 9999)
+            gen_sn = sn.fillna(net.gen['p_mw'] / 0.9)
+            net.gen['min_q_mvar'] = np.where(is_border, -border_q, gen_sn * config.GEN_MIN_Q_RATIO * 0.8)
+            net.gen['max_q_mvar'] = np.where(is_border, border_q, gen_sn * config.GEN_MAX_Q_RATIO)
 
         # B. Static Generators
         if len(net.sgen) > 0:
@@ -214,15 +533,8 @@ class OPFEngine:
             net.storage['min_q_mvar'] = -net.storage['sn_mva'] * storage_q_ratio
             net.storage['max_q_mvar'] = net.storage['sn_mva'] * storage_q_ratio
 
-        # --- 3. Line Limits ---
-        if config.ENFORCE_LINE_LIMITS and len(net.line) > 0:
-            net.line['max_loading_percent'] = config.MAX_LINE_LOADING_PERCENT
-
-        # --- 4. Cost Application (Dynamic from Scenario) ---
-        
-        # Clear existing poly costs
-        net.poly_cost.drop(net.poly_cost.index, inplace=True)
-
+    def _apply_costs(self, net, scen):
+        """Builds the poly_cost table from the scenario's generation and import costs."""
         # Prepare Cost Dicts
         active_gen_costs = config.GENERATION_COSTS.copy()
         if 'generation_costs' in scen: active_gen_costs.update(scen['generation_costs'])
@@ -231,49 +543,89 @@ class OPFEngine:
         if 'import_costs' in scen: active_import_costs.update(scen['import_costs'])
         
         default_cost_c1 = active_gen_costs.get('default', 50)
-        
+
+        # Replace existing poly costs with one table built in a single pass
+        net.poly_cost = self._build_poly_cost_table(net, active_gen_costs, active_import_costs, default_cost_c1)
+
+    def _build_poly_cost_table(self, net, gen_costs, import_costs, default_cost_c1):
+        """
+        Vectorized poly_cost builder: one row per in-service gen/sgen/storage, dcline and ext_grid
+        (in that order). Type and border-country costs are resolved once per unique value.
+        """
+        parts = []
+
+        def add_part(index, et, c1, c2):
+            parts.append(pd.DataFrame({'element': index, 'et': et, 'cp1_eur_per_mw': c1, 'cp2_eur_per_mw2': c2}))
+
         for et in ['gen', 'sgen', 'storage']:
-            if len(net[et]) > 0:
-                for idx, element in net[et].iterrows():
-                    # [CRITICAL] Check if in_service to prevent IndexErrors
-                    if not element.get('in_service', True): continue
-
-                    gen_type = str(element['type']).lower().strip()
-                    
-                    if gen_type == 'border':
-                        country = element['name'].replace('Border_', '')
-                        params = active_import_costs.get('default', {'c1':0, 'c2':0.02})
-                        for k, v in active_import_costs.items():
-                            if k in country:
-                                params = v
-                                break
-                        pp.create_poly_cost(net, element=idx, et=et, 
-                                            cp0_eur=0, cp1_eur_per_mw=params['c1'], cp2_eur_per_mw2=params.get('c2', 0.001))
-                                            
-                    elif et == 'storage':
-                        s_params = config.STORAGE_COST_PARAMS
-                        pp.create_poly_cost(net, element=idx, et=et, 
-                                            cp0_eur=0, cp1_eur_per_mw=s_params['c1'], cp2_eur_per_mw2=s_params['c2'])
-                    else:
-                        cost = self._match_generation_cost(gen_type, active_gen_costs, default_cost_c1)
-                        pp.create_poly_cost(net, element=idx, et=et, cp1_eur_per_mw=cost)
-        
+            df = net[et]
+            if len(df) == 0: continue
+            # [CRITICAL] Only in_service elements, to prevent IndexErrors
+            if 'in_service' in df.columns: df = df[df['in_service'].fillna(True).astype(bool)]
+            if len(df) == 0: continue
+
+            gen_types = df['type'].astype(str).str.lower().str.strip()
+            is_border = (gen_types == 'border').values
+            c1 = np.zeros(len(df))
+            c2 = np.zeros(len(df))
+
+            if is_border.any():
+                countries = df['name'][is_border].astype(str).str.replace('Border_', '', regex=False)
+                resolved = self._resolve_import_costs(pd.unique(countries), import_costs)
+                c1[is_border] = countries.map(lambda c: resolved[c][0]).values
+                c2[is_border] = countries.map(lambda c: resolved[c][1]).values
+
+            if et == 'storage':
+                s_params = config.STORAGE_COST_PARAMS
+                c1[~is_border] = s_params['c1']
+                c2[~is_border] = s_params['c2']
+            elif (~is_border).any():
+                domestic = gen_types[~is_border]
+                resolved = self._resolve_generation_costs(pd.unique(domestic), gen_costs, default_cost_c1)
+                c1[~is_border] = domestic.map(resolved).values
+
+            add_part(df.index.values, et, c1, c2)
+
         # DCLines Cost - [CRITICAL] Check in_service
         if len(net.dcline) > 0:
-            for idx, dcl in net.dcline.iterrows():
-                if dcl.get('in_service', True):
-                    pp.create_poly_cost(net, element=idx, et='dcline', cp1_eur_per_mw=1.0)
-                
+            dcl = net.dcline
+            if 'in_service' in dcl.columns: dcl = dcl[dcl['in_service'].fillna(True).astype(bool)]
+            add_part(dcl.index.values, 'dcline', 1.0, 0.0)
+
         # Main Slack (External Grid) - Make it Controllable!
         net.ext_grid['controllable'] = True
         slack_params = config.MAIN_SLACK_PARAMS 
         c1_slack = slack_params.get('c1', 1000) if slack_params else 1000
         c2_slack = slack_params.get('c2', 0.1) if slack_params else 0.1
-        
-        for idx in net.ext_grid.index:
-             if net.ext_grid.at[idx, 'in_service']:
-                pp.create_poly_cost(net, element=idx, et='ext_grid', 
-                                    cp0_eur=0, cp1_eur_per_mw=c1_slack, cp2_eur_per_mw2=c2_slack)     
+        eg = net.ext_grid[net.ext_grid['in_service'].fillna(True).astype(bool)]
+        add_part(eg.index.values, 'ext_grid', c1_slack, c2_slack)
+
+        template = net.poly_cost
+        poly_cost = pd.concat(parts, ignore_index=True) if parts else template.iloc[0:0].copy()
+        for col in ['cp0_eur', 'cq0_eur', 'cq1_eur_per_mvar', 'cq2_eur_per_mvar2']:
+            poly_cost[col] = 0.0
+        return poly_cost[template.columns].astype(template.dtypes.to_dict())
+
+    def _resolve_generation_costs(self, gen_types, cost_dict, default_val):
+        """Memoized type -> c1 lookup; fuzzy matching runs once per (type, cost table)."""
+        cache = self._cost_cache.setdefault(('gen', _freeze(cost_dict), default_val), {})
+        for gen_type in gen_types:
+            if gen_type not in cache:
+                cache[gen_type] = self._match_generation_cost(gen_type, cost_dict, default_val)
+        return cache
+
+    def _resolve_import_costs(self, countries, cost_dict):
+        """Memoized border country -> (c1, c2) lookup (first import cost key contained in the name)."""
+        cache = self._cost_cache.setdefault(('import', _freeze(cost_dict)), {})
+        for country in countries:
+            if country in cache: continue
+            params = cost_dict.get('default', {'c1':0, 'c2':0.02})
+            for k, v in cost_dict.items():
+                if k in country:
+                    params = v
+                    break
+            cache[country] = (params['c1'], params.get('c2', 0.001))
+        return cache
 
     def _match_generation_cost(self, gen_type, cost_dict, default_val):
         gen_type_clean = gen_type.replace('_', ' ').replace('-', ' ')
@@ -284,18 +636,19 @@ class OPFEngine:
             if key_clean in gen_type_clean or gen_type_clean in key_clean: return cost_dict[key]
         return default_val
 
-    def _solve_opf(self):
+    def _solve_opf(self, resolve_from=None):
+        """
+        Solves the scenario net at the requested fidelity:
+        'ac' runs the full AC OPF, 'dc' only the DC OPF, and 'auto' screens with the DC OPF
+        and escalates to AC when the DC result is close to the configured limits.
+        `resolve_from` names the scenario whose solution the net's res_* tables still hold (see resolve).
+        """
         net = self.scenario_net
-        
-        # Warm Start Logic
-        print("--- WARM START: Calculating initial power flow (PF) ---")
-        try:
-            pp.runpp(net, algorithm='nr', max_iteration=20, numba=False)
-            init_mode = 'results'
-            print("  ✓ PF Warm Start successful.")
-        except:
-            print("  ⚠ PF initialization failed. Using FLAT start.")
-            init_mode = 'flat'
+        stats = {'tier': None, 'escalation_reason': None, 'dc_iterations': None,
+                 'pf_iterations': 0, 'opf_iterations': None,
+                 'attempts': [], 'relaxations': [], 'fallback_step': None,
+                 'line_limit_rounds': None, 'constrained_lines': None}
+        self.solver_stats = stats
 
         # [FIXED] Safe fillna for numeric columns only to prevent FutureWarning
         for element in [net.gen, net.sgen]:
@@ -306,20 +659,281 @@ class OPFEngine:
             p_cols = net.poly_cost.select_dtypes(include=[np.number]).columns
             net.poly_cost[p_cols] = net.poly_cost[p_cols].fillna(0.0)
 
+        fidelity = self._get_fidelity()
+        if fidelity in ('dc', 'auto'):
+            dc_converged = self._run_dc_opf(stats)
+            if dc_converged:
+                dc_resolve = lambda: self._run_dc_opf(stats)
+                dc_converged = self._generate_line_limits(stats, dc_resolve, dc_resolve)
+            if fidelity == 'dc':
+                stats['tier'] = 'dc'
+                return dc_converged
+
+            reason = self._dc_escalation_reason() if dc_converged else "DC OPF did not converge"
+            if reason is None:
+                print("  ✓ DC screening result is clear of limits. Skipping AC refinement.")
+                stats['tier'] = 'dc'
+                return True
+            print(f"  > Escalating to AC OPF: {reason}")
+            stats['escalation_reason'] = reason
+
+        stats['tier'] = 'ac'
+        return self._solve_ac_opf(stats, resolve_from)
+
+    def _get_fidelity(self):
+        scen = self.current_scenario_config or {}
+        fidelity = scen.get('fidelity', self.fidelity)
+        if fidelity not in ('ac', 'dc', 'auto'):
+            raise ValueError(f"Unknown OPF fidelity '{fidelity}' (expected 'ac', 'dc' or 'auto').")
+        return fidelity
+
+    def _run_dc_opf(self, stats):
+        net = self.scenario_net
+        _solver_output.last = {}
+        with self.telemetry.stage('dc_opf') as stage:
+            try:
+                print("--- DC OPF START (screening tier) ---")
+                pp.rundcopp(net, suppress_warnings=True)
+                converged = bool(net.get('OPF_converged', False))
+                print("--- DC SOLVER CONVERGED ---" if converged else "--- DC SOLVER FAILED TO CONVERGE ---")
+            except Exception as e:
+                print(f"DC OPF EXCEPTION: {e}")
+                converged = False
+            stats['dc_iterations'] = stage['iterations'] = _solver_output.last.get('iterations')
+            stage['mismatch'] = _final_feasibility(_solver_output.last)
+        return converged
+
+    def _dc_escalation_reason(self):
+        """Returns why the DC result needs AC refinement, or None if it is clear of all thresholds."""
+        net = self.scenario_net
+        for et in ['line', 'trafo']:
+            res = net[f'res_{et}']
+            if len(res) > 0 and 'loading_percent' in res.columns:
+                max_loading = res['loading_percent'].max()
+                if max_loading >= config.DC_ESCALATION_LOADING_PERCENT:
+                    return f"{et} loading {max_loading:.1f}% >= {config.DC_ESCALATION_LOADING_PERCENT}%"
+
+        # DC has flat voltage magnitudes; wide angle spreads across lines flag voltage/stability stress
+        if len(net.line) > 0 and len(net.res_bus) > 0:
+            va = net.res_bus['va_degree']
+            d_theta = va.reindex(net.line['from_bus']).values - va.reindex(net.line['to_bus']).values
+            max_d_theta = np.nanmax(np.abs(d_theta)) if len(d_theta) else 0.0
+            if max_d_theta >= config.DC_ESCALATION_ANGLE_DEGREE:
+                return f"line angle spread {max_d_theta:.1f}° >= {config.DC_ESCALATION_ANGLE_DEGREE}°"
+        return None
+
+    def _solve_ac_opf(self, stats, resolve_from=None):
+        """
+        Walks the fallback ladder (config.OPF_FALLBACK_LADDER) until one attempt converges.
+        Each attempt gets its own wall-clock limit; the whole ladder shares the scenario budget.
+        """
+        stats['attempts'] = []
+        stats['relaxations'] = []
+        stats['fallback_step'] = None
+        t_start = time.time()
+        bounds = self._ladder_bounds()
+        converged = self._run_ladder(stats, t_start, resolve_from)
+        if converged:
+            # Lazy line limits: each round is a full OPF with the overloaded lines constrained,
+            # started from a PF seeded with the previous round's voltages
+            converged = self._generate_line_limits(
+                stats, lambda: self._attempt('line_limits', 'results', stats, t_start),
+                lambda: self._rerun_ladder(bounds, stats, t_start))
+
+        if converged and stats['relaxations']:
+            print(f"  ⚠ Converged only with relaxed constraints: {', '.join(stats['relaxations'])}")
+        return converged
+
+    def _run_ladder(self, stats, t_start, resolve_from=None):
+        """Runs the ladder steps in order until one converges; records the step in stats['fallback_step']."""
+        ladder = list(config.OPF_FALLBACK_LADDER)
+        for step in ladder:
+            if step not in LADDER_STEPS:
+                raise ValueError(f"Unknown OPF fallback step '{step}' (expected one of {LADDER_STEPS}).")
+
+        converged = False
+        for i, step in enumerate(ladder):
+            remaining = config.OPF_SCENARIO_BUDGET_S - (time.time() - t_start)
+            if remaining <= 0:
+                print(f"  ⚠ Scenario budget of {config.OPF_SCENARIO_BUDGET_S}s exhausted. "
+                      f"Skipping: {', '.join(ladder[i:])}")
+                for skipped in ladder[i:]:
+                    stats['attempts'].append({'step': skipped, 'init': None, 'status': 'skipped',
+                                              'duration_s': 0.0, 'opf_iterations': None})
+                break
+
+            if i > 0: print(f"--- FALLBACK: Step '{step}' ({remaining:.0f}s of budget left) ---")
+            if step in RELAXING_STEPS:
+                self._relax_constraints(step)
+                stats['relaxations'].append(step)
+
+            if step == 'pf':
+                converged = self._first_attempts(stats, t_start, resolve_from)
+            else:
+                converged = self._attempt(step, 'flat', stats, t_start)
+
+            if converged:
+                stats['fallback_step'] = step
+                break
+        return converged
+
+    def _ladder_bounds(self):
+        """Copies of the bounds the relaxing ladder steps loosen (see _relax_constraints)."""
+        net = self.scenario_net
+        bounds = {}
+        for et, cols in LADDER_BOUND_COLUMNS.items():
+            if len(net[et]) > 0 and set(cols) <= set(net[et].columns):
+                bounds[et] = net[et][cols].copy()
+        return bounds
+
+    def _rerun_ladder(self, bounds, stats, t_start):
+        """Runs the ladder again from the pre-ladder bounds, so relaxations are not applied twice."""
+        net = self.scenario_net
+        for et, df in bounds.items():
+            net[et][df.columns] = df
+        stats['relaxations'] = []
+        stats['fallback_step'] = None
+        return self._run_ladder(stats, t_start)
+
+    def _first_attempts(self, stats, t_start, resolve_from=None):
+        """
+        'pf' step: OPF started from a power flow (PIPS init='pf') after a fresh NR PF on the scenario net.
+        A re-solve (see resolve) skips the fresh PF: the OPF's own PF starts from the previous result tables
+        instead and converges to the same start point, so a failed re-solve goes on with the ladder.
+        """
+        if resolve_from is not None:
+            print(f"--- RE-SOLVE: '{resolve_from}' without a fresh PF ---")
+            return self._attempt('pf', 'results', stats, t_start)
+
+        return self._attempt('pf', 'pf', stats, t_start)
+
+    def _attempt(self, step, init, stats, t_start):
+        """Runs one OPF attempt under its own time limit and records its outcome."""
+        remaining = config.OPF_SCENARIO_BUDGET_S - (time.time() - t_start)
+        timeout = min(config.OPF_ATTEMPT_TIMEOUT_S, remaining)
+        record = {'step': step, 'init': init, 'status': 'failed', 'duration_s': 0.0, 'opf_iterations': None}
+        stats['opf_iterations'] = None
+
+        t_attempt = time.time()
+        try:
+            with _time_limit(timeout):
+                if init == 'pf':
+                    init_mode = self._pf_start(stats)
+                elif init == 'results':
+                    # PIPS ignores init='results': start from a PF seeded with the voltages in res_bus
+                    init_mode = 'pf'
+                else:
+                    init_mode = init
+                if self._run_opf(init_mode, stats, stage_name=f"opf_{step}"):
+                    record['status'] = 'converged'
+        except OPFTimeout as e:
+            print(f"  ⚠ OPF attempt '{step}' timed out: {e}")
+            record['status'] = 'timeout'
+
+        record['duration_s'] = time.time() - t_attempt
+        record['opf_iterations'] = stats['opf_iterations']
+        stats['attempts'].append(record)
+        return record['status'] == 'converged'
+
+    def _relax_constraints(self, step):
+        """Loosens one class of OPF constraints on the scenario net (cumulative across steps)."""
+        net = self.scenario_net
+        if step == 'relax_voltage':
+            net.bus['min_vm_pu'], net.bus['max_vm_pu'] = config.OPF_RELAXED_VM_PU
+        elif step == 'relax_q':
+            for et in ['gen', 'sgen', 'storage']:
+                if len(net[et]) > 0 and 'max_q_mvar' in net[et].columns:
+                    net[et]['min_q_mvar'] *= config.OPF_RELAXED_Q_FACTOR
+                    net[et]['max_q_mvar'] *= config.OPF_RELAXED_Q_FACTOR
+        elif step == 'drop_line_limits':
+            # max_loading_percent 0 -> RATE_A 0 -> branch is unconstrained
+            for et in ['line', 'trafo']:
+                if len(net[et]) > 0:
+                    # trafo is shared with the base net (create_scenario_net): copy before writing
+                    if et not in SCENARIO_MUTABLE_TABLES:
+                        net[et] = net[et].copy()
+                    net[et]['max_loading_percent'] = 0.0
+        print(f"  > Relaxed constraints: {step}")
+
+    def _pf_start(self, stats):
+        """Fresh Newton-Raphson PF for the OPF start point; returns 'pf', or 'flat' if the PF diverges."""
+        net = self.scenario_net
+        print("--- PF START: Calculating initial power flow (PF) ---")
+        with self.telemetry.stage('pf_start') as stage:
+            try:
+                pp.runpp(net, algorithm='nr', max_iteration=20, numba=False)
+                stats['pf_iterations'] = stage['iterations'] = int(net._ppc.get('iterations', 0) or 0)
+                stage['mismatch'] = pf_mismatch_mva(net._ppc)
+                print("  ✓ PF start successful.")
+                return 'pf'
+            except OPFTimeout:
+                raise
+            except Exception:
+                print("  ⚠ PF initialization failed. Using FLAT start.")
+                stats['pf_iterations'] = stage['iterations'] = 20  # max_iteration exhausted
+                return 'flat'
+
+    def seed_report(self, seed_net):
+        """
+        PF and OPF iteration counts of the last scenario solved twice with init='pf': from a flat PF start
+        ('unseeded') and from the bus voltages in `seed_net.res_bus`, e.g. a solved neighbour scenario
+        ('seeded'). Solves copies through the compiled case; the scenario net is left as it is.
+        """
+        cases = self.compiled_cases or CompiledCaseCache()
+        report = {}
+        for label, res_bus in [('unseeded', self.scenario_net.res_bus.iloc[:0]), ('seeded', seed_net.res_bus)]:
+            net = copy.deepcopy(self.scenario_net)
+            net['res_bus'] = res_bus.copy()
+            _solver_output.last = {}
+            case = cases.get(net, calculate_voltage_angles=config.OPF_CALCULATE_VOLTAGE_ANGLES,
+                             pm_model=config.POWERMODELS_MODEL, pm_solver=config.POWERMODELS_SOLVER,
+                             pm_tol=config.OPF_TOLERANCE, ignore_ppm=True, delta_q=0.01)
+            try:
+                case.solve(net, init='pf', verbose=config.OPF_VERBOSE, suppress_warnings=True)
+            except Exception as e:
+                print(f"  ⚠ {label} OPF failed: {e}")
+            report[label] = {'pf_iterations': net.get('_ppc_opf', {}).get('iterations'),
+                             'opf_iterations': _solver_output.last.get('iterations'),
+                             'converged': bool(net.get('OPF_converged', False))}
+        print("  > Seed report: " + ", ".join(
+            f"{label} {r['pf_iterations']} PF / {r['opf_iterations']} OPF iterations"
+            f"{'' if r['converged'] else ' (not converged)'}" for label, r in report.items()))
+        return report
+
+    def _run_opf(self, init_mode, stats, stage_name='opf'):
+        with self.telemetry.stage(stage_name) as stage:
+            try:
+                return self._run_ac_opf(init_mode, stats)
+            finally:
+                stage['iterations'] = stats['opf_iterations']
+                stage['mismatch'] = _final_feasibility(_solver_output.last)
+
+    def _run_ac_opf(self, init_mode, stats):
+        net = self.scenario_net
+        n_gen = len(net.gen)
+        _solver_output.last = {}
+        opf_kwargs = dict(
+            pm_model=config.POWERMODELS_MODEL, 
+            pm_solver=config.POWERMODELS_SOLVER,
+            pm_tol=config.OPF_TOLERANCE,
+            ignore_ppm=True,
+            delta_q=0.01,
+        )
         try:
             print(f"--- OPF START (Solver: {config.OPF_SOLVER}) ---")
-            pp.runopp(
-                net,
-                verbose=config.OPF_VERBOSE, 
-                calculate_voltage_angles=config.OPF_CALCULATE_VOLTAGE_ANGLES,
-                init=init_mode, 
-                pm_model=config.POWERMODELS_MODEL, 
-                pm_solver=config.POWERMODELS_SOLVER,
-                pm_tol=config.OPF_TOLERANCE,
-                ignore_ppm=True,
-                delta_q=0.01,
-                suppress_warnings=True 
-            )
+            if self.compiled_cases is not None:
+                case = self.compiled_cases.get(
+                    net, calculate_voltage_angles=config.OPF_CALCULATE_VOLTAGE_ANGLES, **opf_kwargs)
+                case.solve(net, init=init_mode, verbose=config.OPF_VERBOSE, suppress_warnings=True)
+            else:
+                pp.runopp(
+                    net,
+                    verbose=config.OPF_VERBOSE, 
+                    calculate_voltage_angles=config.OPF_CALCULATE_VOLTAGE_ANGLES,
+                    init=init_mode, 
+                    suppress_warnings=True,
+                    **opf_kwargs
+                )
             
             # Check success
             is_success = False
@@ -334,6 +948,13 @@ class OPFEngine:
                 print("--- SOLVER FAILED TO CONVERGE ---")
                 return False
                 
+        except OPFTimeout:
+            raise
         except Exception as e:
             print(f"CRITICAL OPF EXCEPTION: {e}")
             return False
+        finally:
+            stats['opf_iterations'] = _solver_output.last.get('iterations')
+            # runopp leaves its auxiliary DC-line gens behind when it fails; drop them before the next attempt
+            if len(net.gen) > n_gen:
+                net.gen = net.gen.iloc[:n_gen]
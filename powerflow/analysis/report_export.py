@@ -40,6 +40,37 @@ class ReportGenerator:
         
         print(f"  ✓ Results exported to {self.output_dir}")
 
+    def export_telemetry(self, scenario_name, telemetry):
+        """Adds the per-stage telemetry (incl. the export stages themselves) to an exported kpi.json."""
+        kpi_path = os.path.join(config.OUTPUT_DIR, scenario_name, 'kpi.json')
+        if not os.path.exists(kpi_path): return
+        with open(kpi_path, 'r') as f: kpi_data = json.load(f)
+        kpi_data['telemetry'] = telemetry.as_dict()
+        with open(kpi_path, 'w') as f:
+            json.dump(kpi_data, f, indent=2)
+
+    def export_n1(self, scenario_name, n1_results):
+        """Writes n1_results.csv next to line_results.csv and adds the N-1 summary to kpi.json."""
+        folder = os.path.join(config.OUTPUT_DIR, scenario_name)
+        os.makedirs(folder, exist_ok=True)
+        n1_results.to_csv(os.path.join(folder, 'n1_results.csv'), index=False)
+
+        kpi_path = os.path.join(folder, 'kpi.json')
+        if not os.path.exists(kpi_path): return
+        with open(kpi_path, 'r') as f: kpi_data = json.load(f)
+        verified = n1_results[n1_results['verified']] if 'verified' in n1_results.columns else n1_results.iloc[0:0]
+        ac_loading = verified.get('ac_max_loading_percent', pd.Series(dtype=float))
+        kpi_data['n1'] = {
+            'outages': int(len(n1_results)),
+            'islanding': int(n1_results['islanding'].sum()),
+            'estimated_violations': int((n1_results['est_max_loading_percent'] > config.N1_OVERLOAD_PERCENT).sum()),
+            'verified': int(len(verified)),
+            'verified_violations': int((ac_loading > config.N1_OVERLOAD_PERCENT).sum()),
+            'worst_ac_loading_percent': float(ac_loading.max()) if ac_loading.notna().any() else None,
+        }
+        with open(kpi_path, 'w') as f:
+            json.dump(kpi_data, f, indent=2)
+
     def _calculate_consistent_kpi(self, scenario_name):
         """
         Core statistics: Ensures Total Gen = Sum(Mix), excludes imports.
@@ -0,0 +1,133 @@
+"""
+Result Cache - Disk-backed memoization of converged scenario results.
+Entries are keyed by a content hash of the scenario config, the base net and the solver settings
+in config.RESULT_CACHE_CONFIG_KEYS; a hit restores the res_* tables without running the OPF.
+"""
+import hashlib
+import json
+import os
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+
+from . import config
+
+# Scenario keys that only label a run and do not change its result
+SCENARIO_LABEL_KEYS = ('name', 'description')
+RESULT_TABLES = ('res_bus', 'res_line', 'res_trafo', 'res_trafo3w', 'res_gen', 'res_sgen', 'res_storage',
+                 'res_load', 'res_ext_grid', 'res_dcline', 'res_impedance', 'res_shunt')
+
+
+def canonical(obj):
+    """JSON-serializable, order-independent form of (nested) scenario values."""
+    if isinstance(obj, dict):
+        return {str(k): canonical(v) for k, v in sorted(obj.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(obj, pd.Series):
+        return {'index': [str(i) for i in obj.index], 'values': canonical(obj.tolist())}
+    if isinstance(obj, (list, tuple, np.ndarray)):
+        return [canonical(v) for v in obj]
+    if isinstance(obj, (np.integer, np.floating, np.bool_)):
+        return obj.item()
+    return obj
+
+
+def scenario_hash(scenario_data):
+    """Hash of a scenario config, ignoring labels and dict key order."""
+    payload = {k: v for k, v in scenario_data.items() if k not in SCENARIO_LABEL_KEYS}
+    return hashlib.sha1(json.dumps(canonical(payload), default=str).encode()).hexdigest()
+
+
+def settings_hash(fidelity):
+    """Hash of the solver settings that influence the result."""
+    settings = {key: getattr(config, key, None) for key in config.RESULT_CACHE_CONFIG_KEYS}
+    settings['fidelity'] = fidelity
+    return hashlib.sha1(json.dumps(canonical(settings), default=str).encode()).hexdigest()
+
+
+def net_fingerprint(net):
+    """Content hash of all element tables of a pandapower net (result and internal tables excluded)."""
+    h = hashlib.sha1()
+    for key in sorted(net.keys()):
+        df = net[key]
+        if key.startswith(('res_', '_')) or not isinstance(df, pd.DataFrame) or len(df) == 0:
+            continue
+        h.update(f"{key}:{len(df)}:{','.join(map(str, df.columns))}".encode())
+        try:
+            values = pd.util.hash_pandas_object(df, index=True)
+        except TypeError:
+            # Unhashable cells (lists, dicts): fall back to their string form
+            values = pd.util.hash_pandas_object(df.astype(str), index=True)
+        h.update(values.to_numpy().tobytes())
+    return h.hexdigest()
+
+
+class ResultCache:
+    """Pickled scenario results in OUTPUT_DIR/RESULT_CACHE_DIR, evicted least recently used first."""
+
+    def __init__(self, folder=None, max_entries=None, max_mb=None):
+        self.folder = folder or os.path.join(config.OUTPUT_DIR, config.RESULT_CACHE_DIR)
+        self.max_entries = max_entries or config.RESULT_CACHE_MAX_ENTRIES
+        self.max_mb = config.RESULT_CACHE_MAX_MB if max_mb is None else max_mb
+        self.stats = {'hits': 0, 'misses': 0, 'stored': 0, 'evicted': 0}
+
+    def key(self, scenario_data, net_fp, fidelity):
+        return hashlib.sha1(f"{scenario_hash(scenario_data)}:{net_fp}:{settings_hash(fidelity)}".encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.folder, f"{key}.pkl")
+
+    def get(self, key):
+        """Returns the stored entry or None. A hit refreshes the entry's LRU timestamp."""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+            os.utime(path)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            self.stats['misses'] += 1
+            return None
+        self.stats['hits'] += 1
+        return entry
+
+    def put(self, key, net, info, solver_stats):
+        """Stores the result tables, KPIs and solver record of a converged scenario net."""
+        entry = {
+            'tables': {t: net[t].copy() for t in RESULT_TABLES if t in net and len(net[t]) > 0},
+            'res_cost': float(net.res_cost),
+            'info': {k: v for k, v in info.items() if k != 'solver'},
+            'solver': solver_stats,
+            'created': time.time(),
+        }
+        os.makedirs(self.folder, exist_ok=True)
+        # Write-then-rename so concurrent batch workers never read a half-written entry
+        tmp_path = f"{self._path(key)}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self._path(key))
+        self.stats['stored'] += 1
+        self.evict()
+
+    def evict(self):
+        """Drops least recently used entries until both the entry and the size limit hold."""
+        try:
+            files = [os.path.join(self.folder, f) for f in os.listdir(self.folder) if f.endswith('.pkl')]
+            entries = sorted((os.stat(p).st_mtime, os.stat(p).st_size, p) for p in files)
+        except OSError:
+            return
+        total = sum(size for _, size, _ in entries)
+        max_bytes = self.max_mb * 1024 ** 2
+        while entries and (len(entries) > self.max_entries or total > max_bytes):
+            _, size, path = entries.pop(0)
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.stats['evicted'] += 1
+
+    def clear(self):
+        if not os.path.isdir(self.folder): return
+        for f in os.listdir(self.folder):
+            if f.endswith('.pkl'): os.remove(os.path.join(self.folder, f))
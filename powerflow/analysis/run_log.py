@@ -0,0 +1,153 @@
+"""
+Run Log - Per-run capture of solver output that is safe under threads and asyncio.
+While any run log is open, sys.stdout/sys.stderr are replaced by proxies that route each write to the
+log of the run active in the current context (contextvars), and to the original stream otherwise.
+The original streams and the root logger are restored when the last open run log closes.
+"""
+import contextvars
+import datetime
+import logging
+import os
+import sys
+import threading
+import time
+
+_active_log = contextvars.ContextVar('opf_run_log', default=None)
+_install_lock = threading.Lock()
+# Open RunLogs and what the first one replaced: {'count': n, 'streams': {name: original}, 'handler': handler}
+_installed = {'count': 0, 'streams': {}, 'handler': None}
+
+
+class _StreamRouter:
+    """Stand-in for sys.stdout/sys.stderr: writes go to the current run log, if any."""
+
+    def __init__(self, source, fallback):
+        self._source = source
+        self._fallback = fallback
+
+    def write(self, text):
+        run_log = _active_log.get()
+        if run_log is None:
+            return self._fallback.write(text)
+        run_log.write(self._source, text)
+        return len(text)
+
+    def flush(self):
+        if _active_log.get() is None:
+            self._fallback.flush()
+
+    def __getattr__(self, name):
+        # fileno(), isatty(), encoding, ... of the real stream
+        return getattr(self._fallback, name)
+
+
+class _RunLogHandler(logging.Handler):
+    """Root logging handler: records emitted inside a run go to its log with level and logger name."""
+
+    def emit(self, record):
+        run_log = _active_log.get()
+        if run_log is not None:
+            run_log.write_line(record.levelname, f"{record.name}: {self.format(record)}")
+        elif len(logging.getLogger().handlers) == 1 and record.levelno >= logging.lastResort.level:
+            # This handler disables logging's last-resort stderr output - keep it outside runs
+            logging.lastResort.handle(record)
+
+
+def _install():
+    """Routes stdout/stderr and root logging through the run logs (counted, see _uninstall)."""
+    with _install_lock:
+        _installed['count'] += 1
+        if _installed['count'] > 1: return
+        for name in ['stdout', 'stderr']:
+            stream = getattr(sys, name)
+            _installed['streams'][name] = stream
+            setattr(sys, name, _StreamRouter(name, stream))
+        _installed['handler'] = _RunLogHandler()
+        logging.getLogger().addHandler(_installed['handler'])
+
+
+def _uninstall():
+    """Restores the original streams and removes the handler once no run log is open any more."""
+    with _install_lock:
+        _installed['count'] -= 1
+        if _installed['count'] > 0: return
+        for name, stream in _installed['streams'].items():
+            # Leave a stream alone that was replaced again after ours
+            if isinstance(getattr(sys, name), _StreamRouter):
+                setattr(sys, name, stream)
+        _installed['streams'].clear()
+        logging.getLogger().removeHandler(_installed['handler'])
+        _installed['handler'] = None
+
+
+class RunLog:
+    """
+    Context manager capturing print output, warnings and log records of one OPF run into a file.
+    Only the current thread / asyncio task is captured, so concurrent runs keep separate logs.
+    Output written directly to file descriptors (C extensions, subprocesses) is not captured.
+    """
+
+    def __init__(self, filename, scenario_name=None, mode='w'):
+        self.filename = filename
+        self.scenario_name = scenario_name
+        self.mode = mode
+        self.t_start = None
+        self.logfile = None
+        self._token = None
+        self._partial = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+        self.logfile = open(self.filename, self.mode, encoding='utf-8')
+        _install()
+        self.t_start = time.time()
+        self.logfile.write("=== OPF RUN LOG ===\n")
+        self.logfile.write(f"scenario: {self.scenario_name}\n")
+        self.logfile.write(f"started:  {datetime.datetime.now().isoformat(timespec='seconds')}\n")
+        self.logfile.write(f"thread:   {threading.current_thread().name} (pid {os.getpid()})\n")
+        self.logfile.write("--- OUTPUT ---\n")
+        self._token = _active_log.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _active_log.reset(self._token)
+        for source, text in list(self._partial.items()):
+            if text: self.write_line(source, text)
+        self._partial.clear()
+        if exc_type is not None:
+            self.write_line('ERROR', f"{exc_type.__name__}: {exc_value}")
+        self.logfile.close()
+        _uninstall()
+
+    def write(self, source, text):
+        """Buffers stream writes and logs them line by line."""
+        with self._lock:
+            lines = (self._partial.get(source, '') + text).split('\n')
+            self._partial[source] = lines.pop()
+        for line in lines:
+            self.write_line(source, line)
+
+    def write_line(self, source, line):
+        first, *rest = line.rstrip().split('\n')
+        with self._lock:
+            self.logfile.write(f"{time.time() - self.t_start:9.3f}s  {source:<7} {first}\n")
+            for cont in rest:
+                self.logfile.write(f"{'':19}{cont}\n")
+
+    def write_summary(self, converged, solver_stats):
+        """Appends the structured solver record (tier, fallback step, attempts, iterations)."""
+        with self._lock:
+            f = self.logfile
+            f.write("--- SUMMARY ---\n")
+            f.write(f"converged:  {bool(converged)}\n")
+            f.write(f"duration_s: {time.time() - self.t_start:.3f}\n")
+            for key, value in solver_stats.items():
+                if key == 'attempts': continue
+                f.write(f"{key}: {value}\n")
+            attempts = solver_stats.get('attempts', [])
+            if attempts:
+                f.write("attempts:\n")
+                for a in attempts:
+                    f.write(f"  - {a['step']} (init={a['init']}): {a['status']} in {a['duration_s']:.3f}s, "
+                            f"{a['opf_iterations']} iterations\n")
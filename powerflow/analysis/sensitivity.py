@@ -0,0 +1,281 @@
+"""
+Sensitivity - Sparse DC power transfer (PTDF) and line outage (LODF) distribution factors.
+Computed once per topology from the DC power flow matrices of a net (sparse LU of the reduced
+B matrix) and cached on disk by topology fingerprint, so flow changes for any injection pattern
+or branch outage are a sparse matrix product instead of an OPF/PF run.
+"""
+import os
+import pickle
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pandapower as pp
+import scipy.sparse as sp
+from scipy.sparse.linalg import splu
+
+from . import config
+from .compiled_case import topology_fingerprint
+from .opf import create_scenario_net
+
+# Columns that change the DC sensitivities (reactances, connectivity, slack); injections and limits do not
+SENSITIVITY_COLUMNS = {
+    'bus': ['in_service', 'vn_kv'],
+    'line': ['from_bus', 'to_bus', 'in_service', 'length_km', 'x_ohm_per_km', 'parallel'],
+    'trafo': ['hv_bus', 'lv_bus', 'in_service', 'sn_mva', 'vn_hv_kv', 'vn_lv_kv', 'vk_percent', 'vkr_percent',
+              'tap_pos', 'shift_degree', 'parallel'],
+    'impedance': ['from_bus', 'to_bus', 'in_service', 'xft_pu', 'sn_mva'],
+    'switch': ['bus', 'element', 'et', 'closed'],
+    'ext_grid': ['bus', 'in_service'],
+    'gen': ['bus', 'in_service', 'slack'],
+}
+# Branch element tables covered by the model, in pandapower's branch order
+BRANCH_TABLES = ('line', 'trafo', 'impedance')
+
+
+def _sparse_columns(n_rows, n_cols, block, tol):
+    """
+    CSC matrix from the dense column blocks `block(cols)` (n_rows x len(cols)) of SENSITIVITY_BLOCK_COLUMNS
+    columns each; entries below `tol` are dropped before the next block is computed.
+    """
+    data, rows, cols = [np.zeros(0)], [np.zeros(0, dtype=int)], [np.zeros(0, dtype=int)]
+    for start in range(0, n_cols, config.SENSITIVITY_BLOCK_COLUMNS):
+        idx = np.arange(start, min(start + config.SENSITIVITY_BLOCK_COLUMNS, n_cols))
+        dense = block(idx)
+        r, c = np.nonzero(np.abs(dense) >= tol)
+        data.append(dense[r, c])
+        rows.append(r)
+        cols.append(idx[c])
+    return sp.csc_matrix((np.concatenate(data), (np.concatenate(rows), np.concatenate(cols))), shape=(n_rows, n_cols))
+
+
+def _selector(positions, valid, size):
+    """Sparse 0/1 matrix (len(positions) x size) picking column `positions[i]` into row i where valid."""
+    rows = np.flatnonzero(valid)
+    return sp.csr_matrix((np.ones(len(rows)), (rows, positions[rows])), shape=(len(positions), size))
+
+
+class SensitivityModel:
+    """
+    PTDF (branches x buses) and LODF (branches x branches) of one topology, indexed by pandapower
+    bus indices and (element table, element index) branch labels. Flows are in MW, positive from
+    the from/hv side; injections are withdrawn at the slack bus.
+    """
+
+    def __init__(self, fingerprint, buses, branches, ptdf, lodf, islanding, slack_buses):
+        self.fingerprint = fingerprint
+        self.buses = pd.Index(buses, name='bus')
+        self.branches = pd.MultiIndex.from_tuples(branches, names=['et', 'element'])
+        self.ptdf = ptdf
+        self.lodf = lodf
+        self.islanding = islanding        # outage of this branch splits the grid (no LODF column)
+        self.slack_buses = list(slack_buses)
+        self._bus_pos = pd.Series(np.arange(len(self.buses)), index=self.buses)
+        self._branch_pos = pd.Series(np.arange(len(self.branches)), index=self.branches)
+
+    @classmethod
+    def from_net(cls, net, fingerprint=None, tol=None):
+        """Builds the factors from the DC power flow matrices of `net` (injections do not matter)."""
+        tol = config.SENSITIVITY_DROP_TOLERANCE if tol is None else tol
+        fingerprint = fingerprint or topology_fingerprint(net, SENSITIVITY_COLUMNS)
+
+        dc_net = create_scenario_net(net)
+        pp.rundcpp(dc_net, numba=False, calculate_voltage_angles=True)
+        internal = dc_net._ppc['internal']
+        lookups = dc_net._pd2ppc_lookups
+        n_bus = internal['bus'].shape[0]
+        ref = np.atleast_1d(internal['ref'])
+
+        # Factors in internal order, built in column blocks so no dense branches x buses/branches matrix
+        # exists: PTDF = Bf B^-1 with the slack row/column removed (B is symmetric)
+        non_ref = np.setdiff1d(np.arange(n_bus), ref)
+        Bf = internal['Bf'].tocsr()[:, non_ref]
+        Cft = internal['Cft'].tocsr()[:, non_ref]
+        n_br = Bf.shape[0]
+        lu = splu(internal['Bbus'].tocsc()[non_ref][:, non_ref].tocsc()) if len(non_ref) > 0 else None
+
+        def solve_columns(rhs):
+            """Bf B^-1 rhs for a dense (non-slack buses x k) right-hand side."""
+            return Bf @ lu.solve(rhs) if lu is not None else np.zeros((n_br, rhs.shape[1]))
+
+        def ptdf_block(cols):
+            unit = np.zeros((len(non_ref), len(cols)))
+            unit[cols, np.arange(len(cols))] = 1.0
+            return solve_columns(unit)
+
+        # LODF: flow change on every branch per MW of pre-outage flow on the outaged branch,
+        # H[:, k] = PTDF Cft[k].T divided by 1 - H[k, k]
+        islanding_int = np.zeros(n_br, dtype=bool)
+
+        def lodf_block(cols):
+            H = solve_columns(Cft[cols].T.toarray())
+            denom = 1.0 - H[cols, np.arange(len(cols))]
+            islanding_int[cols] = np.abs(denom) < 1e-6
+            block = H / np.where(islanding_int[cols], 1.0, denom)[None, :]
+            block[cols, np.arange(len(cols))] = -1.0
+            block[:, islanding_int[cols]] = 0.0
+            return block
+
+        ptdf_int = _sparse_columns(n_br, len(non_ref), ptdf_block, tol)
+        lodf_int = _sparse_columns(n_br, n_br, lodf_block, tol)
+
+        # Map to pandapower indices: bus columns via the bus lookup, branch rows via branch_is
+        bus_lookup = lookups['bus'][net.bus.index.values]
+        non_ref_pos = np.full(n_bus, -1)
+        non_ref_pos[non_ref] = np.arange(len(non_ref))
+        bus_pos = non_ref_pos[np.where((bus_lookup >= 0) & (bus_lookup < n_bus), bus_lookup, ref[0])]
+        int_rows = np.full(len(internal['branch_is']), -1)
+        int_rows[np.flatnonzero(internal['branch_is'])] = np.arange(n_br)
+
+        branches, rows = [], []
+        for et in BRANCH_TABLES:
+            if et not in lookups['branch']: continue
+            f, t = lookups['branch'][et]
+            branches.extend((et, int(i)) for i in net[et].index)
+            rows.append(int_rows[f:t])
+        rows = np.concatenate(rows) if rows else np.zeros(0, dtype=int)
+        in_model = rows >= 0
+
+        # Buses outside the model (and the slack) have zero PTDF columns, branches outside it zero rows/columns
+        branch_rows = _selector(rows, in_model, n_br)
+        ptdf = branch_rows @ ptdf_int @ _selector(bus_pos, bus_pos >= 0, len(non_ref)).T
+        lodf = branch_rows @ lodf_int @ branch_rows.T
+        islanding = islanding_int[np.where(in_model, rows, 0)] & in_model
+
+        slack_buses = net.bus.index.values[np.isin(bus_lookup, ref)]
+        return cls(fingerprint, net.bus.index.values, branches, ptdf.tocsr(), lodf.tocsc(), islanding, slack_buses)
+
+    def bus_positions(self, buses):
+        return self._bus_pos.loc[list(buses)].to_numpy()
+
+    def branch_positions(self, branches):
+        """Rows of (et, element) labels, e.g. [('line', 12), ('trafo', 3)]."""
+        return self._branch_pos.loc[list(branches)].to_numpy()
+
+    def injection_matrix(self, injections):
+        """Bus x case matrix (MW) from a Series (bus -> MW), a DataFrame (bus x cases) or a full-length array."""
+        if isinstance(injections, pd.Series):
+            injections = injections.to_frame()
+        if isinstance(injections, pd.DataFrame):
+            matrix = sp.lil_matrix((len(self.buses), injections.shape[1]))
+            grouped = injections.groupby(level=0).sum()
+            matrix[self.bus_positions(grouped.index), :] = grouped.to_numpy(dtype=float)
+            return matrix.tocsr()
+        injections = np.asarray(injections, dtype=float)
+        if injections.shape[0] != len(self.buses):
+            raise ValueError(f"Injection array needs {len(self.buses)} rows (one per bus), got {injections.shape[0]}.")
+        return injections if injections.ndim == 2 else injections[:, None]
+
+    def flow_change(self, injections):
+        """
+        Branch flow changes (MW, branches x cases) for injection patterns at the buses, balanced by
+        the slack. Returns a DataFrame for Series/DataFrame input and an array otherwise.
+        """
+        delta = self.ptdf @ self.injection_matrix(injections)
+        delta = delta.toarray() if sp.issparse(delta) else np.asarray(delta)
+        if isinstance(injections, pd.DataFrame):
+            return pd.DataFrame(delta, index=self.branches, columns=injections.columns)
+        if isinstance(injections, pd.Series):
+            return pd.Series(delta[:, 0], index=self.branches, name=injections.name)
+        return delta
+
+    def transfer_flows(self, from_buses, to_buses, mw=1.0):
+        """Flow changes (branches x transfers) for `mw` moved from each from-bus to the paired to-bus."""
+        cols = np.arange(len(from_buses))
+        rows = np.r_[self.bus_positions(from_buses), self.bus_positions(to_buses)]
+        values = np.r_[np.full(len(cols), mw), np.full(len(cols), -mw)]
+        matrix = sp.csr_matrix((values, (rows, np.r_[cols, cols])), shape=(len(self.buses), len(cols)))
+        return (self.ptdf @ matrix).toarray()
+
+    def post_outage_flows(self, flows, outages=None):
+        """
+        Post-outage branch flows (MW, branches x outages) from pre-outage flows (one value per branch)
+        for the outage of each branch in `outages` (labels, default all). Islanding outages are NaN.
+        """
+        flows = np.asarray(flows, dtype=float)
+        cols = np.arange(len(self.branches)) if outages is None else self.branch_positions(outages)
+        lodf = self.lodf[:, cols].toarray()
+        post = flows[:, None] + lodf * flows[cols][None, :]
+        post[cols, np.arange(len(cols))] = 0.0
+        post[:, self.islanding[cols]] = np.nan
+        return post
+
+    def branch_flows(self, net):
+        """Pre-outage flows (MW, from side) of the model branches taken from the net's result tables."""
+        flows = np.zeros(len(self.branches))
+        for et, col in [('line', 'p_from_mw'), ('trafo', 'p_hv_mw'), ('impedance', 'p_from_mw')]:
+            mask = self.branches.get_level_values('et') == et
+            if not mask.any() or col not in net[f'res_{et}'].columns: continue
+            elements = self.branches.get_level_values('element')[mask]
+            flows[mask] = net[f'res_{et}'][col].reindex(elements).fillna(0.0).to_numpy()
+        return flows
+
+
+class SensitivityCache:
+    """SensitivityModels in memory and as pickles in OUTPUT_DIR/SENSITIVITY_CACHE_DIR, keyed by topology."""
+
+    def __init__(self, folder=None, max_entries=None):
+        self.folder = folder or os.path.join(config.OUTPUT_DIR, config.SENSITIVITY_CACHE_DIR)
+        self.max_entries = max_entries or config.SENSITIVITY_CACHE_MAX_ENTRIES
+        self.entries = OrderedDict()
+        self.stats = {'built': 0, 'memory_hits': 0, 'disk_hits': 0}
+
+    def _path(self, fingerprint):
+        return os.path.join(self.folder, f"{fingerprint}.pkl")
+
+    def get(self, net):
+        """Returns the model of the net's topology: memory, then disk, then a fresh build."""
+        fingerprint = topology_fingerprint(net, SENSITIVITY_COLUMNS)
+        if fingerprint in self.entries:
+            self.entries.move_to_end(fingerprint)
+            self.stats['memory_hits'] += 1
+            return self.entries[fingerprint]
+
+        model = self._load(fingerprint)
+        if model is not None:
+            self.stats['disk_hits'] += 1
+        else:
+            print(f"  > Building PTDF/LODF for {len(net.bus)} buses ({fingerprint[:12]})...")
+            model = SensitivityModel.from_net(net, fingerprint)
+            self.stats['built'] += 1
+            self._store(model)
+            print(f"  ✓ Sensitivities ready: {model.ptdf.nnz:,} PTDF / {model.lodf.nnz:,} LODF non-zeros.")
+
+        self.entries[fingerprint] = model
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return model
+
+    def _load(self, fingerprint):
+        path = self._path(fingerprint)
+        try:
+            with open(path, 'rb') as f:
+                model = pickle.load(f)
+            os.utime(path)
+            return model
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError):
+            return None
+
+    def _store(self, model):
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            tmp_path = f"{self._path(model.fingerprint)}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(model.fingerprint))
+            files = sorted((os.stat(os.path.join(self.folder, f)).st_mtime, os.path.join(self.folder, f))
+                           for f in os.listdir(self.folder) if f.endswith('.pkl'))
+            for _, path in files[:max(0, len(files) - self.max_entries)]:
+                os.remove(path)
+        except OSError as e:
+            print(f"  ⚠ Sensitivity cache write failed: {e}")
+
+
+_default_cache = None
+
+def get_sensitivities(net):
+    """SensitivityModel of the net's topology from the process-wide cache."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = SensitivityCache()
+    return _default_cache.get(net)
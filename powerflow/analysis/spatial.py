@@ -0,0 +1,115 @@
+"""
+Spatial - KD-tree index of the bus coordinates for nearest-bus and radius lookups in kilometres.
+Buses are placed on the earth sphere (ECEF), one tree per voltage level, so voltage-filtered queries
+only search the matching levels. Built once per base net and stored with it in the network cache.
+"""
+from collections import OrderedDict
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from .compiled_case import topology_fingerprint
+
+EARTH_RADIUS_KM = 6371.0
+# Columns that change the index
+SPATIAL_COLUMNS = {'bus': ['vn_kv', 'geo']}
+MAX_REGISTERED = 8
+
+
+def bus_coordinates(net):
+    """(lat, lon) arrays of all buses; NaN where the bus has no geo entry."""
+    geo = net.bus['geo'].to_numpy() if 'geo' in net.bus.columns else np.full(len(net.bus), None)
+    coords = np.array([(g[0], g[1]) if isinstance(g, (tuple, list)) and len(g) >= 2 else (np.nan, np.nan)
+                       for g in geo], dtype=float).reshape(-1, 2)
+    return coords[:, 0], coords[:, 1]
+
+
+def to_ecef(lat, lon):
+    """Points on the earth sphere (km) for lat/lon in degrees; chord length ~ great-circle distance."""
+    lat, lon = np.radians(lat), np.radians(lon)
+    return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1) * EARTH_RADIUS_KM
+
+
+def _arc_km(chord_km):
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord_km / (2 * EARTH_RADIUS_KM), 0.0, 1.0))
+
+
+class BusIndex:
+    """Nearest-bus lookups on the buses of one net with coordinates, optionally filtered by voltage level."""
+
+    def __init__(self, net, fingerprint=None):
+        self.fingerprint = fingerprint or topology_fingerprint(net, SPATIAL_COLUMNS)
+        lat, lon = bus_coordinates(net)
+        valid = ~(np.isnan(lat) | np.isnan(lon))
+        buses = net.bus.index.to_numpy()[valid]
+        vn_kv = net.bus['vn_kv'].to_numpy(dtype=float)[valid]
+        points = to_ecef(lat[valid], lon[valid])
+        self.levels = {}  # vn_kv -> (tree, bus indices)
+        for level in np.unique(vn_kv):
+            mask = vn_kv == level
+            self.levels[float(level)] = (cKDTree(points[mask]), buses[mask])
+
+    def __len__(self):
+        return sum(len(buses) for _, buses in self.levels.values())
+
+    def _trees(self, min_vn_kv=None, max_vn_kv=None):
+        trees = [entry for level, entry in self.levels.items()
+                 if (min_vn_kv is None or level >= min_vn_kv) and (max_vn_kv is None or level <= max_vn_kv)]
+        if not trees:
+            raise ValueError(f"No buses with coordinates between {min_vn_kv} and {max_vn_kv} kV.")
+        return trees
+
+    def nearest(self, lat, lon, k=1, min_vn_kv=None, max_vn_kv=None):
+        """
+        k nearest buses within the voltage range: (bus indices, distances in km). Scalars give scalars
+        (k=1) or length-k arrays; arrays of points give (n,) or (n, k) arrays, nearest first.
+        """
+        scalar = np.ndim(lat) == 0
+        points = to_ecef(np.atleast_1d(np.asarray(lat, dtype=float)), np.atleast_1d(np.asarray(lon, dtype=float)))
+        dists, ids = [], []
+        for tree, buses in self._trees(min_vn_kv, max_vn_kv):
+            kk = min(k, tree.n)
+            d, pos = tree.query(points, k=kk)
+            d, pos = d.reshape(len(points), kk), pos.reshape(len(points), kk)
+            dists.append(d)
+            ids.append(buses[pos])
+        dists, ids = np.hstack(dists), np.hstack(ids)
+        order = np.argsort(dists, axis=1, kind='stable')[:, :k]
+        dists = _arc_km(np.take_along_axis(dists, order, axis=1))
+        ids = np.take_along_axis(ids, order, axis=1)
+        if k == 1:
+            dists, ids = dists[:, 0], ids[:, 0]
+        return (ids[0], dists[0]) if scalar else (ids, dists)
+
+    def within(self, lat, lon, r_km, min_vn_kv=None, max_vn_kv=None):
+        """Buses within r_km of one point in the voltage range: (bus indices, distances in km), nearest first."""
+        point = to_ecef(float(lat), float(lon))
+        chord = 2 * EARTH_RADIUS_KM * np.sin(min(r_km / (2 * EARTH_RADIUS_KM), np.pi / 2))
+        ids, dists = [], []
+        for tree, buses in self._trees(min_vn_kv, max_vn_kv):
+            pos = np.asarray(tree.query_ball_point(point, chord), dtype=int)
+            ids.append(buses[pos])
+            dists.append(np.linalg.norm(tree.data[pos] - point, axis=1))
+        ids, dists = np.concatenate(ids), _arc_km(np.concatenate(dists))
+        order = np.argsort(dists, kind='stable')
+        return ids[order], dists[order]
+
+
+_registry = OrderedDict()
+
+def register_bus_index(index):
+    """Makes a (e.g. cached) index available to get_bus_index for nets with the same buses."""
+    _registry[index.fingerprint] = index
+    _registry.move_to_end(index.fingerprint)
+    while len(_registry) > MAX_REGISTERED:
+        _registry.popitem(last=False)
+    return index
+
+
+def get_bus_index(net):
+    """BusIndex of the net's buses from the process-wide registry, built on first use."""
+    fingerprint = topology_fingerprint(net, SPATIAL_COLUMNS)
+    if fingerprint in _registry:
+        _registry.move_to_end(fingerprint)
+        return _registry[fingerprint]
+    return register_bus_index(BusIndex(net, fingerprint))
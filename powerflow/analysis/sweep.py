@@ -0,0 +1,247 @@
+"""
+Sweep - Cartesian parameter sweeps stored as an N-dimensional results cube.
+Every combination of the swept parameters (capacity factors, load scale, storage mode, border price
+templates) becomes a create_scenario config, solved independently on a process pool. Results land in
+arrays of shape (axis lengths..., elements) that can be sliced without re-solving.
+"""
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from . import config
+from .grid_building import GridModeler
+from .opf import OPFEngine
+from .scenarios import BASE_CF, PRICES_STD, create_scenario
+
+# Axes mapped to create_scenario arguments; any BASE_CF key sweeps that capacity factor
+SCENARIO_ARGS = {'pv': 'pv', 'w_on': 'w_on', 'w_off': 'w_off', 'load': 'load'}
+# (cube key, result table, column), one value per element
+ELEMENT_FIELDS = [
+    ('line_loading_percent', 'res_line', 'loading_percent'),
+    ('trafo_loading_percent', 'res_trafo', 'loading_percent'),
+    ('bus_vm_pu', 'res_bus', 'vm_pu'),
+    ('bus_lam_p', 'res_bus', 'lam_p'),
+]
+# One value per combination
+SCALAR_FIELDS = ['converged', 'total_cost_eur', 'max_line_loading_percent', 'max_trafo_loading_percent',
+                 'total_load_mw', 'total_gen_mw']
+
+# Per-process state, filled once by _init_worker
+_WORKER = {}
+
+
+def _init_worker(base=None, fidelity=None, log_folder=None):
+    """Process pool initializer: one engine (and base-net load) per worker."""
+    base_net, ext_grids = base if base is not None else GridModeler().create_base_network()
+    _WORKER['engine'] = OPFEngine(base_net, ext_grids, fidelity=fidelity)
+    _WORKER['elements'] = element_axes(base_net)
+    _WORKER['log_file'] = os.path.join(log_folder or config.OUTPUT_DIR, f"opf_log_{os.getpid()}.txt")
+
+
+def element_axes(net):
+    """Element index of every ELEMENT_FIELDS entry."""
+    return {key: net[res_table.replace('res_', '')].index.values for key, res_table, _ in ELEMENT_FIELDS}
+
+
+def _result_values(net, info, converged):
+    values = {'converged': float(converged), 'total_load_mw': float(info['total_load_mw']),
+              'total_gen_mw': float(info['total_gen_mw'])}
+    if not converged: return values
+    values['total_cost_eur'] = float(net.res_cost)
+    for key, res_table, col in ELEMENT_FIELDS:
+        res = net[res_table]
+        if col in res.columns and len(res) > 0:
+            values[key] = res[col].reindex(_WORKER['elements'][key]).to_numpy(dtype=np.float32)
+    for et in ['line', 'trafo']:
+        if len(net[f'res_{et}']) > 0:
+            values[f'max_{et}_loading_percent'] = float(net[f'res_{et}']['loading_percent'].max())
+    return values
+
+
+def _run_point(flat, scen):
+    """Solves one (flat index, scenario) point inside a worker; returns its record and result values."""
+    engine = _WORKER['engine']
+    t_start = time.time()
+    record = {'index': flat, 'scenario': scen['name'], 'converged': False, 'error': None,
+              'tier': None, 'fallback_step': None}
+    values = {}
+    try:
+        net, info, converged = engine.run_scenario(scen, log_file=_WORKER['log_file'])
+        values = _result_values(net, info, converged)
+        solver = info.get('solver', {})
+        record.update({'converged': bool(converged), 'tier': solver.get('tier'),
+                       'fallback_step': solver.get('fallback_step')})
+    except Exception as e:
+        record['error'] = str(e).splitlines()[0] if str(e) else type(e).__name__
+    record['duration_s'] = time.time() - t_start
+    return record, values
+
+
+class SweepResult:
+    """Results cube of one sweep: cube[key] has shape (len(axis) for every axis) [+ (elements,)]."""
+
+    def __init__(self, name, axes, elements):
+        self.name = name
+        self.axes = axes          # {axis name: list of labels}, in cube dimension order
+        self.elements = elements  # {element field: element index}
+        shape = tuple(len(labels) for labels in axes.values())
+        self.cube = {key: np.full(shape, np.nan) for key in SCALAR_FIELDS}
+        self.cube.update({key: np.full(shape + (len(index),), np.nan, dtype=np.float32)
+                          for key, index in elements.items()})
+        self.records = []
+
+    @property
+    def shape(self):
+        return tuple(len(labels) for labels in self.axes.values())
+
+    def add(self, record, values):
+        self.records.append(record)
+        position = np.unravel_index(record['index'], self.shape)
+        for key, value in values.items():
+            self.cube[key][position] = value
+
+    def _position(self, axis, label):
+        labels = self.axes[axis]
+        for i, candidate in enumerate(labels):
+            if candidate == label or (isinstance(label, float) and isinstance(candidate, (int, float))
+                                      and np.isclose(candidate, label)):
+                return i
+        raise KeyError(f"'{label}' is not a value of sweep axis '{axis}' ({labels}).")
+
+    def sel(self, key, **coords):
+        """Slice of one cube field, e.g. sel('line_loading_percent', pv=0.3, prices='std')."""
+        unknown = set(coords) - set(self.axes)
+        if unknown:
+            raise KeyError(f"Unknown sweep axes: {', '.join(sorted(unknown))}.")
+        index = tuple(self._position(axis, coords[axis]) if axis in coords else slice(None) for axis in self.axes)
+        return self.cube[key][index]
+
+    def to_frame(self, key, element=None):
+        """One scalar field (or one element of an element field) as a flat table, one row per combination."""
+        data = self.cube[key]
+        if key in self.elements:
+            if element is None:
+                raise ValueError(f"'{key}' has one value per element; pass element=<index>.")
+            data = data[..., list(self.elements[key]).index(element)]
+        index = pd.MultiIndex.from_product(list(self.axes.values()), names=list(self.axes))
+        return pd.Series(data.reshape(-1), index=index, name=key).to_frame()
+
+    @property
+    def summary(self):
+        return pd.DataFrame(self.records).sort_values('index').reset_index(drop=True)
+
+    def save(self, folder=None):
+        """Writes cube.npz (fields, axis labels, element indices) and summary.csv to OUTPUT_DIR/<name>/."""
+        folder = folder or os.path.join(config.OUTPUT_DIR, self.name)
+        os.makedirs(folder, exist_ok=True)
+        arrays = dict(self.cube)
+        arrays['axes'] = np.array(list(self.axes), dtype=str)
+        arrays.update({f"axis_{axis}": np.array(labels) for axis, labels in self.axes.items()})
+        arrays.update({f"elements_{key}": index for key, index in self.elements.items()})
+        np.savez_compressed(os.path.join(folder, 'cube.npz'), **arrays)
+        if self.records:
+            self.summary.to_csv(os.path.join(folder, 'summary.csv'), index=False)
+        return folder
+
+    @classmethod
+    def load(cls, folder):
+        """Reads a saved cube back (no re-solve); summary records are not restored."""
+        with np.load(os.path.join(folder, 'cube.npz')) as data:
+            axes = {axis: data[f"axis_{axis}"].tolist() for axis in data['axes']}
+            elements = {key: data[f"elements_{key}"] for key, _, _ in ELEMENT_FIELDS if f"elements_{key}" in data}
+            result = cls(os.path.basename(os.path.normpath(folder)), axes, elements)
+            for key in result.cube:
+                if key in data: result.cube[key] = data[key]
+        return result
+
+
+class ParameterSweep:
+    """
+    Cartesian product of sweep axes, e.g.
+        ParameterSweep({'pv': [0.0, 0.3, 0.6], 'load': [0.8, 1.0],
+                        'storage_mode': ['bidirectional', 'charge_only'],
+                        'prices': {'std': PRICES_STD, 'fr_high': {**PRICES_STD, 'France': {'c1': 120, 'c2': 0.01}}}})
+    Axes: 'pv', 'w_on', 'w_off', 'load' (create_scenario arguments), any BASE_CF type (capacity factor),
+    'storage_mode' and 'prices' ({label: price template}). `fixed` sets create_scenario arguments of
+    unswept parameters (default: BASE_CF capacity factors, load 1.0).
+    """
+
+    def __init__(self, axes, fixed=None):
+        if not axes:
+            raise ValueError("A sweep needs at least one axis.")
+        for axis, values in axes.items():
+            if axis not in SCENARIO_ARGS and axis not in BASE_CF and axis not in ('storage_mode', 'prices'):
+                raise ValueError(f"Unknown sweep axis '{axis}'.")
+            if len(values) == 0:
+                raise ValueError(f"Sweep axis '{axis}' has no values.")
+        if 'prices' in axes and not isinstance(axes['prices'], dict):
+            raise ValueError("Sweep axis 'prices' needs a {label: price template} dict.")
+        self.prices = dict(axes['prices']) if 'prices' in axes else {}
+        self.axes = {axis: (list(values) if axis != 'prices' else list(values.keys())) for axis, values in axes.items()}
+        self.fixed = {'pv': BASE_CF['solar radiant energy'], 'w_on': BASE_CF['wind_onshore'],
+                      'w_off': BASE_CF['wind_offshore'], 'load': 1.0}
+        self.fixed.update(fixed or {})
+
+    def __len__(self):
+        return int(np.prod([len(values) for values in self.axes.values()]))
+
+    def scenario(self, name, combo):
+        """create_scenario config of one combination ({axis: label})."""
+        kwargs = dict(self.fixed)
+        kwargs.update({SCENARIO_ARGS[axis]: label for axis, label in combo.items() if axis in SCENARIO_ARGS})
+        cf_overrides = {axis: label for axis, label in combo.items() if axis in BASE_CF}
+        price_template = self.prices[combo['prices']] if 'prices' in combo else PRICES_STD
+        scen = create_scenario(name, cf_overrides=cf_overrides, price_template=price_template, **kwargs)
+        if 'storage_mode' in combo: scen['storage_mode'] = combo['storage_mode']
+        return scen
+
+    def points(self, name):
+        """(flat index, scenario) of every combination, in cube (C) order."""
+        names = list(self.axes)
+        points = []
+        for flat, values in enumerate(itertools.product(*self.axes.values())):
+            combo = dict(zip(names, values))
+            label = "_".join(f"{axis}={value}" for axis, value in combo.items())
+            points.append((flat, self.scenario(f"{name}_{label}", combo)))
+        return points
+
+    def run(self, name='sweep', jobs=None, base=None, fidelity=None, on_result=None):
+        """
+        Solves every combination (spread over `jobs` worker processes) and returns a SweepResult,
+        also saved to OUTPUT_DIR/<name>/. `on_result(record)` is called per solved combination.
+        """
+        folder = os.path.join(config.OUTPUT_DIR, name)
+        os.makedirs(folder, exist_ok=True)
+        for f in os.listdir(folder):
+            if f.startswith('opf_log_'): os.remove(os.path.join(folder, f))
+        if base is None:
+            base = GridModeler().create_base_network()
+        result = SweepResult(name, self.axes, element_axes(base[0]))
+        points = self.points(name)
+
+        jobs = min(max(1, jobs or os.cpu_count() or 1), len(points))
+        print(f"--- SWEEP START: {len(self)} combinations of {', '.join(self.axes)} on {jobs} worker(s) ---")
+        t_start = time.time()
+
+        def collect(record, values):
+            result.add(record, values)
+            if on_result: on_result(record)
+
+        if jobs == 1:
+            _init_worker(base, fidelity, folder)
+            for flat, scen in points:
+                collect(*_run_point(flat, scen))
+        else:
+            with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                     initargs=(base, fidelity, folder)) as pool:
+                for future in as_completed([pool.submit(_run_point, flat, scen) for flat, scen in points]):
+                    collect(*future.result())
+
+        result.save(folder)
+        n_ok = int(np.nansum(result.cube['converged']))
+        print(f"--- SWEEP DONE: {n_ok}/{len(self)} converged in {time.time() - t_start:.2f}s, cube in {folder} ---")
+        return result
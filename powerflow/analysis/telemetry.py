@@ -0,0 +1,95 @@
+"""
+Telemetry - Per-stage wall time, memory and solver statistics of one scenario run.
+Stages are recorded in order (net copy, scenario application, cost setup, PF, OPF attempts, exports)
+and returned with scenario_info / written to kpi.json so regressions can be tracked across runs.
+"""
+import contextlib
+import os
+import sys
+import time
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    _PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = None
+
+
+def memory_mb():
+    """Resident set size of this process in MB (None where /proc is not available)."""
+    if _PAGE_SIZE is None: return None
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / 1024 ** 2
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def peak_memory_mb():
+    """Peak resident set size of this process in MB (None where the resource module is not available)."""
+    if resource is None: return None
+    # ru_maxrss is in KB on Linux, in bytes on macOS
+    scale = 1024 ** 2 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def pf_mismatch_mva(ppc):
+    """Largest remaining P (PV/PQ buses) or Q (PQ buses) mismatch of a solved Newton-Raphson PF."""
+    try:
+        internal = ppc['internal']
+        V = internal['V']
+        mis = V * np.conj(internal['Ybus'] @ V) - internal['Sbus']
+        pvpq = np.r_[internal['pv'], internal['pq']]
+        worst = max(np.abs(mis.real[pvpq]).max(initial=0.0), np.abs(mis.imag[internal['pq']]).max(initial=0.0))
+        return float(worst * internal['baseMVA'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class StageTelemetry:
+    """Ordered list of stage records: {'stage', 'wall_s', 'memory_delta_mb', 'iterations', 'mismatch'}."""
+
+    def __init__(self):
+        self.stages = []
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Times the enclosed block. The yielded record can be filled with 'iterations' / 'mismatch'."""
+        record = {'stage': name, 'wall_s': None, 'memory_delta_mb': None, 'iterations': None, 'mismatch': None}
+        mem_start = memory_mb()
+        t_start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['wall_s'] = time.perf_counter() - t_start
+            mem_end = memory_mb()
+            if mem_start is not None and mem_end is not None:
+                record['memory_delta_mb'] = mem_end - mem_start
+            self.stages.append(record)
+
+    def total_s(self):
+        return sum(s['wall_s'] for s in self.stages)
+
+    def as_dict(self):
+        """JSON-ready form (plain floats, total time, current and peak RSS)."""
+        stages = [{k: (float(v) if isinstance(v, (np.floating, np.integer)) else v) for k, v in s.items()}
+                  for s in self.stages]
+        return {'total_s': self.total_s(), 'memory_mb': memory_mb(), 'peak_memory_mb': peak_memory_mb(),
+                'stages': stages}
+
+    def report(self):
+        """One line per stage, slowest first."""
+        lines = []
+        for s in sorted(self.stages, key=lambda s: -s['wall_s']):
+            extra = ""
+            if s['iterations'] is not None: extra += f", {s['iterations']} it"
+            if s['mismatch'] is not None: extra += f", mismatch {s['mismatch']:.2e}"
+            if s['memory_delta_mb'] is not None: extra += f", {s['memory_delta_mb']:+.1f} MB"
+            lines.append(f"  {s['stage']:<24} {s['wall_s']:8.3f}s{extra}")
+        return "\n".join(lines)
@@ -0,0 +1,35 @@
+"""
+Regression checks for the area equivalent: building it never changes the full base net.
+
+    python -m pytest powerflow/analysis/test_area_equivalent.py
+"""
+import pandas as pd
+import pandapower as pp
+import pandapower.networks as nw
+
+from powerflow.analysis import config
+from powerflow.analysis.area_equivalent import build_area_equivalent
+
+
+def build_test_net():
+    """case118 with (lat, lon) bus locations and one HVDC line inside the area."""
+    net = nw.case118()
+    # Minimum generation (90% of max_p_mw) below the load, so the reference OPF converges
+    net.gen['max_p_mw'] *= 0.5
+    net.bus['geo'] = [(50.0 + 0.01 * i, 10.0) for i in range(len(net.bus))]
+    pp.create_dcline(net, from_bus=2, to_bus=10, p_mw=20.0, loss_percent=1.0, loss_mw=0.5, vm_from_pu=1.0,
+                     vm_to_pu=1.0, max_p_mw=200.0)
+    return net
+
+
+def test_area_equivalent_keeps_base_dcline_setpoints(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, 'OUTPUT_DIR', str(tmp_path))
+    monkeypatch.setattr(config, 'RESULT_CACHE_ENABLED', False)
+    net = build_test_net()
+    base_dcline = net.dcline.copy()
+
+    reduced, summary = build_area_equivalent(net, [], 50.0, 10.0, 20.0)
+    assert summary['reference_scenario'] == config.AREA_EQUIVALENT_SCENARIO
+    assert summary['boundary_buses'] > 0
+    pd.testing.assert_frame_equal(net.dcline, base_dcline)
+    pd.testing.assert_frame_equal(reduced.dcline.loc[base_dcline.index], base_dcline)
@@ -0,0 +1,149 @@
+"""
+Regression check + benchmark for the column-wise capacity factor engine.
+Compares opf.apply_capacity_factors against the legacy per-row implementation
+for every scenario in SCENARIOS.
+
+    python -m pytest powerflow/analysis/test_cf_engine.py   # regression
+    python -m powerflow.analysis.test_cf_engine             # benchmark
+"""
+import copy
+import time
+import numpy as np
+import pandas as pd
+import pandapower as pp
+
+from powerflow.analysis.opf import apply_capacity_factors
+from powerflow.analysis.scenarios import SCENARIOS, BASE_CF
+
+
+def legacy_apply_cf_to_table(df, et_type, cfs, storage_mode, total_gen_breakdown):
+    """Per-row reference implementation (pre-vectorization OPFEngine._apply_scenario)."""
+    if len(df) == 0: return
+
+    if 'max_p_mw' not in df.columns: df['max_p_mw'] = df['p_mw']
+    if 'min_p_mw' not in df.columns: df['min_p_mw'] = 0.0
+
+    for idx in df.index:
+        if str(df.at[idx, 'type']) == 'border': continue
+
+        install_cap = df.at[idx, 'max_p_mw']
+        if pd.isna(install_cap) or install_cap <= 0:
+            install_cap = df.at[idx, 'p_mw']
+        df.at[idx, 'nameplate_p_mw'] = install_cap
+
+        gen_type = str(df.at[idx, 'type'])
+        cf = cfs.get(gen_type, 1.0)
+        actual_p = install_cap * cf
+        df.at[idx, 'p_mw'] = actual_p
+
+        if et_type == 'storage':
+            if storage_mode == 'charge_only':
+                df.at[idx, 'max_p_mw'] = 0.0
+                df.at[idx, 'min_p_mw'] = -actual_p
+            elif storage_mode == 'discharge_only':
+                df.at[idx, 'max_p_mw'] = actual_p
+                df.at[idx, 'min_p_mw'] = 0.0
+            else:
+                df.at[idx, 'max_p_mw'] = actual_p
+                df.at[idx, 'min_p_mw'] = -actual_p
+        else:
+            df.at[idx, 'max_p_mw'] = actual_p
+            df.at[idx, 'min_p_mw'] = 0.9 * actual_p
+
+        if gen_type not in total_gen_breakdown: total_gen_breakdown[gen_type] = 0
+        total_gen_breakdown[gen_type] += actual_p
+
+
+def build_test_net(n_units=60, seed=0):
+    """Small net shaped like the GridModeler base net (border gens, nameplate columns, storage)."""
+    rng = np.random.default_rng(seed)
+    net = pp.create_empty_network()
+    buses = [pp.create_bus(net, vn_kv=380.0) for _ in range(10)]
+    types = [t for t in BASE_CF if t != 'storage'] + ['unknown type']
+
+    pp.create_gen(net, bus=buses[0], p_mw=0.0, sn_mva=1700, min_p_mw=-1700, max_p_mw=1700,
+                  name="Border_France", type='border', controllable=True)
+    for i in range(n_units):
+        p = float(rng.uniform(10, 800))
+        bus = buses[i % len(buses)]
+        gen_type = types[i % len(types)]
+        pp.create_gen(net, bus=bus, p_mw=p, sn_mva=p / 0.9, type=gen_type, controllable=True)
+        pp.create_sgen(net, bus=bus, p_mw=p / 2, sn_mva=p / 1.8, type=gen_type, controllable=True)
+        pp.create_storage(net, bus=bus, p_mw=0, max_e_mwh=p, max_p_mw=p, min_p_mw=-p,
+                          sn_mva=p, type='storage', controllable=True)
+
+    # Nameplate fallbacks: missing and non-positive max_p_mw
+    net.gen.loc[net.gen.index[1:4], 'max_p_mw'] = np.nan
+    net.sgen.loc[net.sgen.index[:3], 'max_p_mw'] = 0.0
+    for et in ['gen', 'sgen', 'storage']:
+        net[et]['nameplate_p_mw'] = net[et]['max_p_mw']
+    return net
+
+
+def _run_both(net, scen):
+    cfs = scen.get('capacity_factors', {})
+    mode = scen.get('storage_mode', 'bidirectional')
+    legacy_net, new_net = copy.deepcopy(net), copy.deepcopy(net)
+
+    legacy_mix, new_mix = {}, {}
+    for et in ['gen', 'sgen', 'storage']:
+        legacy_apply_cf_to_table(legacy_net[et], et, cfs, mode, legacy_mix)
+        for gen_type, mw in apply_capacity_factors(new_net[et], et, cfs, mode).items():
+            new_mix[gen_type] = new_mix.get(gen_type, 0) + mw
+    return legacy_net, legacy_mix, new_net, new_mix
+
+
+def test_cf_engine_matches_legacy_for_all_scenarios():
+    net = build_test_net()
+    scenarios = dict(SCENARIOS)
+    # Cover every storage mode, including an unknown one (falls back to bidirectional)
+    for mode in ['charge_only', 'discharge_only', 'bidirectional', 'unknown_mode']:
+        scenarios[f'mode_{mode}'] = dict(SCENARIOS['avg_day_charge_high'], storage_mode=mode)
+
+    for name, scen in scenarios.items():
+        legacy_net, legacy_mix, new_net, new_mix = _run_both(net, scen)
+        for et in ['gen', 'sgen', 'storage']:
+            pd.testing.assert_frame_equal(new_net[et], legacy_net[et], check_dtype=False, obj=f"{name}/{et}")
+        assert list(new_mix) == list(legacy_mix), name
+        np.testing.assert_allclose(list(new_mix.values()), list(legacy_mix.values()), rtol=1e-12, err_msg=name)
+
+
+def test_cf_engine_empty_and_border_only_tables():
+    net = pp.create_empty_network()
+    bus = pp.create_bus(net, vn_kv=380.0)
+    assert apply_capacity_factors(net.sgen, 'sgen', BASE_CF) == {}
+
+    pp.create_gen(net, bus=bus, p_mw=0.0, max_p_mw=400, min_p_mw=-400, type='border')
+    before = net.gen.copy()
+    assert apply_capacity_factors(net.gen, 'gen', BASE_CF) == {}
+    pd.testing.assert_frame_equal(net.gen, before)
+
+
+def benchmark(n_units=3000, repeats=3):
+    net = build_test_net(n_units=n_units)
+    scen = SCENARIOS['14.pv_avg_wind_avg_load_avg']
+    cfs, mode = scen['capacity_factors'], scen['storage_mode']
+
+    def timed(fn):
+        best = float('inf')
+        for _ in range(repeats):
+            tables = {et: net[et].copy() for et in ['gen', 'sgen', 'storage']}
+            t = time.perf_counter()
+            fn(tables)
+            best = min(best, time.perf_counter() - t)
+        return best
+
+    t_legacy = timed(lambda tables: [legacy_apply_cf_to_table(tables[et], et, cfs, mode, {}) for et in tables])
+    t_new = timed(lambda tables: [apply_capacity_factors(tables[et], et, cfs, mode) for et in tables])
+
+    n_rows = sum(len(net[et]) for et in ['gen', 'sgen', 'storage'])
+    print(f"CF application over {n_rows} units (best of {repeats}):")
+    print(f"  Legacy per-row : {t_legacy * 1000:8.1f} ms")
+    print(f"  Column-wise    : {t_new * 1000:8.1f} ms  ({t_legacy / t_new:.0f}x faster)")
+
+
+if __name__ == "__main__":
+    test_cf_engine_matches_legacy_for_all_scenarios()
+    test_cf_engine_empty_and_border_only_tables()
+    print("✓ Column-wise CF engine matches legacy output for all scenarios.")
+    benchmark()
@@ -0,0 +1,94 @@
+"""
+Regression check for the compiled pypower case: every scenario solved through CompiledCase must
+match pandapower's runopp on the same net (cost, generator dispatch, line flows).
+
+    python -m pytest powerflow/analysis/test_compiled_case.py
+"""
+import copy
+import numpy as np
+import pandas as pd
+import pandapower as pp
+import pandapower.networks as nw
+
+from powerflow.analysis.compiled_case import CompiledCaseCache
+
+RESULT_TABLES = ['res_gen', 'res_line']
+
+
+def build_test_net():
+    """case39 (lines, trafos, poly costs) with a controllable DC line, i.e. auxiliary OPF gens."""
+    net = nw.case39()
+    pp.create_dcline(net, from_bus=3, to_bus=10, p_mw=20.0, loss_percent=1.0, loss_mw=0.5, vm_from_pu=1.0,
+                     vm_to_pu=1.0, max_p_mw=100.0, min_q_from_mvar=-50.0, max_q_from_mvar=50.0,
+                     min_q_to_mvar=-50.0, max_q_to_mvar=50.0)
+    pp.create_poly_cost(net, 0, 'dcline', cp1_eur_per_mw=1.0)
+    return net
+
+
+def _scale_load(net, factor):
+    net.load['p_mw'] *= factor
+    net.load['q_mvar'] *= factor
+
+
+def _change_costs(net):
+    gens = net.poly_cost['et'] == 'gen'
+    net.poly_cost.loc[gens, 'cp1_eur_per_mw'] = np.linspace(10.0, 60.0, int(gens.sum()))
+
+
+def _tighten_line_limits(net):
+    # RATE_A is patched per solve: the most loaded lines become binding
+    net.line.loc[net.line.index[:20], 'max_loading_percent'] = 70.0
+
+
+def _limit_gens(net):
+    net.gen['max_p_mw'] = net.gen['max_p_mw'] * 0.9
+
+
+# Applied cumulatively to one net: each step is a new scenario on the same topology
+SCENARIO_STEPS = [
+    ('base', lambda net: None),
+    ('load_up', lambda net: _scale_load(net, 1.05)),
+    ('costs', _change_costs),
+    ('load_down', lambda net: _scale_load(net, 0.85)),
+    ('line_limits', _tighten_line_limits),
+    ('gen_limits', _limit_gens),
+]
+
+
+def _assert_same_results(ref, new, name):
+    assert new.OPF_converged, name
+    np.testing.assert_allclose(new.res_cost, ref.res_cost, rtol=1e-6, err_msg=name)
+    for table in RESULT_TABLES:
+        pd.testing.assert_frame_equal(new[table], ref[table], check_dtype=False, atol=1e-4, rtol=1e-6,
+                                      obj=f"{name}/{table}")
+
+
+def test_compiled_case_matches_runopp():
+    net = build_test_net()
+    cache = CompiledCaseCache()
+    for name, step in SCENARIO_STEPS:
+        step(net)
+        ref = copy.deepcopy(net)
+        pp.runopp(ref, calculate_voltage_angles=True, init='flat')
+        assert ref.OPF_converged, name
+
+        new = copy.deepcopy(net)
+        cache.get(new, calculate_voltage_angles=True).solve(new, init='flat')
+        _assert_same_results(ref, new, name)
+        assert len(new.gen) == len(net.gen), name
+
+    # Loads, costs and line limits are patched: the case is compiled once for all scenarios
+    assert cache.stats == {'compiled': 1, 'reused': len(SCENARIO_STEPS) - 1}
+
+
+def test_compiled_pf_start_matches_runopp():
+    # init='pf' must start PIPS from a power flow exactly like runopp does, also when res_bus holds a seed
+    net = build_test_net()
+    ref = copy.deepcopy(net)
+    pp.runopp(ref, calculate_voltage_angles=True, init='pf')
+    assert ref.OPF_converged
+
+    new = copy.deepcopy(net)
+    pp.runpp(new, calculate_voltage_angles=True)
+    CompiledCaseCache().get(new, calculate_voltage_angles=True).solve(new, init='pf')
+    _assert_same_results(ref, new, 'pf')
@@ -0,0 +1,195 @@
+"""
+Regression check for the bulk network build: GridModeler must produce the same base net as the
+element-wise build it replaced (values, dtypes, column order and None vs NaN in object columns,
+since the topology fingerprints hash them).
+
+    python -m pytest powerflow/analysis/test_grid_building.py
+"""
+import numpy as np
+import pandas as pd
+import pandapower as pp
+import pytest
+
+from powerflow.analysis import config
+from powerflow.analysis.grid_building import GridModeler
+
+
+class LegacyGridModeler(GridModeler):
+    """Element-wise reference implementation (pre-bulk GridModeler)."""
+
+    def _build_network_from_components(self):
+        net = pp.create_empty_network(name="German Grid Base")
+        buses_to_add = self.buses[self.buses['vn_kv'].isin(config.STANDARD_VOLTAGE_LEVELS)].copy()
+
+        for _, bus in buses_to_add.iterrows():
+            idx = pp.create_bus(net, vn_kv=bus['vn_kv'], name=bus['name'], geodata=(bus['lat'], bus['lon']))
+            self.bus_mapping[bus['bus_id']] = idx
+            net.bus.at[idx, 'geo'] = (bus['lat'], bus['lon'])
+
+        added_bus_pp_indices = set(net.bus.index)
+        ext_grid_buses = set()
+
+        for eg in self.ext_grid_list:
+            bus_idx = self.bus_mapping.get(eg['bus_id'])
+            if bus_idx in added_bus_pp_indices:
+                if eg['type'] == 'main_slack':
+                    pp.create_ext_grid(net, bus=bus_idx, vm_pu=eg['vm_pu'], va_degree=eg.get('va_degree', 0.0),
+                                       max_p_mw=eg['max_p_mw'], min_p_mw=eg['min_p_mw'],
+                                       name=f"ExtGrid_{eg['country']}", slack_weight=eg['slack_weight'])
+                    net.ext_grid.at[net.ext_grid.index[-1], 'type'] = 'main_slack'
+                else:
+                    sn_mva = max(abs(eg['max_p_mw']), abs(eg['min_p_mw'])) or 1000.0
+                    pp.create_gen(net, bus=bus_idx, p_mw=0.0, vm_pu=eg['vm_pu'], sn_mva=sn_mva,
+                                  min_p_mw=eg['min_p_mw'], max_p_mw=eg['max_p_mw'], name=f"Border_{eg['country']}",
+                                  type='border', controllable=True)
+                    net.gen.at[net.gen.index[-1], 'nameplate_p_mw'] = sn_mva
+                    net.gen.at[net.gen.index[-1], 'nameplate_sn_mva'] = sn_mva
+                ext_grid_buses.add(bus_idx)
+
+        for _, line in self.connections.iterrows():
+            if str(line.get('name', '')) == 'way/753560476':
+                continue
+            from_bus = self.bus_mapping.get(line['from_bus_id'])
+            to_bus = self.bus_mapping.get(line['to_bus_id'])
+            if from_bus in added_bus_pp_indices and to_bus in added_bus_pp_indices:
+                if 'DC' in str(line.get('line_type', '')).upper() or 'DC' in str(line.get('ac_dc_type', '')).upper():
+                    v_base = net.bus.at[from_bus, 'vn_kv']
+                    i_max = line.get('max_i_ka', 1.0)
+                    capacity_mw = v_base * i_max * 1.5 if i_max > 0 else 1000.0
+                    pp.create_dcline(net, from_bus=from_bus, to_bus=to_bus, p_mw=0, loss_mw=capacity_mw * 0.01,
+                                     loss_percent=0, vm_from_pu=1.0, vm_to_pu=1.0, max_p_mw=capacity_mw,
+                                     min_q_from_mvar=-capacity_mw * 0.4, max_q_from_mvar=capacity_mw * 0.4,
+                                     min_q_to_mvar=-capacity_mw * 0.4, max_q_to_mvar=capacity_mw * 0.4,
+                                     name=f"HVDC_{line['name']}")
+                else:
+                    line_idx = pp.create_line_from_parameters(
+                        net, from_bus=from_bus, to_bus=to_bus, length_km=line['length_km'],
+                        r_ohm_per_km=line['r_ohm_per_km'], x_ohm_per_km=line['x_ohm_per_km'],
+                        c_nf_per_km=line['c_nf_per_km'], max_i_ka=line['max_i_ka'],
+                        parallel=int(line['parallel']), name=line['name'])
+                    net.line.at[line_idx, 'cables_per_phase'] = line.get('parallel_cables_per_phase', 1)
+                    if pd.notna(line.get('geographic_coordinates')):
+                        net.line.at[line_idx, 'geo_coords'] = str(line['geographic_coordinates'])
+
+        for _, trafo in self.transformers.iterrows():
+            hv_bus = self.bus_mapping.get(trafo['hv_bus_id'])
+            lv_bus = self.bus_mapping.get(trafo['lv_bus_id'])
+            if hv_bus in added_bus_pp_indices and lv_bus in added_bus_pp_indices:
+                pp.create_transformer_from_parameters(
+                    net, hv_bus=hv_bus, lv_bus=lv_bus, sn_mva=trafo['sn_mva'], vn_hv_kv=net.bus.at[hv_bus, 'vn_kv'],
+                    vn_lv_kv=net.bus.at[lv_bus, 'vn_kv'], vk_percent=trafo['vk_percent'],
+                    vkr_percent=trafo['vkr_percent'], pfe_kw=trafo['pfe_kw'], i0_percent=trafo['i0_percent'],
+                    name=trafo['transformer_id'])
+
+        self._add_hvdc_lines(net)
+        self._add_generators_and_loads(net, ext_grid_buses)
+        return net
+
+    def _add_generators_and_loads(self, net, ext_grid_buses):
+        pv_buses = self._select_pv_buses_strategy(net, ext_grid_buses)
+        for _, gen in self.generators.iterrows():
+            bus_idx = self.bus_mapping.get(gen['bus_id'])
+            if bus_idx is None or bus_idx not in net.bus.index:
+                continue
+            p, sn = gen['p_mw'], gen['sn_mva']
+            if 'storage' in str(gen['generation_type']).lower():
+                pp.create_storage(net, bus=bus_idx, p_mw=0, max_e_mwh=sn * 2, max_p_mw=p, min_p_mw=-p, q_mvar=0,
+                                  sn_mva=sn, name=gen['generator_name'], type=gen['generation_type'],
+                                  controllable=True)
+                et = 'storage'
+            elif bus_idx in pv_buses:
+                pp.create_gen(net, bus=bus_idx, p_mw=p, vm_pu=gen['vm_pu'], sn_mva=sn, name=gen['generator_name'],
+                              type=gen['generation_type'], controllable=True)
+                et = 'gen'
+            else:
+                pp.create_sgen(net, bus=bus_idx, p_mw=p, q_mvar=0, sn_mva=sn, name=gen['generator_name'],
+                               type=gen['generation_type'], controllable=True)
+                et = 'sgen'
+            net[et].at[net[et].index[-1], 'nameplate_p_mw'] = p
+            net[et].at[net[et].index[-1], 'nameplate_sn_mva'] = sn
+
+        for _, load in self.loads.iterrows():
+            bus_idx = self.bus_mapping.get(load['bus_id'])
+            if bus_idx is not None and bus_idx in net.bus.index:
+                pp.create_load(net, bus=bus_idx, p_mw=load['p_mw'], q_mvar=load['q_mvar'], name=load['load_name'])
+                net.load.at[net.load.index[-1], 'nameplate_p_mw'] = load['p_mw']
+                net.load.at[net.load.index[-1], 'nameplate_q_mvar'] = load['q_mvar']
+
+
+def write_test_data(path, n=4):
+    """Input CSVs of an n x n 380 kV grid with 220 kV spurs, a 110 kV bus, DC links and border grids."""
+    rng = np.random.default_rng(0)
+    buses, conns, gens = [], [], []
+    for i in range(n):
+        for j in range(n):
+            buses.append({'bus_id': f'b{i}_{j}', 'vn_kv': 380.0, 'name': f'B{i}_{j}', 'lat': 48 + i * 0.5,
+                          'lon': 7 + j * 0.8})
+            if (i + j) % 3 == 0:
+                buses.append({'bus_id': f'b{i}_{j}_220', 'vn_kv': 220.0, 'name': f'B{i}_{j}_220',
+                              'lat': 48.01 + i * 0.5, 'lon': 7.01 + j * 0.8})
+    buses.append({'bus_id': 'b110', 'vn_kv': 110.0, 'name': 'B110', 'lat': 49.0, 'lon': 8.0})
+
+    def connect(a, b, name, **kwargs):
+        conns.append(dict({'from_bus_id': a, 'to_bus_id': b, 'length_km': 50 + rng.random() * 30,
+                           'r_ohm_per_km': 0.03, 'x_ohm_per_km': 0.26, 'c_nf_per_km': 13.0,
+                           'max_i_ka': 2.0 + rng.random(), 'line_type': 'AC', 'ac_dc_type': 'AC',
+                           'parallel_cables_per_phase': 2, 'name': name, 'geographic_coordinates': None,
+                           'switch_group': None, 'commissioning_year': 2000}, **kwargs))
+
+    for i in range(n):
+        for j in range(n - 1):
+            connect(f'b{i}_{j}', f'b{i}_{j + 1}', f'way/{i}_{j}h')
+            connect(f'b{j}_{i}', f'b{j + 1}_{i}', f'way/{j}_{i}v', geographic_coordinates=f"[[{7 + i}, {48 + j}]]")
+    connect('b0_0', 'b0_1', 'dup', parallel_cables_per_phase=np.nan)
+    connect('b0_0', f'b{n - 1}_{n - 1}', 'dc1', line_type='DC', ac_dc_type='DC')
+    connect('b1_1', 'b1_2', 'way/753560476')
+    connect('b1_1', 'b110', 'to_110kv')
+
+    trafos = [{'hv_bus_id': b['bus_id'][:-4], 'lv_bus_id': b['bus_id'], 'sn_mva': 600.0,
+               'transformer_id': f"t_{b['bus_id']}"} for b in buses if b['vn_kv'] == 220.0]
+    types = ['solar radiant energy', 'wind_onshore', 'natural gas', 'storage', 'pumped storage']
+    for k, b in enumerate(buses):
+        for t in rng.choice(types, 2, replace=False):
+            p = float(50 + rng.random() * 300)
+            gens.append({'bus_id': b['bus_id'], 'generation_type': t, 'p_mw': p, 'vm_pu': 1.0, 'sn_mva': p / 0.9,
+                         'generator_name': f'gen_{t[:4]}_{k}', 'commissioning_year': 2010})
+    loads = [{'bus_id': b['bus_id'], 'p_mw': float(100 + rng.random() * 300), 'load_name': f"L_{b['name']}"}
+             for b in buses]
+    ext_grids = [
+        {'bus_id': 'b1_1', 'grid_type': 'main_slack', 'country': 'Germany', 'vm_pu': 1.0, 'max_p_mw': 999999,
+         'min_p_mw': -999999},
+        {'bus_id': 'b0_0', 'grid_type': 'border', 'country': 'France', 'vm_pu': 1.0, 'max_p_mw': 1700,
+         'min_p_mw': -1700},
+        {'bus_id': f'b{n - 1}_0_220' if (n - 1) % 3 == 0 else 'b0_1', 'grid_type': 'border', 'country': 'Poland',
+         'vm_pu': 1.0, 'max_p_mw': 0, 'min_p_mw': 0},
+    ]
+    hvdc = [{'name': 'SuedLink', 'capacity_mw': 2000, 'from_lat': 48.0, 'from_lon': 7.0, 'to_lat': 49.5,
+             'to_lon': 9.4, 'in_service': 'true'}]
+    for name, rows in [('buses', buses), ('connections', conns), ('transformers', trafos), ('generators', gens),
+                       ('loads', loads), ('external_grids', ext_grids), ('hvdc_projects', hvdc)]:
+        pd.DataFrame(rows).to_csv(path / f"{name}.csv", sep=';', index=False)
+
+
+def build(modeler_class):
+    modeler = modeler_class()
+    modeler._load_data()
+    modeler._preprocess_data()
+    modeler._setup_external_grids()
+    return modeler._build_network_from_components()
+
+
+@pytest.mark.parametrize('strategy', ['all_gen_buses', 'mixed', 'voltage_based', 'none'])
+def test_bulk_build_matches_element_wise_build(monkeypatch, tmp_path, strategy):
+    monkeypatch.setattr(config, 'DATA_DIR', str(tmp_path))
+    monkeypatch.setattr(config, 'PV_CONTROL_STRATEGY', strategy)
+    write_test_data(tmp_path)
+    legacy, bulk = build(LegacyGridModeler), build(GridModeler)
+
+    for et in ['bus', 'line', 'trafo', 'dcline', 'ext_grid', 'gen', 'sgen', 'storage', 'load']:
+        assert len(legacy[et]) > 0, et
+    for key, table in legacy.items():
+        if not isinstance(table, pd.DataFrame): continue
+        pd.testing.assert_frame_equal(bulk[key], table, check_exact=True, obj=key)
+        # assert_frame_equal treats None and NaN as equal - fingerprints do not
+        for col in table.columns[table.dtypes == object]:
+            assert list(bulk[key][col].map(type)) == list(table[col].map(type)), f"{key}.{col}"
@@ -0,0 +1,108 @@
+"""
+Regression checks for the hosting-capacity analysis (Injections.py, hosting_map.py).
+
+    python -m pytest powerflow/analysis/test_hosting_map.py
+"""
+import numpy as np
+import pandapower as pp
+import pandapower.networks as nw
+
+from powerflow.analysis import config
+from powerflow.analysis.hosting_map import build_hosting_map
+from powerflow.analysis.Injections import InjectionAnalyzer, _site_record
+
+
+def build_test_net():
+    """case118 with (lat, lon) bus locations like the GridModeler base net."""
+    net = nw.case118()
+    net.bus['geo'] = [(50.0 + 0.01 * i, 10.0) for i in range(len(net.bus))]
+    return net
+
+
+def build_trafo_net():
+    """380 kV slack feeding a 220 kV load through one 300 MVA transformer; the line is far from its limit."""
+    net = pp.create_empty_network()
+    b0, b1, b2 = pp.create_bus(net, 380.0), pp.create_bus(net, 220.0), pp.create_bus(net, 220.0)
+    net.bus['geo'] = [(50.0, 10.0), (50.1, 10.0), (50.2, 10.0)]
+    pp.create_ext_grid(net, b0, vm_pu=1.0)
+    pp.create_transformer_from_parameters(net, b0, b1, sn_mva=300.0, vn_hv_kv=380.0, vn_lv_kv=220.0, vkr_percent=0.3,
+                                          vk_percent=12.0, pfe_kw=0.0, i0_percent=0.0, max_loading_percent=100.0)
+    pp.create_line_from_parameters(net, b1, b2, length_km=10.0, r_ohm_per_km=0.02, x_ohm_per_km=0.25,
+                                   c_nf_per_km=10.0, max_i_ka=5.0, max_loading_percent=100.0)
+    pp.create_load(net, b2, p_mw=50.0, q_mvar=0.0)
+    return net
+
+
+def test_pf_search_respects_trafo_limits(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, 'OUTPUT_DIR', str(tmp_path))
+    monkeypatch.setattr(config, 'RESULT_CACHE_ENABLED', False)
+    monkeypatch.setattr(config, 'HOSTING_CAPACITY_CONFIRM_OPF', False)
+    analyzer = InjectionAnalyzer(build_trafo_net(), [])
+    site_base = analyzer.prepare_base(config.HOSTING_CAPACITY_SCENARIO)
+    record = analyzer.evaluate_buses(site_base, [2], config.HOSTING_CAPACITY_SCENARIO, jobs=1).iloc[0]
+
+    # Trafo rating plus the local load, not the line-only PTDF bound
+    assert record['method'] == 'pf_search'
+    assert record['limiting_factor'].startswith('Trafo 0')
+    assert 300.0 < record['max_injection_mw'] < 400.0
+
+
+def test_empty_evaluation_has_record_columns():
+    analyzer = InjectionAnalyzer(build_test_net(), [])
+    empty = analyzer.evaluate_buses(None, [], config.HOSTING_CAPACITY_SCENARIO)
+    assert len(empty) == 0
+    assert list(empty.columns) == list(_site_record(None))
+
+
+def test_hosting_map_without_refinement(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, 'OUTPUT_DIR', str(tmp_path))
+    monkeypatch.setattr(config, 'RESULT_CACHE_ENABLED', False)
+    # No bus gets near the target: nothing is refined, every bus keeps its PTDF estimate
+    frame = build_hosting_map(build_test_net(), [], target_mw=1e6, voltage_levels=[345.0], jobs=1,
+                              create_map=False)
+    assert len(frame) > 0
+    assert not frame['refined'].any()
+    assert (frame['source'] == 'ptdf').all()
+    np.testing.assert_array_equal(frame['max_mw'], frame['est_max_mw'])
+    assert (tmp_path / config.HOSTING_CAPACITY_DIR / f"{config.HOSTING_MAP_FILE}.geojson").exists()
+
+
+
+def test_limited_pf_search_skips_the_opf(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, 'OUTPUT_DIR', str(tmp_path))
+    monkeypatch.setattr(config, 'RESULT_CACHE_ENABLED', False)
+    analyzer = InjectionAnalyzer(build_trafo_net(), [])
+    site_base = analyzer.prepare_base(config.HOSTING_CAPACITY_SCENARIO)
+    _, _, result = analyzer._solve_site(site_base, 2, config.HOSTING_CAPACITY_SCENARIO, full_setup=False)
+    assert result['method'] == 'pf_search'
+    assert not result['opf_tried']
+
+
+def test_confirming_opf_is_capped_by_the_pre_estimate(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, 'OUTPUT_DIR', str(tmp_path))
+    monkeypatch.setattr(config, 'RESULT_CACHE_ENABLED', False)
+    # The search runs out of power flows before it reaches the trafo limit: the OPF decides
+    monkeypatch.setattr(config, 'HOSTING_CAPACITY_MAX_PF_CHECKS', 2)
+    analyzer = InjectionAnalyzer(build_trafo_net(), [])
+    site_base = analyzer.prepare_base(config.HOSTING_CAPACITY_SCENARIO)
+    net, inj_idx, result = analyzer._solve_site(site_base, 2, config.HOSTING_CAPACITY_SCENARIO, full_setup=False)
+
+    cap = max(result['estimate_mw'], result['pf_mw']) * (1.0 + config.HOSTING_CAPACITY_OPF_MARGIN) \
+        + config.HOSTING_CAPACITY_SEARCH_TOLERANCE_MW
+    assert net.gen.at[inj_idx, 'max_p_mw'] == cap
+    assert result['method'] == 'opf'
+    assert 300.0 < result['max_injection_mw'] <= cap
+
+
+def test_limit_names_the_line_at_its_own_limit():
+    analyzer = InjectionAnalyzer(build_trafo_net(), [])
+    net = build_trafo_net()
+    pp.runpp(net)
+    loading = float(net.res_line.at[0, 'loading_percent'])
+    assert analyzer._identify_limit(net) == "Voltage/Convergence"
+    # Limit set just above the solved loading (far below MAX_LINE_LOADING_PERCENT): that line binds
+    net.line.at[0, 'max_loading_percent'] = loading + 1.0
+    assert analyzer._identify_limit(net) == f"Line 0 Overload ({loading:.1f}%)"
+    # 0 = unconstrained
+    net.line.at[0, 'max_loading_percent'] = 0.0
+    assert analyzer._identify_limit(net) == "Voltage/Convergence"
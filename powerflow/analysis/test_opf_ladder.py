@@ -0,0 +1,72 @@
+"""
+Regression checks for the OPF fallback ladder: relaxing steps only touch the scenario net,
+never the base net shared by all scenarios of an engine.
+
+    python -m pytest powerflow/analysis/test_opf_ladder.py
+"""
+import pandas as pd
+import pandapower.networks as nw
+
+from powerflow.analysis import config
+from powerflow.analysis.opf import OPFEngine
+
+SCENARIO = '14.pv_avg_wind_avg_load_avg'
+
+
+def test_drop_line_limits_keeps_base_branch_limits(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, 'OUTPUT_DIR', str(tmp_path))
+    monkeypatch.setattr(config, 'OPF_FALLBACK_LADDER', ['drop_line_limits'])
+    monkeypatch.setattr(config, 'RESULT_CACHE_ENABLED', False)
+    net = nw.case118()
+    net.line['max_loading_percent'] = 100.0
+    net.trafo['max_loading_percent'] = 100.0
+    base_line, base_trafo = net.line.copy(), net.trafo.copy()
+
+    engine = OPFEngine(net, [], compiled_case=False)
+    for _ in range(2):
+        scenario_net, _, _ = engine.run_scenario(SCENARIO)
+        assert (scenario_net.trafo['max_loading_percent'] == 0.0).all()
+        pd.testing.assert_frame_equal(net.trafo, base_trafo)
+        pd.testing.assert_frame_equal(net.line, base_line)
+
+
+def test_lazy_line_limit_fallback_relaxes_once(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, 'OUTPUT_DIR', str(tmp_path))
+    monkeypatch.setattr(config, 'OPF_FALLBACK_LADDER', ['relax_q'])
+    monkeypatch.setattr(config, 'RESULT_CACHE_ENABLED', False)
+    net = nw.case118()
+    net.gen['max_p_mw'] *= 0.5
+    reference, _, converged = OPFEngine(net, [], compiled_case=False).run_scenario(SCENARIO)
+    assert converged
+
+    # Lines tight enough that the lazy rounds start; every round fails, so the ladder runs again
+    net.line['max_i_ka'] = reference.res_line['i_ka'].median() * 3.0
+    monkeypatch.setattr(config, 'ENFORCE_LINE_LIMITS', True)
+    monkeypatch.setattr(config, 'LINE_LIMIT_MODE', 'lazy')
+    engine = OPFEngine(net, [], compiled_case=False)
+    attempt = engine._attempt
+    monkeypatch.setattr(engine, '_attempt', lambda step, *args: step != 'line_limits' and attempt(step, *args))
+    scenario_net, _, _ = engine.run_scenario(SCENARIO)
+
+    stats = engine.solver_stats
+    assert stats['line_limit_rounds'] >= 1
+    assert stats['relaxations'] == ['relax_q']
+    assert [a['step'] for a in stats['attempts']] == ['relax_q', 'relax_q']
+    pd.testing.assert_series_equal(scenario_net.gen['max_q_mvar'], reference.gen['max_q_mvar'])
+
+
+def test_seed_report_solves_with_and_without_the_neighbour_seed(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, 'OUTPUT_DIR', str(tmp_path))
+    monkeypatch.setattr(config, 'RESULT_CACHE_ENABLED', False)
+    net = nw.case118()
+    net.gen['max_p_mw'] *= 0.5
+    engine = OPFEngine(net, [])
+    neighbour, _, converged = engine.run_scenario(SCENARIO)
+    assert converged
+    cost = engine.scenario_net.res_cost
+
+    report = engine.seed_report(neighbour)
+    assert set(report) == {'unseeded', 'seeded'}
+    for r in report.values():
+        assert r['converged'] and r['pf_iterations'] > 0 and r['opf_iterations'] > 0
+    assert engine.scenario_net.res_cost == cost
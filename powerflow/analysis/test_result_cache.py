@@ -0,0 +1,36 @@
+"""
+Regression checks for the result cache: a restored scenario net is used like a freshly solved one.
+
+    python -m pytest powerflow/analysis/test_result_cache.py
+"""
+import pandas as pd
+import pandapower.networks as nw
+
+from powerflow.analysis import config
+from powerflow.analysis.opf import OPFEngine, create_scenario_net
+
+SCENARIO = '14.pv_avg_wind_avg_load_avg'
+
+
+def build_test_net():
+    net = nw.case118()
+    # Minimum generation (90% of max_p_mw) below the load, so the OPF converges
+    net.gen['max_p_mw'] *= 0.5
+    return net
+
+
+def test_cache_hit_net_can_be_copied(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, 'OUTPUT_DIR', str(tmp_path))
+    monkeypatch.setattr(config, 'RESULT_CACHE_ENABLED', True)
+    engine = OPFEngine(build_test_net(), [], compiled_case=False)
+    solved, _, converged = engine.run_scenario(SCENARIO)
+    assert converged and not engine.solver_stats.get('cached')
+
+    restored, _, converged = engine.run_scenario(SCENARIO)
+    assert converged and engine.solver_stats['cached']
+    assert restored.res_cost == solved.res_cost
+
+    # The path of InjectionAnalyzer(base_result_net=...) on a cached base
+    copy_net = create_scenario_net(restored)
+    assert copy_net.res_cost == restored.res_cost
+    pd.testing.assert_frame_equal(copy_net.res_bus, solved.res_bus)
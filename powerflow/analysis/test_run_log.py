@@ -0,0 +1,28 @@
+"""
+Regression check for the run log: output inside a RunLog goes to its file, and the original streams
+and root logging handlers are back once it closes.
+
+    python -m pytest powerflow/analysis/test_run_log.py
+"""
+import logging
+import os
+import sys
+
+from powerflow.analysis.run_log import RunLog
+
+
+def test_run_log_restores_streams_and_handlers(tmp_path):
+    stdout, stderr, handlers = sys.stdout, sys.stderr, list(logging.getLogger().handlers)
+    path = os.path.join(tmp_path, 'run.txt')
+    with RunLog(path, 'outer'):
+        with RunLog(os.path.join(tmp_path, 'inner.txt'), 'inner'):
+            print("inner line")
+        print("outer line")
+        logging.getLogger('test').warning("logged line")
+        assert sys.stdout is not stdout
+
+    assert sys.stdout is stdout and sys.stderr is stderr
+    assert logging.getLogger().handlers == handlers
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    assert "outer line" in text and "test: logged line" in text and "inner line" not in text
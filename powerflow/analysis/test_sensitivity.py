@@ -0,0 +1,29 @@
+"""
+Regression check for the blockwise PTDF/LODF build (sensitivity.py): post-outage flows from the LODF
+must match a DC power flow with the branch taken out of service, whatever the column block size.
+
+    python -m pytest powerflow/analysis/test_sensitivity.py
+"""
+import copy
+import numpy as np
+import pandapower as pp
+import pandapower.networks as nw
+
+from powerflow.analysis import config
+from powerflow.analysis.sensitivity import SensitivityModel
+
+
+def test_blockwise_lodf_matches_dc_outages(monkeypatch):
+    monkeypatch.setattr(config, 'SENSITIVITY_BLOCK_COLUMNS', 7)
+    net = nw.case39()
+    model = SensitivityModel.from_net(net, 'test', tol=0.0)
+    pp.rundcpp(net, numba=False, calculate_voltage_angles=True)
+    flows = model.branch_flows(net)
+
+    outages = [b for b, island in zip(model.branches, model.islanding) if not island][:10]
+    post = model.post_outage_flows(flows, outages)
+    for k, (et, element) in enumerate(outages):
+        out = copy.deepcopy(net)
+        out[et].at[element, 'in_service'] = False
+        pp.rundcpp(out, numba=False, calculate_voltage_angles=True)
+        np.testing.assert_allclose(post[:, k], model.branch_flows(out), atol=1e-6, err_msg=f"{et} {element}")
@@ -19,13 +19,15 @@ class Visualizer:
         self.output_dir = config.OUTPUT_DIR
         self.voltage_colors = {380: '#8E44AD', 220: '#2980B9', 110: '#16A085'}
         self.loading_colors = {'normal': '#27ae60', 'elevated': '#f39c12', 'high': '#e67e22', 'critical': '#c0392b'}
+        # Hosting capacity (MW) below each bound gets the loading color of that band, above all 'normal'
+        self.hosting_bands = [(250, 'critical'), (1000, 'high'), (2500, 'elevated')]
 
     def get_voltage_status_color(self, vm_pu):
         if vm_pu > 1.05: return '#e74c3c'
         if vm_pu < 0.95: return '#3498db'
         return '#2ecc71'
 
-    def create_map(self, scenario_net, scenario_info, result_folder=None):
+    def create_map(self, scenario_net, scenario_info, result_folder=None, hosting_layer=None):
         if result_folder:
             scenario_name_folder = result_folder
         else:
@@ -115,6 +117,7 @@ class Visualizer:
                 folium.CircleMarker([l['lat'], l['lon']], radius=radius, color='#e74c3c', fill=True, fill_opacity=0.6, popup=popup_html, tooltip=f"Load: {l['p_mw']:.0f} MW").add_to(layer_loads)
 
         for l in [layer_grid_380, layer_grid_220, layer_loading, layer_gen, layer_storage, layer_loads, layer_trafos, layer_dc_lines, layer_border, layer_disc, layer_inj]: l.add_to(m)
+        if hosting_layer: self.add_hosting_capacity_layer(m, hosting_layer, show=False)
         self._add_scenario_dashboard(m, scenario_info)
         self._add_unified_legend(m)
         folium.LayerControl(collapsed=True, position='topleft').add_to(m)
@@ -124,6 +127,68 @@ class Visualizer:
         m.save(save_path)
         print(f"  ✓ Visualization saved to {save_path}")
 
+    def get_hosting_color(self, mw):
+        if mw is None: return '#7f8c8d'
+        for bound, band in self.hosting_bands:
+            if mw < bound: return self.loading_colors[band]
+        return self.loading_colors['normal']
+
+    def add_hosting_capacity_layer(self, m, geojson_path, show=True):
+        """Overlays a hosting map layer (hosting_map.py GeoJSON): a heat layer and one marker per bus."""
+        with open(geojson_path, 'r') as f: data = json.load(f)
+        features = [ft for ft in data['features'] if ft['properties'].get('max_mw') is not None]
+        if not features: return
+
+        layer_heat = folium.FeatureGroup(name='Hosting Capacity (Heatmap)', show=show)
+        layer_bus = folium.FeatureGroup(name='Hosting Capacity (Buses)', show=show)
+        peak = max(ft['properties']['max_mw'] for ft in features) or 1.0
+        points = [[ft['geometry']['coordinates'][1], ft['geometry']['coordinates'][0], ft['properties']['max_mw'] / peak]
+                  for ft in features]
+        plugins.HeatMap(points, radius=25, blur=20, min_opacity=0.3).add_to(layer_heat)
+
+        for ft in features:
+            p = ft['properties']
+            lon, lat = ft['geometry']['coordinates']
+            limit = p.get('limiting_factor') or (f"Line {p['est_limiting_line']} (estimate)" if p.get('est_limiting_line', -1) >= 0 else "Upper Bound")
+            popup = (f"<b>{p.get('bus_name') or p['bus_id']}</b> ({p.get('vn_kv', 0):.0f} kV)<br>"
+                     f"Hosting capacity: <b>{p['max_mw']:,.0f} MW</b> ({p.get('source', 'ptdf').replace('_', ' ').upper()})<br>"
+                     f"PTDF estimate: {p['est_max_mw']:,.0f} MW<br>Limit: {limit}")
+            folium.CircleMarker(
+                [lat, lon], radius=6 if p.get('source') != 'ptdf' else 4, color='#333', weight=1,
+                fill_color=self.get_hosting_color(p['max_mw']), fill_opacity=0.9,
+                popup=folium.Popup(popup, max_width=300), tooltip=f"{p['max_mw']:,.0f} MW"
+            ).add_to(layer_bus)
+
+        layer_heat.add_to(m)
+        layer_bus.add_to(m)
+
+    def create_hosting_capacity_map(self, geojson_path, title=None):
+        """Stand-alone map of a hosting map layer, saved next to the GeoJSON as <name>_map.html."""
+        with open(geojson_path, 'r') as f: data = json.load(f)
+        if not data['features']: return
+        coords = [ft['geometry']['coordinates'] for ft in data['features']]
+        m = folium.Map(location=[sum(c[1] for c in coords)/len(coords), sum(c[0] for c in coords)/len(coords)],
+                       zoom_start=6, tiles=None, prefer_canvas=True)
+        folium.TileLayer('CartoDB dark_matter', name='🌑 Dark Mode').add_to(m)
+        folium.TileLayer('CartoDB positron', name='☀️ Light Mode').add_to(m)
+        self.add_hosting_capacity_layer(m, geojson_path)
+
+        bands, lower = "", 0
+        for bound, band in self.hosting_bands:
+            bands += f'<span style="color:{self.loading_colors[band]}">● {lower:,}-{bound:,} MW</span><br>'
+            lower = bound
+        bands += f'<span style="color:{self.loading_colors["normal"]}">● &gt;{lower:,} MW</span><br>'
+        html = f"""<div style="position:fixed;bottom:20px;right:10px;width:180px;background:rgba(255,255,255,0.9);border:1px solid #ccc;border-radius:5px;padding:8px;z-index:999;font-family:sans-serif;font-size:10px;">
+        <h4 style="margin:0 0 5px 0;">{title or 'Hosting Capacity'}</h4>{bands}
+        <b>Source</b><br>● large: OPF / PF search &nbsp; ● small: PTDF estimate</div>"""
+        m.get_root().html.add_child(folium.Element(html))
+        folium.LayerControl(collapsed=True, position='topleft').add_to(m)
+        plugins.Fullscreen(position='topleft').add_to(m)
+
+        save_path = f"{os.path.splitext(geojson_path)[0]}_map.html"
+        m.save(save_path)
+        print(f"  ✓ Visualization saved to {save_path}")
+
     def _add_storage_marker(self, s, layer):
         """Adds specific storage markers (Small Circle Markers)."""
         p_mw = s['p_mw']
@@ -199,7 +264,7 @@ class Visualizer:
             p_abs = abs(g['p_mw'])
             if p_abs < 0.1: continue
             deg = (p_abs / total_p) * 360
-            color = config.GENERATOR_TYPE_COLORS.get(g['type'].lower(), '#999')
+            color = config.GENERATOR_TYPE_COLORS.get(str(g['type'] or 'other').lower(), '#999')
             segments.append(f"{color} {curr_deg:.1f}deg {curr_deg+deg:.1f}deg")
             curr_deg += deg
             rows += f"<tr><td>{g['type']}</td><td style='text-align:right'>{g['p_mw']:.1f}</td></tr>"